@@ -0,0 +1,175 @@
+"""Arrow batch'leriyle sonuç çekme + sonuç boyutu sınırlayıcı.
+
+Sonuç tek parça pandas frame olarak beklenmez: connector'ın Arrow batch'leri arka
+planda okunur, ilk sayfa geldiği anda gösterilebilir. Satır veya bayt tavanı aşılınca
+okuma durur (cursor kapatılır), kullanıcıya sonucun kesildiği bildirilir. Böylece
+bellek kullanımı sonuç boyutundan bağımsız olarak tavanla sınırlı kalır.
+"""
+import threading
+import time
+from concurrent.futures import CancelledError
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+
+DEFAULT_MAX_ROWS = 250_000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+FIRST_PAGE_ROWS = 1000
+
+
+class FetchCancelled(CancelledError):
+    """`BatchFetch.cancel()` ile durdurulan okuma (sonuç cache'e yazılmaz)."""
+
+
+@dataclass
+class FetchResult:
+    table: pa.Table
+    rows: int
+    nbytes: int
+    truncated: bool = False
+    reason: str | None = None  # "rows" / "bytes"
+    execute_s: float = 0.0  # ilk batch'e kadar (sorgu çalıştırma)
+    fetch_s: float = 0.0    # toplam süre (çalıştırma + çekme)
+
+    def to_pandas(self):
+        return self.table.to_pandas()
+
+
+def snowflake_batches(conn, sql: str):
+    """Snowflake cursor'undan Arrow tabloları üretir; üretici kapanınca cursor da kapanır."""
+    cur = conn.cursor()
+    try:
+        cur.execute(sql)
+        empty = True
+        for batch in cur.fetch_arrow_batches():
+            empty = False
+            yield batch
+        if empty:
+            # Boş sonuçta da kolon adları korunsun
+            names = [d[0] for d in (cur.description or [])]
+            yield pa.table({n: pa.array([], pa.string()) for n in names})
+    finally:
+        cur.close()
+
+
+def duckdb_batches(con, sql: str, batch_rows: int = 100_000):
+    """DuckDB bağlantısından Arrow batch'leri üretir (yerel warehouse stand-in'i).
+
+    Her çağrı kendi cursor'unu açar; böylece aynı bağlantı birden çok thread'den kullanılabilir.
+    """
+    cur = con.cursor()
+    try:
+        reader = cur.execute(sql).fetch_record_batch(batch_rows)
+        empty = True
+        for batch in reader:
+            empty = False
+            yield batch
+        if empty:
+            yield reader.schema.empty_table()
+    finally:
+        cur.close()
+
+
+def _concat(tables: list) -> pa.Table:
+    """Batch'leri birleştirir; chunk'lar arası tip farkında (ör. NUMBER -> int8/int16) genişletir."""
+    if not tables:
+        return pa.table({})
+    try:
+        return pa.concat_tables(tables)
+    except pa.ArrowInvalid:
+        return pa.concat_tables(tables, promote_options="permissive")
+
+
+def _fit_bytes(table: pa.Table, budget: int) -> pa.Table:
+    """Tablonun baştan `budget` bayta sığan kısmı (satır başı ortalama boyutla).
+
+    Dilim kopyalanır; yalnızca dilimlemek büyük batch'in tamponlarını bellekte tutardı.
+    """
+    if table.num_rows == 0 or budget <= 0:
+        return table.slice(0, 0)
+    n = min(table.num_rows, int(budget // max(table.nbytes / table.num_rows, 1)))
+    while n > 0:
+        head = table.take(pa.array(np.arange(n)))
+        if head.nbytes <= budget:
+            return head
+        # Değişken genişlikli kolonlarda ortalama tutmayabilir
+        n = min(n - 1, n * budget // head.nbytes)
+    return table.slice(0, 0)
+
+
+class BatchFetch:
+    """Batch'leri tavanlara kadar okur; ilk sayfa hazır olunca sinyal verir.
+
+    `run()` çağıran thread'de çalışır (genelde sorgu executor'ı); başka bir thread
+    `first_page()` ile ilk satırları beklemeden alabilir.
+    """
+
+    def __init__(self, batches_fn, max_rows: int = DEFAULT_MAX_ROWS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, first_page_rows: int = FIRST_PAGE_ROWS):
+        self.batches_fn = batches_fn
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.first_page_rows = first_page_rows
+        self.first_page_ready = threading.Event()
+        self.cancelled = threading.Event()
+        self._first_page = None
+        self.rows = 0
+        self.nbytes = 0
+
+    def first_page(self, timeout: float | None = None):
+        """İlk sayfayı pandas frame olarak döndürür; süre dolarsa None."""
+        if not self.first_page_ready.wait(timeout):
+            return None
+        return self._first_page
+
+    def cancel(self):
+        """Okumayı bir sonraki batch sınırında durdurur (cursor kapanır, kalan chunk'lar indirilmez)."""
+        self.cancelled.set()
+
+    def run(self) -> FetchResult:
+        if self.cancelled.is_set():
+            raise FetchCancelled()
+        tables = []
+        truncated, reason = False, None
+        t0 = time.perf_counter()
+        execute_s = None
+        batches = self.batches_fn()
+        try:
+            for batch in batches:
+                if self.cancelled.is_set():
+                    raise FetchCancelled()
+                if execute_s is None:
+                    execute_s = time.perf_counter() - t0
+                if isinstance(batch, pa.RecordBatch):
+                    batch = pa.Table.from_batches([batch])
+                if self.rows + batch.num_rows > self.max_rows:
+                    batch = batch.slice(0, self.max_rows - self.rows)
+                    truncated, reason = True, "rows"
+                if self.nbytes + batch.nbytes > self.max_bytes:
+                    batch = _fit_bytes(batch, self.max_bytes - self.nbytes)
+                    truncated, reason = True, "bytes"
+                    if batch.num_rows == 0 and tables:
+                        break
+                tables.append(batch)
+                self.rows += batch.num_rows
+                self.nbytes += batch.nbytes
+                if not self.first_page_ready.is_set() and (self.rows >= self.first_page_rows or truncated):
+                    self._publish_first_page(tables)
+                if truncated:
+                    break
+        finally:
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()  # üretici ise cursor'u kapatır, kalan chunk'lar indirilmez
+        table = _concat(tables)
+        if not self.first_page_ready.is_set():
+            self._publish_first_page([table])
+        fetch_s = time.perf_counter() - t0
+        return FetchResult(table=table, rows=self.rows, nbytes=self.nbytes, truncated=truncated, reason=reason,
+                           execute_s=execute_s if execute_s is not None else fetch_s, fetch_s=fetch_s)
+
+    def _publish_first_page(self, tables: list):
+        head = _concat(tables).slice(0, self.first_page_rows)
+        self._first_page = head.to_pandas()
+        self.first_page_ready.set()
@@ -0,0 +1,364 @@
+"""Streamlit'siz toplu soru çalıştırma (aylık rekabet raporları için).
+
+Sohbet ekranına tek tek yazılan soru listesi bir YAML/CSV dosyasından okunur ve
+uygulamayla aynı boru hattından geçer: system prompt -> LLM -> ```sql blokları ->
+Arrow batch'leriyle sonuç -> `prepare_frame` (TR sayı/tarih) -> ay/tarih sıralaması.
+LLM çağrıları ve warehouse sorguları ayrı, sınırlı eşzamanlılıkla çalışır; her sonuç
+Parquet/CSV olarak yazılır, yanında süre özeti (`summary.json`, `summary.csv`) bulunur.
+
+İstemci ve warehouse takılabilir: canlıda OpenAI + Snowflake oturum havuzu, çevrimdışı
+`benchmarks.fakes.FakeChatClient` + sentetik DuckDB.
+
+Soru dosyası:
+    # YAML: düz liste veya {id, question} sözlükleri (üst düzey "questions:" anahtarı da olur)
+    questions:
+      - id: getir_aylik_grp
+        question: 2024 yılında getir'in aylık GRP'si nedir?
+    # CSV: "question" kolonu (ve isteğe bağlı "id")
+
+Kullanım:
+    python batch.py sorular.yaml --out rapor/ --format parquet
+    python batch.py sorular.csv --out rapor/ --offline --rows-per-year 50000
+"""
+import csv
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from arrow_fetch import BatchFetch, duckdb_batches
+from frame_engine import prepare_frame
+from sql_stream import SqlFenceDetector
+from time_axis import apply_time_axes, normalize_months, sort_by_time
+
+try:  # opsiyonel: YAML soru dosyaları
+    import yaml
+except ImportError:  # yoksa yalnızca CSV okunur
+    yaml = None
+
+DEFAULT_MODEL = "gpt-5"
+
+
+# =========================
+# Soru dosyası
+# =========================
+def _slug(text: str, n: int = 40) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_")[:n] or "soru"
+
+
+def load_questions(path: str) -> list[dict]:
+    """[{"id", "question"}, ...]; id verilmemişse sıra numarasından üretilir."""
+    if path.lower().endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise RuntimeError("YAML soru dosyası için PyYAML gerekli (pip install pyyaml) ya da CSV kullanın.")
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        if isinstance(data, dict):
+            data = data.get("questions", [])
+        items = [d if isinstance(d, dict) else {"question": d} for d in data]
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            items = list(csv.DictReader(f))
+    out, seen = [], set()
+    for i, item in enumerate(items, 1):
+        q = str(item.get("question") or "").strip()
+        if not q:
+            continue
+        qid = _slug(item.get("id") or f"q{i:03d}")
+        while qid in seen:
+            qid += "_"
+        seen.add(qid)
+        out.append({"id": qid, "question": q})
+    return out
+
+
+# =========================
+# Warehouse arka uçları: sql -> Arrow batch üreticisi
+# =========================
+def duckdb_backend(con, dialect: str = "snowflake"):
+    """Yerel DuckDB; üretilen Snowflake SQL'i sqlglot ile DuckDB'ye çevrilir."""
+    import sqlglot
+
+    def batches(sql: str):
+        return duckdb_batches(con, sqlglot.transpile(sql, read=dialect, write="duckdb")[0])
+
+    return batches
+
+
+def snowflake_backend(pool):
+    """Paylaşılan oturum havuzu (bkz. warmup.SessionPool) üzerinden Snowflake."""
+    from warmup import pooled_batches
+
+    return lambda sql: pooled_batches(pool, sql)
+
+
+# =========================
+# Boru hattı
+# =========================
+@dataclass
+class BlockResult:
+    sql: str
+    path: str | None = None
+    rows: int = 0
+    truncated: bool = False
+    query_s: float = 0.0
+    post_s: float = 0.0
+    write_s: float = 0.0
+    error: str | None = None
+
+
+@dataclass
+class QuestionResult:
+    id: str
+    question: str
+    answer: str = ""
+    llm_first_token_s: float | None = None
+    llm_s: float = 0.0
+    total_s: float = 0.0
+    blocks: list = field(default_factory=list)
+    error: str | None = None
+
+
+class BatchRunner:
+    """Soruları `llm_workers` LLM ve `sql_workers` sorgu eşzamanlılığıyla çalıştırır.
+
+    `client`: OpenAI yüzeyli istemci (`chat.completions.create(..., stream=True)`),
+    `batches_fn(sql)`: Arrow batch üreticisi, `preflight(sql)`: isteğe bağlı `PreflightResult`.
+    """
+
+    def __init__(self, client, batches_fn, system_prompt: str, out_dir: str, fmt: str = "parquet",
+                 llm_workers: int = 4, sql_workers: int = 4, model: str = DEFAULT_MODEL,
+                 preflight=None, max_rows: int = 1_000_000, max_blocks: int = 6):
+        self.client = client
+        self.batches_fn = batches_fn
+        self.system_prompt = system_prompt
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.model = model
+        self.preflight = preflight
+        self.max_rows = max_rows
+        self.max_blocks = max_blocks
+        self.llm_workers = llm_workers
+        self.sql_workers = sql_workers
+        self._sql = ThreadPoolExecutor(max_workers=sql_workers, thread_name_prefix="batch-sql")
+        self._print_lock = threading.Lock()
+
+    def run(self, questions: list[dict], progress=None) -> list[QuestionResult]:
+        os.makedirs(self.out_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.llm_workers, thread_name_prefix="batch-llm") as llm:
+            futures = [llm.submit(self._question, q) for q in questions]
+            results = []
+            for f in futures:
+                results.append(f.result())
+                if progress is not None:
+                    with self._print_lock:
+                        progress(results[-1])
+        return results
+
+    # ---------- tek soru ----------
+    def _question(self, item: dict) -> QuestionResult:
+        res = QuestionResult(id=item["id"], question=item["question"])
+        t0 = time.perf_counter()
+        pending = []  # [(BlockResult, Future)]
+        try:
+            messages = [{"role": "system", "content": self.system_prompt},
+                        {"role": "user", "content": item["question"]}]
+            detector = SqlFenceDetector()
+            for chunk in self.client.chat.completions.create(model=self.model, messages=messages, stream=True):
+                if not chunk.choices:
+                    continue
+                if res.llm_first_token_s is None:
+                    res.llm_first_token_s = time.perf_counter() - t0
+                # Uygulamadaki gibi: blok kapanır kapanmaz sorgu başlar, LLM akışı sürer
+                for sql in detector.feed(chunk.choices[0].delta.content or ""):
+                    if len(pending) < self.max_blocks:
+                        block = BlockResult(sql=sql)
+                        pending.append((block, self._sql.submit(self._block, res.id, len(pending), block)))
+            res.llm_s = time.perf_counter() - t0
+            res.answer = detector.text
+        except Exception as e:
+            res.error = f"LLM: {e}"
+        for block, future in pending:
+            future.result()
+            res.blocks.append(block)
+        if not pending and res.error is None:
+            res.error = "SQL bloğu yok"
+        res.total_s = time.perf_counter() - t0
+        return res
+
+    def _block(self, qid: str, k: int, block: BlockResult):
+        sql = block.sql
+        if self.preflight is not None:
+            checked = self.preflight(sql)
+            if not checked.ok:
+                block.error = "ön kontrol: " + "; ".join(checked.errors)
+                return
+            sql = block.sql = checked.sql
+        try:
+            t0 = time.perf_counter()
+            fetched = BatchFetch(lambda: self.batches_fn(sql), max_rows=self.max_rows,
+                                 max_bytes=1 << 62).run()
+            block.query_s = time.perf_counter() - t0
+            block.rows, block.truncated = fetched.rows, fetched.truncated
+
+            t0 = time.perf_counter()
+            df, profile = prepare_frame(fetched.to_pandas())
+            if profile.month_col == "AYISMI":
+                df = normalize_months(df, "AYISMI")
+            df = sort_by_time(apply_time_axes(df), profile.year_col)
+            block.post_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            block.path = self._write(df, qid if k == 0 else f"{qid}_{k + 1}")
+            block.write_s = time.perf_counter() - t0
+        except Exception as e:
+            block.error = f"{type(e).__name__}: {e}"
+
+    def _write(self, df: pd.DataFrame, name: str) -> str:
+        # Kategorik zaman eksenleri (OCAK..ARALIK) sıralı kalsın diye dosyaya düz metin yazılır
+        df = df.copy(deep=False)
+        for c in df.columns:
+            if isinstance(df[c].dtype, pd.CategoricalDtype):
+                df[c] = df[c].astype(str)
+        path = os.path.join(self.out_dir, f"{name}.{'csv' if self.fmt == 'csv' else 'parquet'}")
+        if self.fmt == "csv":
+            df.to_csv(path, index=False, encoding="utf-8-sig")
+        else:
+            df.to_parquet(path, index=False, compression="zstd")
+        return path
+
+
+# =========================
+# Özet
+# =========================
+def summarize(results: list[QuestionResult], wall_s: float) -> dict:
+    blocks = [b for r in results for b in r.blocks]
+
+    def pct(vals):
+        vals = [v for v in vals if v is not None]
+        if not vals:
+            return None
+        arr = np.asarray(vals)
+        return {"p50": float(np.percentile(arr, 50)), "p95": float(np.percentile(arr, 95)), "max": float(arr.max())}
+
+    return {
+        "questions": len(results),
+        "failed": sum(1 for r in results if r.error or any(b.error for b in r.blocks)),
+        "blocks": len(blocks),
+        "rows": sum(b.rows for b in blocks),
+        "wall_s": wall_s,
+        "questions_per_min": len(results) / wall_s * 60 if wall_s else None,
+        "llm_first_token_s": pct([r.llm_first_token_s for r in results]),
+        "llm_s": pct([r.llm_s for r in results]),
+        "query_s": pct([b.query_s for b in blocks if not b.error]),
+        "post_s": pct([b.post_s for b in blocks if not b.error]),
+        "total_s": pct([r.total_s for r in results]),
+    }
+
+
+def write_summary(results: list[QuestionResult], summary: dict, out_dir: str):
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "questions": [asdict(r) for r in results]}, f,
+                  indent=2, ensure_ascii=False)
+    rows = []
+    for r in results:
+        for k, b in enumerate(r.blocks or [BlockResult(sql="")]):
+            rows.append({"id": r.id, "question": r.question, "block": k + 1, "path": b.path, "rows": b.rows,
+                         "truncated": b.truncated, "llm_s": round(r.llm_s, 3), "query_s": round(b.query_s, 3),
+                         "post_s": round(b.post_s, 3), "write_s": round(b.write_s, 3),
+                         "total_s": round(r.total_s, 3), "error": r.error or b.error, "sql": b.sql})
+    pd.DataFrame(rows).to_csv(os.path.join(out_dir, "summary.csv"), index=False, encoding="utf-8-sig")
+
+
+def run_batch(runner: BatchRunner, questions: list[dict], progress=None) -> dict:
+    t0 = time.perf_counter()
+    results = runner.run(questions, progress=progress)
+    summary = summarize(results, time.perf_counter() - t0)
+    write_summary(results, summary, runner.out_dir)
+    return summary
+
+
+# =========================
+# Kurulum: canlı / çevrimdışı
+# =========================
+def offline_setup(rows_per_year: int = 50_000, seed: int = 7, first_token_delay: float = 0.0,
+                  chunk_delay: float = 0.0):
+    """(client, batches_fn, system_prompt): sentetik DuckDB + senaryolu sahte LLM."""
+    import duckdb
+
+    from benchmarks.e2e import SCENARIO, SCHEMA, synthetic_system_prompt
+    from benchmarks.fakes import FakeChatClient, answer_with_sql
+    from benchmarks.synthetic import load_duckdb
+
+    con = duckdb.connect()
+    load_duckdb(con, SCHEMA, rows_per_year, seed=seed)
+    client = FakeChatClient([(re.escape(q), answer_with_sql(sql)) for q, sql in SCENARIO],
+                            first_token_delay=first_token_delay, chunk_delay=chunk_delay)
+    return client, duckdb_backend(con), synthetic_system_prompt(con)
+
+
+def live_setup():
+    """(client, batches_fn, system_prompt, preflight): secrets'taki OpenAI + Snowflake ile."""
+    from prompts import PROMPT_MODE, get_schema_loader, get_system_prompt
+    from sql_preflight import SqlValidator
+    from warmup import get_llm_client, get_session_pool, snowflake_factory
+
+    pool = get_session_pool()
+    if pool is None:
+        conn = snowflake_factory()
+        from arrow_fetch import snowflake_batches
+
+        batches_fn = lambda sql: snowflake_batches(conn, sql)
+    else:
+        batches_fn = snowflake_backend(pool)
+    validator = SqlValidator(get_schema_loader(PROMPT_MODE).columns())
+    return get_llm_client(), batches_fn, get_system_prompt(), validator.check
+
+
+def main(argv=None) -> dict:
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("questions", help="YAML veya CSV soru dosyası")
+    parser.add_argument("--out", default="batch_out", help="sonuç klasörü")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--llm-workers", type=int, default=4)
+    parser.add_argument("--sql-workers", type=int, default=4)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--max-rows", type=int, default=1_000_000)
+    parser.add_argument("--offline", action="store_true", help="sahte LLM + sentetik DuckDB (benchmarks/)")
+    parser.add_argument("--rows-per-year", type=int, default=50_000, help="--offline için sentetik satır sayısı")
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="--offline sahte LLM gecikmesi (sn)")
+    args = parser.parse_args(argv)
+
+    questions = load_questions(args.questions)
+    if args.offline:
+        from benchmarks.micro import quiet_streamlit
+
+        quiet_streamlit()
+        client, batches_fn, system_prompt = offline_setup(args.rows_per_year,
+                                                          first_token_delay=args.first_token_delay)
+        preflight = None
+    else:
+        client, batches_fn, system_prompt, preflight = live_setup()
+    runner = BatchRunner(client, batches_fn, system_prompt, args.out, fmt=args.format,
+                         llm_workers=args.llm_workers, sql_workers=args.sql_workers, model=args.model,
+                         preflight=preflight, max_rows=args.max_rows)
+
+    def progress(r: QuestionResult):
+        status = r.error or next((b.error for b in r.blocks if b.error), None) or "ok"
+        print(f"[{r.id}] {r.total_s:.2f} sn · {sum(b.rows for b in r.blocks)} satır · {status}")
+
+    summary = run_batch(runner, questions, progress=progress)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
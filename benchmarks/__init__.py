@@ -0,0 +1,8 @@
+"""Çevrimdışı performans ölçümleri (canlı OpenAI/Snowflake gerektirmez).
+
+- `synthetic`: fieldContext kolonlarıyla sentetik REKABET verisi, DuckDB yükleyici
+- `fakes`: senaryolu sahte chat istemcisi
+- `micro`: dönüşüm ve grafik fonksiyonlarının micro-benchmark'ları
+- `e2e`: sahte LLM + DuckDB ile uçtan uca turlar
+- `run`: hepsini çalıştırıp tek JSON rapor yazar (`python -m benchmarks.run --out bench.json`)
+"""
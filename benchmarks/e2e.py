@@ -0,0 +1,169 @@
+"""Uçtan uca tur benchmark'ı: sahte chat istemcisi + DuckDB warehouse stand-in'i.
+
+Her tur uygulamadaki akışı izler: geçmiş bütçeleme -> LLM akışı (SQL bloğu kapanınca
+sorgu arka planda başlar) -> Arrow batch'leriyle sonuç -> frame hazırlama ve zaman
+eksenleri -> grafik (gerekirse toplama warehouse'ta). Senaryo iki kez koşar; ikinci
+geçiş sorgu cache'inin sıcak halini ölçer.
+
+Kullanım:
+    python -m benchmarks.e2e --rows-per-year 50000
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlglot
+
+from arrow_fetch import BatchFetch, duckdb_batches
+from benchmarks.fakes import FakeChatClient, answer_with_sql
+from benchmarks.micro import quiet_streamlit
+from benchmarks.synthetic import load_duckdb
+from charts import build_date_chart, build_monthly_chart, needs_pushdown, plan_chart_query
+from frame_engine import prepare_frame
+from history import build_api_messages
+from query_cache import QueryCache
+from rollups import NETTUTAR_EXPR
+from schema_context import render_table_context
+from sql_stream import SqlFenceDetector
+from time_axis import apply_time_axes, normalize_months, sort_by_time
+
+SCHEMA = "P"
+GRP_EXPR = "TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT)"
+
+# (soru, üretilecek Snowflake SQL'i) — GEN_SQL kurallarına uygun tipik cevaplar
+SCENARIO = [
+    ("2024 yılında getir'in aylık GRP'si nedir?",
+     f"SELECT AYISMI, ROUND(SUM({GRP_EXPR}), 2) AS TOPLAM_GRP\n"
+     f"FROM {SCHEMA}.GETIR2024REKABET\nWHERE MARKA ILIKE '%GETİR%'\nGROUP BY AYISMI"),
+    ("2023 ve 2024 yıllarında markaların aylık harcaması",
+     f"SELECT MARKA, YIL, AYISMI, SUM({NETTUTAR_EXPR}) AS TOPLAM_HARCAMA FROM {SCHEMA}.GETIR2023REKABET "
+     f"GROUP BY MARKA, YIL, AYISMI\nUNION ALL\n"
+     f"SELECT MARKA, YIL, AYISMI, SUM({NETTUTAR_EXPR}) AS TOPLAM_HARCAMA FROM {SCHEMA}.GETIR2024REKABET "
+     f"GROUP BY MARKA, YIL, AYISMI"),
+    ("2025 yılında migros'un gün bazlı harcaması",
+     f"SELECT TARIH, SUM({NETTUTAR_EXPR}) AS TOPLAM_HARCAMA\nFROM {SCHEMA}.GETIR2025REKABET\n"
+     f"WHERE MARKA ILIKE '%MIGROS%'\nGROUP BY TARIH"),
+    ("2024 televizyon spotlarının tarih ve tutarlarını listele",
+     f"SELECT MARKA, TARIH, AYISMI, NETTUTAR, GRP\nFROM {SCHEMA}.GETIR2024REKABET\n"
+     f"WHERE MECRA ILIKE '%TELEVIZYON%'"),
+]
+
+
+def to_duckdb(sql: str) -> str:
+    return sqlglot.transpile(sql, read="snowflake", write="duckdb")[0]
+
+
+def synthetic_system_prompt(con) -> str:
+    """prompts.py Streamlit secrets gerektirdiğinden şema bağlamı DuckDB kataloğundan üretilir."""
+    rows = con.execute(
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        f"WHERE table_schema = '{SCHEMA}' ORDER BY table_name, ordinal_position"
+    ).fetchall()
+    tables = {}
+    for t, c, d in rows:
+        tables.setdefault(t, []).append((c, d))
+    return "\n\n".join(render_table_context(f"{SCHEMA}.{t}", "This table has various metrics for customers.", cols)
+                       for t, cols in tables.items())
+
+
+class Turns:
+    """Uygulamanın tur akışının Streamlit'siz kopyası (ölçüm noktalarıyla)."""
+
+    def __init__(self, client, con, cache: QueryCache, workers: int = 4):
+        self.client = client
+        self.con = con
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sql")
+
+    def _run_cached(self, sql: str):
+        def run():
+            res = BatchFetch(lambda: duckdb_batches(self.con, to_duckdb(sql))).run()
+            df, profile = prepare_frame(res.to_pandas())
+            return df, profile, {"rows": res.rows, "bytes": res.nbytes, "truncated": res.truncated, "reason": res.reason}
+        df, profile, meta = self.cache.get_or_run(sql, run)
+        return df.copy(deep=False), profile, meta
+
+    def run(self, messages: list, question: str) -> dict:
+        t = {}
+        t0 = time.perf_counter()
+        messages.append({"role": "user", "content": question})
+        api_messages, n_tokens = build_api_messages(messages)
+        t["history_s"] = time.perf_counter() - t0
+
+        detector, pending = SqlFenceDetector(), None
+        hits_before = self.cache.stats()["hits"]
+        for chunk in self.client.chat.completions.create(model="gpt-5", messages=api_messages, stream=True):
+            closed = detector.feed(chunk.choices[0].delta.content or "")
+            if closed and pending is None:
+                t["llm_first_sql_s"] = time.perf_counter() - t0
+                pending = self.executor.submit(self._run_cached, closed[0])
+        t["llm_s"] = time.perf_counter() - t0
+
+        message = {"role": "assistant", "content": detector.text}
+        if pending is not None:
+            t1 = time.perf_counter()
+            df, profile, meta = pending.result()
+            t["query_wait_s"] = time.perf_counter() - t1
+
+            t1 = time.perf_counter()
+            date_col = None
+            if profile.month_col == "AYISMI":
+                df = normalize_months(df, "AYISMI")
+            elif profile.date_col is not None:
+                date_col = profile.date_col
+            df = sort_by_time(apply_time_axes(df), profile.year_col)
+            t["post_s"] = time.perf_counter() - t1
+
+            t1 = time.perf_counter()
+            chart_df, chart_profile = df, profile
+            plan = plan_chart_query(detector.blocks[0], profile) if needs_pushdown(meta) else None
+            if plan is not None:
+                chart_df, chart_profile, _ = self._run_cached(plan.sql)
+            if date_col:
+                build_date_chart(chart_df, date_col=date_col, profile=chart_profile)
+            else:
+                build_monthly_chart(chart_df, month_col="AYISMI", profile=chart_profile)
+            t["chart_s"] = time.perf_counter() - t1
+            t["pushdown"] = plan is not None
+            t["rows"] = meta["rows"]
+            t["cache_hit"] = self.cache.stats()["hits"] > hits_before
+            message.update(sql=detector.blocks[0], results=df)
+        t["total_s"] = time.perf_counter() - t0
+        t["request_tokens"] = n_tokens
+        messages.append(message)
+        return t
+
+
+def run(rows_per_year: int = 50_000, passes: int = 2, first_token_delay: float = 0.0,
+        chunk_delay: float = 0.0, seed: int = 7) -> dict:
+    import duckdb
+
+    quiet_streamlit()
+    con = duckdb.connect()
+    t0 = time.perf_counter()
+    counts = load_duckdb(con, SCHEMA, rows_per_year, seed=seed)
+    load_s = time.perf_counter() - t0
+
+    client = FakeChatClient(
+        [(q.replace("?", r"\?"), answer_with_sql(sql)) for q, sql in SCENARIO],
+        first_token_delay=first_token_delay, chunk_delay=chunk_delay,
+    )
+    turns = Turns(client, con, QueryCache())
+    out = {"load_s": load_s, "tables": counts, "passes": []}
+    for p in range(passes):
+        messages = [{"role": "system", "content": synthetic_system_prompt(con)}]
+        out["passes"].append([dict(question=q, **turns.run(messages, q)) for q, _ in SCENARIO])
+    out["query_cache"] = turns.cache.stats()
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows-per-year", type=int, default=50_000)
+    parser.add_argument("--passes", type=int, default=2)
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="sahte LLM ilk token gecikmesi (sn)")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="sahte LLM parça başı gecikme (sn)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows_per_year, args.passes, args.first_token_delay, args.chunk_delay),
+                     indent=2, ensure_ascii=False))
@@ -0,0 +1,59 @@
+"""Canlı servisler yerine kullanılan sahte istemciler.
+
+`FakeChatClient`, OpenAI istemcisinin uygulamada kullanılan yüzeyini taklit eder:
+`client.chat.completions.create(model=..., messages=..., stream=True)` çağrısı
+`chunk.choices[0].delta.content` taşıyan parçalar üretir. Cevaplar senaryodan gelir;
+ilk token gecikmesi ve parça başı gecikme ayarlanabilir.
+"""
+import re
+import time
+from types import SimpleNamespace
+
+DEFAULT_ANSWER = "Bu soruyu yanıtlayacak bir sorgu bulamadım."
+
+
+def _chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def answer_with_sql(sql: str, intro: str = "İşte sorgu:", outro: str = "Sonuçlar aşağıda.") -> str:
+    """Modelin tipik cevap biçimi: açıklama + ```sql bloğu + kapanış metni."""
+    return f"{intro}\n\n```sql\n{sql.strip()}\n```\n\n{outro}"
+
+
+class FakeChatClient:
+    """Senaryolu sahte chat istemcisi.
+
+    `script`: [(soru_regex, cevap_metni), ...]; son kullanıcı mesajına uyan ilk cevap döner.
+    """
+
+    def __init__(self, script: list, chunk_chars: int = 24, first_token_delay: float = 0.0,
+                 chunk_delay: float = 0.0):
+        self.script = [(re.compile(p, re.IGNORECASE), a) for p, a in script]
+        self.chunk_chars = chunk_chars
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self.prompt_chars = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def answer_for(self, question: str) -> str:
+        return next((a for p, a in self.script if p.search(question or "")), DEFAULT_ANSWER)
+
+    def _create(self, model: str = None, messages: list = None, stream: bool = False, **kwargs):
+        self.calls += 1
+        messages = messages or []
+        self.prompt_chars += sum(len(str(m.get("content") or "")) for m in messages)
+        question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        answer = self.answer_for(question)
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+        return self._stream(answer)
+
+    def _stream(self, answer: str):
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for i in range(0, len(answer), self.chunk_chars):
+            if self.chunk_delay and i:
+                time.sleep(self.chunk_delay)
+            yield _chunk(answer[i:i + self.chunk_chars])
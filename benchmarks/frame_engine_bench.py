@@ -0,0 +1,101 @@
+"""frame_engine benchmark'ı: eski kolon-kolon dönüşüm vs tek geçişlik motor.
+
+Kullanım:
+    python -m benchmarks.frame_engine_bench --rows 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from frame_engine import prepare_frame
+
+
+# ---------- eski uygulama (talkdata.py'deki ilk hali, karşılaştırma için) ----------
+def legacy_smart_to_numeric(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(s):
+        return s
+    s = s.astype(str).str.strip()
+    mask_both = s.str.contains(",", na=False) & s.str.contains(r"\.", regex=True, na=False)
+    s.loc[mask_both] = s.loc[mask_both].str.replace(".", "", regex=False)
+    mask_only_comma = s.str.contains(",", na=False) & ~s.str.contains(r"\.", regex=True, na=False)
+    s.loc[mask_only_comma] = s.loc[mask_only_comma].str.replace(",", ".", regex=False)
+    try:
+        return pd.to_numeric(s)
+    except (ValueError, TypeError):
+        return s
+
+
+def legacy_to_datetime_tr(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    return pd.to_datetime(s.astype(str).str.strip(), dayfirst=True, errors="coerce")
+
+
+def legacy_pick_year_col(df: pd.DataFrame):
+    if "YIL" in df.columns:
+        return "YIL"
+    for c in df.columns:
+        s = df[c].astype(str)
+        if (s.str.fullmatch(r"\d{4}", na=False)).sum() >= max(1, len(df) * 0.3):
+            return c
+    return None
+
+
+def legacy_pipeline(df: pd.DataFrame):
+    """Tablo + iki grafik için eski akış: her tüketici kendi kopyasını dönüştürür."""
+    for _ in range(2):  # render_monthly_lines ve render_date_lines
+        d = df.copy()
+        for c in d.columns:
+            try:
+                d[c] = legacy_smart_to_numeric(d[c])
+            except Exception:
+                pass
+        legacy_pick_year_col(d)
+    legacy_to_datetime_tr(df["TARIH"])
+
+
+# ---------- sentetik veri ----------
+def make_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    net = rng.uniform(0, 250_000, rows).round(2)
+    days = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 366, rows), unit="D")
+    brands = np.array(["GETIR", "GETIRYEMEK", "MIGROS", "TRENDYOL.COM", "YEMEKSEPETI.COM"])
+    return pd.DataFrame({
+        "YIL": rng.choice(["2023", "2024", "2025"], rows),
+        "MARKA": brands[rng.integers(0, len(brands), rows)],
+        "TARIH": days.strftime("%d.%m.%Y"),
+        "NETTUTAR": pd.Series(net).map(lambda v: f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")),
+        "GRP": pd.Series(rng.uniform(0, 10, rows).round(2)).astype(str).str.replace(".", ",", regex=False),
+        "ADET": rng.integers(1, 6, rows).astype(str),
+    })
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(rows: int, repeat: int) -> dict:
+    df = make_frame(rows)
+    return {
+        "rows": rows,
+        "legacy_s": timed(lambda: legacy_pipeline(df), repeat),
+        "engine_s": timed(lambda: prepare_frame(df), repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    result = run(args.rows, args.repeat)
+    result["speedup"] = result["legacy_s"] / result["engine_s"] if result["engine_s"] else None
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,74 @@
+"""Sıcak yol micro-benchmark'ları (sentetik REKABET verisi üzerinde).
+
+Kullanım:
+    python -m benchmarks.micro --rows 200000
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.synthetic import make_rekabet
+from charts import CHART_MEMO, render_date_lines, render_monthly_lines
+from frame_engine import pick_year_col, prepare_frame, smart_to_numeric, to_datetime_tr
+from time_axis import normalize_months
+
+
+def quiet_streamlit():
+    """Streamlit çalışma zamanı dışında (bare mode) render çağrılarının uyarı loglarını kapatır."""
+    from streamlit import config
+    from streamlit.logger import set_log_level
+
+    # Config ilk okunduğunda log seviyesi sıfırlanır; önce okut, sonra seviyeyi ayarla
+    config.get_option("logger.level")
+    set_log_level("error")
+
+
+def measure(fn, repeat: int = 5, setup=None) -> dict:
+    """`fn`'i `repeat` kez çalıştırır; süreler saniye cinsinden."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"best_s": min(times), "median_s": statistics.median(times), "repeat": repeat}
+
+
+def run(rows: int, repeat: int = 5, seed: int = 7) -> dict:
+    quiet_streamlit()
+    raw = make_rekabet(rows, year=2024, seed=seed)
+    monthly_src = raw[["AYISMI", "YIL", "GRP", "NETTUTAR"]]
+    daily_src = raw[["TARIH", "GRP", "NETTUTAR"]]
+    monthly, monthly_profile = prepare_frame(monthly_src)
+    daily, daily_profile = prepare_frame(daily_src)
+
+    results = {
+        "smart_to_numeric.NETTUTAR": measure(lambda: smart_to_numeric(raw["NETTUTAR"]), repeat),
+        "smart_to_numeric.GRP": measure(lambda: smart_to_numeric(raw["GRP"]), repeat),
+        "to_datetime_tr.TARIH": measure(lambda: to_datetime_tr(raw["TARIH"]), repeat),
+        "normalize_months": measure(lambda: normalize_months(monthly_src, "AYISMI"), repeat),
+        "pick_year_col": measure(lambda: pick_year_col(raw), repeat),
+        "prepare_frame.all_columns": measure(lambda: prepare_frame(raw), repeat),
+        # Grafik süreleri memo'suz (kurulum) ve memo'dan (rerun) ayrı ölçülür
+        "render_monthly_lines": measure(
+            lambda: render_monthly_lines(monthly, "AYISMI", monthly_profile), repeat, setup=CHART_MEMO.clear),
+        "render_monthly_lines.memo": measure(
+            lambda: render_monthly_lines(monthly, "AYISMI", monthly_profile), repeat),
+        "render_date_lines": measure(
+            lambda: render_date_lines(daily, "TARIH", daily_profile), repeat, setup=CHART_MEMO.clear),
+        "render_date_lines.memo": measure(
+            lambda: render_date_lines(daily, "TARIH", daily_profile), repeat),
+    }
+    for r in results.values():
+        r["rows"] = rows
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat), indent=2))
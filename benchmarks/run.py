@@ -0,0 +1,60 @@
+"""Tüm çevrimdışı benchmark'ları çalıştırıp tek JSON rapor yazar.
+
+Kullanım:
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --rows 500000 --rows-per-year 100000 --out bench.json
+
+Raporlar regresyon takibi için birbiriyle diff'lenebilir (anahtarlar sabit sıralıdır).
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks import e2e, frame_engine_bench, micro
+
+
+def environment() -> dict:
+    env = {"python": sys.version.split()[0], "platform": platform.platform(),
+           "pandas": pd.__version__, "pyarrow": pa.__version__}
+    try:
+        import duckdb
+        env["duckdb"] = duckdb.__version__
+    except ImportError:
+        pass
+    return env
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="micro-benchmark satır sayısı")
+    parser.add_argument("--rows-per-year", type=int, default=50_000, help="DuckDB'deki yıllık tablo satır sayısı")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip", action="append", default=[], choices=["micro", "frame_engine", "e2e"])
+    parser.add_argument("--out", help="JSON rapor dosyası (verilmezse stdout)")
+    args = parser.parse_args(argv)
+
+    report = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(),
+              "params": {"rows": args.rows, "rows_per_year": args.rows_per_year, "repeat": args.repeat}}
+    if "micro" not in args.skip:
+        report["micro"] = micro.run(args.rows, args.repeat)
+    if "frame_engine" not in args.skip:
+        report["frame_engine"] = frame_engine_bench.run(args.rows, min(args.repeat, 3))
+    if "e2e" not in args.skip:
+        report["e2e"] = e2e.run(args.rows_per_year)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
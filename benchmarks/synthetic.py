@@ -0,0 +1,153 @@
+"""Sentetik REKABET verisi: GEN_SQL <fieldContext> kolon setiyle birebir.
+
+Gerçek tablodaki kirli biçimler bilerek üretilir:
+- NETTUTAR / BRFIYAT: "1.234,56", "1234,56", "5.000", "₺1.234,56", "1234" karışık
+- GRP ve türevleri: ondalık ayracı virgül ("2,5")
+- AYISMI: aksanlı/aksansız/küçük harf/boşluklu varyantlar ("ŞUBAT", "SUBAT", "Şubat", "subat ")
+- TARIH: gg.aa.yyyy metin
+"""
+import numpy as np
+import pandas as pd
+
+from time_axis import MONTH_ORDER
+from typed_view import REKABET_COLUMNS, SOURCE_TABLES
+
+# fieldContext'teki örnek değerler
+CHOICES = {
+    "KATEGORI": ["MARKETGENEL", "GETIRYEMEK", "GETIR10", "GETIRBUYUK", "GETIRMORE"],
+    "KATEGORIDETAY": ["MARKET", "GETIRYEMEK", "GENEL", "GETIR10", "REKABET"],
+    "DAYPART": ["PT", "OPT", "ODT", "LDT", "EDT"],
+    "MECRA": ["TELEVIZYON", "BASIN", "RADYO", "DIJITAL", "OUTDOOR"],
+    "ANAYAYIN": ["SHOW TV", "KANAL D", "SKYROAD", "FLYPGS.COM MAGAZINE", "CNN TURK"],
+    "ANAMARKA": ["GETIR", "MIGROS", "TRENDYOL", "YEMEKSEPETI", "A101"],
+    "MARKA": ["GETİR", "GETİRYEMEK", "GETİR10", "MIGROS", "MIGROS SANAL MARKET", "TRENDYOL.COM",
+              "TRENDYOL YEMEK", "YEMEKSEPETI.COM", "YEMEKSEPETI MARKET", "YEMEKSEPETI MAHALLE"],
+    "VERSIYON": ["REVIZE-ONCE BIM'E SONRA OKULA (16 SN)", "G10 COCA COLA 15\" KUŞAK SPOT"],
+    "SPOTTIPI": ["KUSAK SPOT", "ALT BANT"],
+    "SPOTTIPID": ["KUSAK SPOT", "ALT BANT"],
+    "SPOTKONUMU": ["ILK REKLAM", "IKINCI REKLAM", "ALT BANT", "ORTADA"],
+    "KAMPANYA": ["GETIR YAZ", "MIGROS EYLUL", "TRENDYOL INDIRIM", "YEMEKSEPETI MARKET", "TANIMLANMAMIS"],
+    "REKLAMSLOGANI": ["GETIR GETIRSIN", "HIZLI TESLIMAT", "DAHA AZA DAHA COK", "ALISVERISIN EN KOLAY YOLU"],
+    "ANASEKTOR": ["PERAKENDE", "GIDA", "TEKNOLOJI", "BANKACILIK", "ULASIM"],
+    "SEKTOR": ["ZINCIR MARKET", "RESTORAN", "E-TICARET", "TELEKOM", "FINANS"],
+    "REKLAMINFIRMASI": ["YENI MAGAZACILIK A.S.", "GETIR PERAKENDE", "MIGROS TIC. A.S.", "TRENDYOL", "YEMEKSEPETI"],
+    "URUNTURU": ["MARKET", "YEMEK", "ULASIM", "SUPERMARKET", "TEKNOLOJI"],
+    "PROGRAM": ["ANA HABER", "MAGAZIN D", "YEMEKTEYIZ", "HABER TURK", "!BASIN"],
+    "TPGRUP": ["CIZGI FILMLER", "DINI PROGRAMLAR", "HABER", "DIZI"],
+    "UNITE": ["CLP", "DIJITAL EKRAN", "GIANTBOARD", "DUVAR"],
+    "UNITEDETAY": ["CLP", "DIJITAL EKRAN", "GIANTBOARD", "DUVAR"],
+    "ILI": ["ISTANBUL", "ANKARA", "IZMIR", "BURSA", "ANTALYA"],
+    "BOLGE": ["MARMARA", "EGE", "IC ANADOLU", "AKDENIZ", "KARADENIZ"],
+    "URUNHIZMET": ["GETIR YEMEK", "GETIR 10", "GETIR BUYUK", "MIGROS", "YEMEKSEPETI"],
+    "IMAJPROMO": ["IMAJ", "PROMO", "RADYO", "DIGER MECRA"],
+    "MECRADETAY": ["DERGI", "GAZETE", "TV", "DIJITAL", "RADYO"],
+    "FSPOTTIPI": ["KUSAK SPOT", "ANA SPOT", "SPONSORLUK", "DIGER", "PROGRAM ICI"],
+    "PARTNER": ["GETIR", "MIGROS", "TRENDYOL", "YEMEKSEPETI", "DIGER"],
+    "TEMATIKKANALTURU": ["HABER", "EGLENCE", "SPOR", "YASAM", "DIGER"],
+    "KAMPANYADETAY": ["GETIR YAZ KAMPANYASI", "MIGROS EYLUL", "TRENDYOL INDIRIM", "YEMEKSEPETI MAHALLE", "DIGER"],
+}
+WEEKDAYS_ASCII = ["PAZARTESI", "SALI", "CARSAMBA", "PERSEMBE", "CUMA", "CUMARTESI", "PAZAR"]
+_ASCII = str.maketrans("ŞİĞÜÖÇ", "SIGUOC")
+
+
+def _month_variants(month_idx: np.ndarray, rng) -> np.ndarray:
+    """Ay adlarını kanonik (%70) ve kirli varyantlarla (%30) üretir."""
+    canon = np.array(MONTH_ORDER, dtype=object)
+    variants = np.stack([
+        canon,
+        np.array([m.translate(_ASCII) for m in MONTH_ORDER], dtype=object),        # SUBAT
+        np.array([m.capitalize() for m in MONTH_ORDER], dtype=object),             # Şubat
+        np.array([m.translate(_ASCII).lower() + " " for m in MONTH_ORDER], dtype=object),  # "subat "
+    ])
+    kind = rng.choice(4, size=len(month_idx), p=[0.7, 0.1, 0.1, 0.1])
+    return variants[kind, month_idx]
+
+
+def tr_money(values: np.ndarray, rng) -> np.ndarray:
+    """Tutarları tablodaki karışık Türkçe biçimlerle metne çevirir."""
+    kind = rng.choice(5, size=len(values), p=[0.6, 0.15, 0.15, 0.05, 0.05])
+    out = np.empty(len(values), dtype=object)
+    for i, (v, k) in enumerate(zip(values, kind)):
+        if k == 0:
+            out[i] = f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")   # 1.234,56
+        elif k == 1:
+            out[i] = f"{v:.2f}".replace(".", ",")                                          # 1234,56
+        elif k == 2:
+            out[i] = f"{int(v):,}".replace(",", ".")                                       # 5.000
+        elif k == 3:
+            out[i] = "₺" + f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        else:
+            out[i] = str(int(v))                                                           # 1234
+    return out
+
+
+def tr_decimal(values: np.ndarray) -> np.ndarray:
+    """Ondalık sayıları virgüllü metne çevirir (2.5 -> "2,5")."""
+    return pd.Series(values).astype(str).str.replace(".", ",", regex=False).to_numpy(dtype=object)
+
+
+def make_rekabet(rows: int, year: int = 2024, seed: int = 7) -> pd.DataFrame:
+    """Tek yıllık REKABET tablosu (tüm kolonlar metin, tablodaki gibi)."""
+    rng = np.random.default_rng(seed + year)
+    days = pd.Timestamp(f"{year}-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+    days = pd.DatetimeIndex(days)
+    grp = rng.gamma(1.5, 1.5, rows).round(2)
+    sure = rng.choice([15, 20, 30, 45, 60], rows)
+
+    cols = {c: np.asarray(CHOICES[c], dtype=object)[rng.integers(0, len(CHOICES[c]), rows)]
+            for c in REKABET_COLUMNS if c in CHOICES}
+    cols.update({
+        "AYISMI": _month_variants(days.month.to_numpy() - 1, rng),
+        "TARIH": days.strftime("%d.%m.%Y").to_numpy(dtype=object),
+        "HAFTA": days.isocalendar().week.astype(str).to_numpy(dtype=object),
+        "GUN": np.asarray(WEEKDAYS_ASCII, dtype=object)[days.weekday.to_numpy()],
+        "YIL": np.full(rows, str(year), dtype=object),
+        "BASLANGIC": pd.to_timedelta(rng.integers(0, 86400, rows), unit="s").astype(str).str[-8:].to_numpy(dtype=object),
+        "SAATDILIMI": rng.integers(1, 25, rows).astype(str).astype(object),
+        "SURE": sure.astype(str).astype(object),
+        "GRP": tr_decimal(grp),
+        "GRP1544ABC1": tr_decimal((grp * rng.uniform(0.5, 1.5, rows)).round(2)),
+        "FREKANS": rng.integers(1, 6, rows).astype(str).astype(object),
+        "TABLOIDSYF": rng.integers(1, 6, rows).astype(str).astype(object),
+        "TABLOIDCM": rng.choice([50, 100, 200, 400, 800], rows).astype(str).astype(object),
+        "GUNSAYISI": rng.choice([3, 5, 7, 10, 14], rows).astype(str).astype(object),
+        "ADET": rng.integers(1, 6, rows).astype(str).astype(object),
+        "GRPXSURE20ABC1": tr_decimal((grp * sure / 20).round(2)),
+        "GRP3020ABC1": tr_decimal((grp * 30 / 20).round(2)),
+        "BRFIYAT": tr_money(rng.uniform(1_000, 50_000, rows).round(2), rng),
+        "NETTUTAR": tr_money(rng.uniform(0, 250_000, rows).round(2), rng),
+    })
+    return pd.DataFrame({c: cols[c] for c in REKABET_COLUMNS})
+
+
+def make_kampanyalar(rows: int = 200, seed: int = 7) -> pd.DataFrame:
+    """GETIRKAMPANYALARI için küçük tablo (REACH değerleri "%42" biçiminde)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "PLAN": [f"PLAN {i:03d}" for i in range(rows)],
+        "MARKA": np.asarray(CHOICES["MARKA"], dtype=object)[rng.integers(0, len(CHOICES["MARKA"]), rows)],
+        "REACH1": [f"%{v}" for v in rng.integers(20, 80, rows)],
+        "REACH3": [f"%{v}" for v in rng.integers(5, 50, rows)],
+    })
+
+
+def load_duckdb(con, schema: str = "P", rows_per_year: int = 50_000, seed: int = 7) -> dict:
+    """DuckDB bağlantısına üç yıllık REKABET + GETIRKAMPANYALARI tablolarını yükler.
+
+    Snowflake'teki `DB.SCHEMA.TABLO` yolu için `schema` "DB.SCHEMA" olabilir
+    (DuckDB'de DB bir ATTACH edilmiş katalog olmalıdır); varsayılan tek seviyeli şemadır.
+    """
+    con.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    counts = {}
+    for table in SOURCE_TABLES:
+        df = make_rekabet(rows_per_year, year=int(table[5:9]), seed=seed)
+        con.register("_src", df)
+        con.execute(f"CREATE OR REPLACE TABLE {schema}.{table} AS SELECT * FROM _src")
+        con.unregister("_src")
+        counts[table] = len(df)
+    camp = make_kampanyalar(seed=seed)
+    con.register("_src", camp)
+    con.execute(f"CREATE OR REPLACE TABLE {schema}.GETIRKAMPANYALARI AS SELECT * FROM _src")
+    con.unregister("_src")
+    counts["GETIRKAMPANYALARI"] = len(camp)
+    return counts
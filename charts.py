@@ -0,0 +1,322 @@
+"""Grafik katmanı: aylık/tarih bazlı çizgi grafikler ve grafik verisi planlayıcı.
+
+Üretilen SQL'in sonucu satır sınırında kesildiyse eldeki frame grafiği eksik çizer; bu
+durumda SQL bir alt sorgu olarak sarılır ve ay/yıl veya TARIH bazında toplanmış hali
+warehouse'tan istenir. Sonuç tamsa grafik bellekteki frame'den yerelde toplanır ve
+LTTB ile seyreltilir; warehouse'a ikinci bir sorgu gitmez.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from frame_engine import FrameProfile, prepare_frame, to_datetime_tr
+from time_axis import MONTH_ORDER, normalize_months
+
+MAX_SERIES_POINTS = 1000   # seri başına bu sayının üstünde LTTB ile seyreltilir
+POINT_MARK_LIMIT = 120     # seri bu kadar noktadan uzunsa nokta işaretleri çizilmez
+CHART_MEMO_SIZE = 128
+
+
+# =========================
+# Grafik verisi planlayıcı (aggregation pushdown)
+# =========================
+@dataclass
+class ChartPlan:
+    kind: str  # "monthly" | "date"
+    sql: str
+    group_cols: list
+    metric_cols: list
+
+
+def _quote(col) -> str:
+    return '"' + str(col).replace('"', '""') + '"'
+
+
+def _metric_expr(col, parsed: bool) -> str:
+    """Metrik toplamı; kolon metin olarak geliyorsa TR sayı biçimi SQL tarafında çözülür."""
+    c = _quote(col)
+    if not parsed:
+        return f"SUM({c})"
+    txt = f"REPLACE(REPLACE(TO_VARCHAR({c}), '₺', ''), ' ', '')"
+    return f"SUM(TRY_TO_DOUBLE(IFF(CONTAINS({txt}, ','), REPLACE(REPLACE({txt}, '.', ''), ',', '.'), {txt})))"
+
+
+def needs_pushdown(meta: dict) -> bool:
+    """Yalnızca sonuç kesildiyse toplama warehouse'ta yapılır; tam sonuç yerelde toplanıp seyreltilir."""
+    return bool(meta.get("truncated"))
+
+
+def plan_chart_query(sql: str, profile: FrameProfile, month_col: str = "AYISMI") -> ChartPlan | None:
+    """Üretilen SQL'i saran GROUP BY sorgusunu planlar; grafik çizilemiyorsa None."""
+    base = str(sql or "").strip().rstrip(";").strip()
+    if not base:
+        return None
+    if profile.date_col is not None:
+        kind, group = "date", [profile.date_col]
+    elif profile.month_col == month_col:
+        kind, group = "monthly", [month_col] + ([profile.year_col] if profile.year_col else [])
+    else:
+        return None
+    metrics = [c for c in profile.metric_cols if c not in group]
+    if not metrics:
+        return None
+    select = ", ".join(
+        [_quote(g) for g in group]
+        + [f"{_metric_expr(m, m in profile.parsed_cols)} AS {_quote(m)}" for m in metrics]
+    )
+    agg_sql = (
+        f"SELECT {select}\n"
+        f"FROM (\n{base}\n) AS _CHART_SRC\n"
+        f"GROUP BY {', '.join(_quote(g) for g in group)}"
+    )
+    return ChartPlan(kind=kind, sql=agg_sql, group_cols=group, metric_cols=metrics)
+
+
+# =========================
+# Seyreltme (LTTB) ve grafik memo'su
+# =========================
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: çizginin şeklini koruyan `n_out` noktanın indeksleri.
+
+    İlk ve son nokta her zaman korunur; `x` artan sırada olmalıdır.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.nan_to_num(np.asarray(y, dtype="float64"))
+    edges = np.linspace(1, n - 1, n_out - 1).astype("int64")  # iç bölgeyi n_out-2 kovaya böl
+    out = np.empty(n_out, dtype="int64")
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Sonraki kovanın ortalaması (son kovada son nokta)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        # a - aday - sonraki ortalama üçgeninin alanı en büyük olan aday seçilir
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample_series(long_df: pd.DataFrame, x_col: str, series_col: str,
+                      max_points: int = MAX_SERIES_POINTS) -> pd.DataFrame:
+    """Her seriyi ayrı ayrı en fazla `max_points` noktaya LTTB ile seyreltir."""
+    if long_df.groupby(series_col, observed=True).size().max() <= max_points:
+        return long_df
+    parts = []
+    for _, g in long_df.groupby(series_col, observed=True, sort=False):
+        g = g.sort_values(x_col)
+        x = g[x_col]
+        x = x.astype("int64") if pd.api.types.is_datetime64_any_dtype(x) else x
+        parts.append(g.iloc[lttb_indices(x.to_numpy(), g["Değer"].to_numpy(), max_points)])
+    return pd.concat(parts, ignore_index=True)
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Frame içeriğinin (kolonlar + değerler) kısa özeti."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class ChartMemo:
+    """Frame özeti + parametreler -> kurulmuş grafik (LRU). Rerun'larda grafik yeniden kurulmaz."""
+
+    def __init__(self, max_entries: int = CHART_MEMO_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: tuple, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+CHART_MEMO = ChartMemo()
+
+
+def _memo_key(kind: str, df: pd.DataFrame, profile: FrameProfile | None, *params) -> tuple | None:
+    try:
+        return (kind, frame_hash(df), repr(profile)) + params
+    except TypeError:  # hash'lenemeyen kolon (ör. liste içeren) -> memo yok
+        return None
+
+
+# =========================
+# Çizim
+# =========================
+def show_chart(chart: alt.Chart | None, warning: str | None = None):
+    """Önceden kurulmuş grafiği (veya kurulamama nedenini) gösterir."""
+    if warning:
+        st.warning(warning)
+    elif chart is not None:
+        st.altair_chart(chart, use_container_width=True)
+
+
+def build_monthly_chart(df: pd.DataFrame, month_col: str = "AYISMI",
+                        profile: FrameProfile | None = None) -> tuple[alt.Chart | None, str | None]:
+    """Aylık çizgi grafiği kurar; (grafik, uyarı) döndürür. Grafik mesajda saklanıp yeniden çizilebilir."""
+    if df is None or df.empty:
+        return None, None
+    key = _memo_key("monthly", df, profile, month_col)
+    if key is None:
+        return _build_monthly_chart(df, month_col, profile)
+    return CHART_MEMO.get_or_build(key, lambda: _build_monthly_chart(df, month_col, profile))
+
+
+def _build_monthly_chart(df: pd.DataFrame, month_col: str, profile: FrameProfile | None):
+
+    if profile is None:
+        df, profile = prepare_frame(df)
+
+    if month_col not in df.columns:
+        return None, f"Grafik için '{month_col}' kolonu yok."
+    df = normalize_months(df, month_col)
+    if df.empty:
+        return None, "Geçerli ay satırı kalmadı."
+
+    year_col = profile.year_col
+    if year_col:
+        df[year_col] = df[year_col].astype(str)
+
+    metric_cols = [c for c in profile.metric_cols if c != year_col]
+    if not metric_cols:
+        return None, "Çizilecek sayısal metrik bulunamadı."
+
+    group_keys = [month_col] + ([year_col] if year_col else [])
+    agg = df[group_keys + metric_cols].groupby(group_keys, as_index=False, observed=True).sum(numeric_only=True)
+
+    long_df = agg.melt(id_vars=group_keys, value_vars=metric_cols,
+                       var_name="Metric", value_name="Değer")
+
+    if year_col:
+        long_df["Seri"] = long_df["Metric"].astype(str) + " - " + long_df[year_col].astype(str)
+    else:
+        long_df["Seri"] = long_df["Metric"].astype(str)
+
+    # Ay Categorical'ı sıralı: sıralama ve çizgi sırası kodlardan gelir
+    long_df = long_df.sort_values(["Seri", month_col])
+
+    is_integer_vals = (long_df["Değer"].dropna() % 1 == 0).all()
+    if profile.is_money:
+        fmt = "$,.0f" if is_integer_vals else "$,.2f"
+        y_title = "Tutar (₺)"
+    else:
+        fmt = ",.0f" if is_integer_vals else ",.2f"
+        y_title = "Değer"
+
+    x_enc = alt.X(f"{month_col}:N", title="Ay", scale=alt.Scale(domain=MONTH_ORDER))
+    chart = (
+        alt.Chart(long_df.assign(_SIRA=long_df[month_col].cat.codes))
+        .mark_line(point=True, interpolate="linear")
+        .encode(
+            x=x_enc,
+            y=alt.Y("Değer:Q", title=y_title, axis=alt.Axis(format=fmt)),
+            color=alt.Color("Seri:N", title="Seri"),
+            detail="Seri:N",
+            order=alt.Order("_SIRA:Q"),
+            tooltip=[month_col, "Seri", alt.Tooltip("Değer:Q", title=y_title, format=fmt)],
+        )
+        .properties(height=360)
+    )
+    return chart, None
+
+
+def render_monthly_lines(df: pd.DataFrame, month_col: str = "AYISMI", profile: FrameProfile | None = None):
+    """Genel çizim: AYISMI + (opsiyonel) YIL + tüm sayısal metrikler (aynı yıl+ay toplanır)."""
+    show_chart(*build_monthly_chart(df, month_col=month_col, profile=profile))
+
+
+def build_date_chart(df: pd.DataFrame, date_col: str = "TARIH", profile: FrameProfile | None = None,
+                     max_points: int = MAX_SERIES_POINTS) -> tuple[alt.Chart | None, str | None]:
+    """Tarih bazlı çizgi grafiği kurar; (grafik, uyarı) döndürür.
+
+    Seri başına `max_points` üstündeki noktalar LTTB ile seyreltilir (tarayıcıya giden veri sınırlı kalır).
+    """
+    if df is None or df.empty:
+        return None, None
+    key = _memo_key("date", df, profile, date_col, max_points)
+    if key is None:
+        return _build_date_chart(df, date_col, profile, max_points)
+    return CHART_MEMO.get_or_build(key, lambda: _build_date_chart(df, date_col, profile, max_points))
+
+
+def _build_date_chart(df: pd.DataFrame, date_col: str, profile: FrameProfile | None, max_points: int):
+
+    if profile is None:
+        df, profile = prepare_frame(df)
+
+    if date_col not in df.columns:
+        if profile.date_col is not None:
+            date_col = profile.date_col
+        else:
+            return None, f"Grafik için '{date_col}' kolonu yok."
+
+    date_vals = to_datetime_tr(df[date_col])  # profilde zaten datetime ise dokunmaz
+    df = df.loc[date_vals.notna()].assign(**{date_col: date_vals[date_vals.notna()]})
+    if df.empty:
+        return None, "Geçerli tarih satırı kalmadı."
+
+    metric_cols = [c for c in profile.metric_cols if c != date_col]
+    if not metric_cols:
+        return None, "Çizilecek sayısal metrik bulunamadı."
+
+    agg = df[[date_col] + metric_cols].groupby(date_col, as_index=False).sum(numeric_only=True)
+
+    long_df = agg.melt(id_vars=[date_col], value_vars=metric_cols, var_name="Metric", value_name="Değer")
+
+    is_integer_vals = (long_df["Değer"].dropna() % 1 == 0).all()
+    if profile.is_money:
+        fmt = "$,.0f" if is_integer_vals else "$,.2f"
+        y_title = "Tutar (₺)"
+    else:
+        fmt = ",.0f" if is_integer_vals else ",.2f"
+        y_title = "Değer"
+
+    long_df = downsample_series(long_df, date_col, "Metric", max_points)
+    per_series = long_df.groupby("Metric", observed=True).size().max()
+
+    chart = (
+        alt.Chart(long_df.sort_values(date_col))
+        .mark_line(point=bool(per_series <= POINT_MARK_LIMIT))
+        .encode(
+            x=alt.X(f"{date_col}:T", title="Tarih"),
+            y=alt.Y("Değer:Q", title=y_title, axis=alt.Axis(format=fmt)),
+            color=alt.Color("Metric:N", title="Metrik"),
+            tooltip=[alt.Tooltip(f"{date_col}:T", title="Tarih"), "Metric", alt.Tooltip("Değer:Q", title=y_title, format=fmt)],
+        )
+        .properties(height=360)
+    )
+    return chart, None
+
+
+def render_date_lines(df: pd.DataFrame, date_col: str = "TARIH", profile: FrameProfile | None = None,
+                      max_points: int = MAX_SERIES_POINTS):
+    """Tarih bazlı (günlük/haftalık) tüm sayısal metrikleri çizer."""
+    show_chart(*build_date_chart(df, date_col=date_col, profile=profile, max_points=max_points))
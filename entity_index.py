@@ -0,0 +1,286 @@
+"""MARKA / MECRA / KAMPANYA için tekil değer indeksi ve sorudaki varlıkların yerel çözümü.
+
+Kural 3 ve 12 modeli `ILIKE '%keyword%'` filtrelerine ve elle tutulan bir marka listesine
+yönlendirir; baştaki joker karakterli ILIKE Snowflake micro-partition pruning'ini
+devre dışı bırakır, her marka filtresi tüm satırları tarar. Bu modül:
+
+- REKABET ve GETIRKAMPANYALARI tablolarından `SELECT DISTINCT` (satır sayılarıyla) ile
+  değer listesini çeker, diske yazar ve arka planda periyodik tazeler,
+- değerleri `tr_key` tabanlı aksan/noktalama duyarsız anahtarlarla (+ ".COM" gibi
+  eklerin atıldığı takma adlarla) ve trigram benzerliğiyle eşler,
+- sorudaki ifadeleri yerelde kanonik değerlere çözer ve prompt'a eklenecek kısa bir
+  `<entities>` bloğu üretir; model böylece `=` / `IN` yazar ve sorgu budanabilir.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from time_axis import tr_key
+
+DEFAULT_PATH = os.path.join(".cache", "entity_index.json")
+ENTITY_COLUMNS = ("MARKA", "MECRA", "KAMPANYA")
+# Değer anahtarından atılan ekler: "TRENDYOL.COM" -> TRENDYOL, "YEMEKSEPETI.COM" -> YEMEKSEPETI
+ALIAS_SUFFIXES = ("COM", "COMTR", "NET")
+MAX_SPAN_WORDS = 4
+MAX_FUZZY_WORDS = 2
+MAX_SUFFIX_CHARS = 4      # Türkçe ek payı: "televizyondaki" -> TELEVIZYON, "migrosun" -> MIGROS
+MIN_FUZZY_KEY = 5
+FUZZY_THRESHOLD = 0.7
+MAX_VALUES_PER_MENTION = 8   # daha fazla kardeş değer varsa IN yerine ILIKE korunur
+
+_WORD_RE = re.compile(r"[\w.-]+", re.UNICODE)
+
+
+def entity_key(x: str) -> str:
+    """`tr_key` + harf/rakam dışı karakterlerin atılması (GETİR 10, getir10, Getir-10 -> GETIR10)."""
+    return re.sub(r"[^A-Z0-9]", "", tr_key(x))
+
+
+def _aliases(value: str) -> set:
+    key = entity_key(value)
+    out = {key}
+    for suffix in ALIAS_SUFFIXES:
+        if key.endswith(suffix) and len(key) - len(suffix) >= 3:
+            out.add(key[: -len(suffix)])
+    return out
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def distinct_sql(columns: dict, entity_columns=ENTITY_COLUMNS) -> str | None:
+    """Tüm tablolardaki varlık kolonları için tek UNION ALL sorgusu (KOLON, DEGER, ADET)."""
+    parts = []
+    for table, cols in columns.items():
+        names = {str(c).upper() for c, _ in cols}
+        for col in entity_columns:
+            if col in names:
+                parts.append(f"SELECT '{col}' AS KOLON, {col} AS DEGER, COUNT(*) AS ADET "
+                             f"FROM {table} WHERE {col} IS NOT NULL GROUP BY {col}")
+    return "\nUNION ALL\n".join(parts) or None
+
+
+@dataclass
+class EntityMatch:
+    column: str
+    mention: str          # sorudaki ifade
+    values: list          # veride birebir geçen kanonik değer(ler); ILIKE '%değer%' kardeşleri dahil
+    score: float          # 1.0 anahtar eşleşmesi, <1 trigram benzerliği
+    pattern: str | None = None  # kardeş değer sayısı sınırı aştıysa ILIKE ile aranacak kanonik değer
+
+    def predicate(self) -> str:
+        if self.pattern is not None:
+            return f"{self.column} ILIKE '%" + self.pattern.replace("'", "''") + "%'"
+        quoted = ", ".join("'" + v.replace("'", "''") + "'" for v in self.values)
+        return f"{self.column} = {quoted}" if len(self.values) == 1 else f"{self.column} IN ({quoted})"
+
+
+class EntityIndex:
+    """Tekil değer indeksi; `columns_fn()` şema kolonlarını, `query_fn(sql)` DataFrame döndürür."""
+
+    def __init__(self, columns_fn, query_fn, path: str = DEFAULT_PATH,
+                 refresh_interval: float = 24 * 3600, entity_columns=ENTITY_COLUMNS):
+        self.columns_fn = columns_fn
+        self.query_fn = query_fn
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.entity_columns = tuple(entity_columns)
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._state = None          # {"built_at", "values": {kolon: {değer: adet}}}
+        self._index = None          # {kolon: ({anahtar: [değer]}, {trigram: {anahtar}})}
+        self._loaded = False
+
+    # ---------- genel API ----------
+    def ensure(self, block: bool = False) -> bool:
+        """Diskteki indeksi yükler; yoksa veya eskiyse tazeler (varsayılan: arka planda)."""
+        state = None
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                state = self._load_disk()
+        if state is not None:
+            self._set_state(state)  # _set_state kilidi kendisi alır
+        stale = self._state is None or time.time() - self._state.get("built_at", 0) > self.refresh_interval
+        if stale:
+            if block:
+                self.refresh()
+            else:
+                self.refresh_async()
+        return self._state is not None
+
+    def refresh_async(self):
+        if self._refreshing.locked():
+            return
+        threading.Thread(target=self._refresh_quietly, name="entity-refresh", daemon=True).start()
+
+    def refresh(self):
+        with self._refreshing:
+            sql = distinct_sql(self.columns_fn(), self.entity_columns)
+            if sql is None:
+                return
+            df = self.query_fn(sql)
+            values: dict = {c: {} for c in self.entity_columns}
+            for col, val, n in zip(df["KOLON"], df["DEGER"], df["ADET"]):
+                val = str(val).strip()
+                if val:
+                    values[col][val] = values[col].get(val, 0) + int(n)
+            state = {"built_at": time.time(), "values": values}
+            self._set_state(state)
+            self._save_disk(state)
+
+    def stats(self) -> dict:
+        if self._state is None:
+            return {"ready": False}
+        return {"ready": True, "built_at": self._state["built_at"],
+                **{c: len(v) for c, v in self._state["values"].items()}}
+
+    def top_values(self, column: str, n: int = 10) -> list[str]:
+        """Kolonun en sık geçen değerleri (satır sayısına göre)."""
+        if self._state is None:
+            return []
+        values = self._state["values"].get(column, {})
+        return [v for v, _ in sorted(values.items(), key=lambda kv: -kv[1])[:n]]
+
+    def resolve(self, question: str) -> list[EntityMatch]:
+        """Sorudaki ifadeleri kanonik değerlere çözer.
+
+        Önce tüm ifadeler (en uzun önce) birebir anahtar / Türkçe ek payıyla, sonra kalan
+        kısa ifadeler trigram benzerliğiyle eşlenir; bir kelime yalnızca bir eşleşmede kullanılır.
+        """
+        if self._index is None or not question:
+            return []
+        words = _WORD_RE.findall(question)
+        keys = [entity_key(w) for w in words]
+        used = [False] * len(words)
+        matches = []
+        for fuzzy, max_words in ((False, MAX_SPAN_WORDS), (True, MAX_FUZZY_WORDS)):
+            for n in range(min(max_words, len(words)), 0, -1):
+                for i in range(len(words) - n + 1):
+                    if any(used[i:i + n]):
+                        continue
+                    key = "".join(keys[i:i + n])
+                    if len(key) < 3:
+                        continue
+                    # Ek payı yalnızca son kelimenin içinde: "market ve" -> MARKETVE kırpılıp MARKET olmaz
+                    found = self._lookup(key, fuzzy, max(0, min(MAX_SUFFIX_CHARS, len(keys[i + n - 1]) - 2)))
+                    if found:
+                        used[i:i + n] = [True] * n
+                        mention = " ".join(words[i:i + n])
+                        matches += [EntityMatch(col, mention, vals, score, pattern)
+                                    for col, vals, score, pattern in found]
+        return matches
+
+    def prompt_hint(self, question: str) -> str:
+        """Prompt'un değişken kuyruğuna eklenecek `<entities>` bloğu; eşleşme yoksa boş metin."""
+        matches = self.resolve(question)
+        if not matches:
+            return ""
+        lines = [f'- "{m.mention}" -> {m.predicate()}' for m in matches]
+        return (
+            "<entities>\n"
+            "Sorudaki şu ifadeler veride aşağıdaki değerlerle geçiyor (ILIKE '%...%' ile eşleşecek tüm "
+            "değerler dahil). Bu kolonlarda kural 3 ve 12 yerine aşağıdaki filtreyi aynen kullan:\n" + "\n".join(lines) + "\n</entities>"
+        )
+
+    # ---------- eşleme ----------
+    def _lookup(self, key: str, fuzzy: bool, max_cut: int = 0) -> list:
+        found = []
+        for col, (by_key, by_tri, ordered) in self._index.items():
+            vals, score = None, 1.0
+            if not fuzzy:
+                for cut in range(0, min(max_cut, len(key) - 3) + 1):
+                    vals = by_key.get(key[:len(key) - cut])
+                    if vals:
+                        break
+            elif len(key) >= MIN_FUZZY_KEY:
+                best = self._fuzzy(key, by_tri)
+                if best is not None:
+                    k, score = best
+                    vals, score = by_key[k], round(score, 2)
+            if vals:
+                values, pattern = self._siblings(vals, ordered)
+                found.append((col, values, score, pattern))
+        return found
+
+    @staticmethod
+    def _siblings(vals: list, ordered: list) -> tuple:
+        """Eşleşen değerlerin ILIKE '%değer%' kardeşleri (MIGROS -> MIGROS SANAL MARKET).
+
+        Modelin önceki `ILIKE '%MIGROS%'` filtresinin kapsadığı değer kümesi daralmasın diye
+        eşleşen değerin anahtarını içeren tüm değerler alınır. Sınır aşılırsa (değerler, ILIKE
+        deseni) döner; desen en sık eşleşen değerdir.
+        """
+        out = list(vals)
+        for base in vals:
+            base_key = entity_key(base)
+            out += [v for k, v in ordered if base_key in k and v not in out]
+        if len(out) > MAX_VALUES_PER_MENTION:
+            return vals, vals[0]
+        return out, None
+
+    @staticmethod
+    def _fuzzy(key: str, by_tri: dict):
+        grams = trigrams(key)
+        hits: dict = {}
+        for g in grams:
+            for k in by_tri.get(g, ()):
+                hits[k] = hits.get(k, 0) + 1
+        best, best_score = None, 0.0
+        for k, shared in hits.items():
+            score = shared / (len(grams) + len(trigrams(k)) - shared)  # Jaccard
+            if score > best_score:
+                best, best_score = k, score
+        return (best, best_score) if best is not None and best_score >= FUZZY_THRESHOLD else None
+
+    def _set_state(self, state: dict):
+        index = {}
+        for col, values in state["values"].items():
+            by_key: dict = {}
+            for val, _ in sorted(values.items(), key=lambda kv: -kv[1]):  # sık değer önce
+                for alias in _aliases(val):
+                    lst = by_key.setdefault(alias, [])
+                    if len(lst) < MAX_VALUES_PER_MENTION:
+                        lst.append(val)
+            by_tri: dict = {}
+            for k in by_key:
+                for g in trigrams(k):
+                    by_tri.setdefault(g, set()).add(k)
+            ordered = [(entity_key(v), v) for v, _ in sorted(values.items(), key=lambda kv: -kv[1])]
+            index[col] = (by_key, by_tri, ordered)
+        with self._lock:
+            self._state = state
+            self._index = index
+
+    # ---------- disk ----------
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception:
+            pass  # tazeleme başarısızsa mevcut indeksle (veya indekssiz) devam edilir
+
+    def _load_disk(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if "values" in state else None
+
+    def _save_disk(self, state: dict):
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
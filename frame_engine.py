@@ -0,0 +1,220 @@
+"""Sonuç frame'leri için tek geçişlik profil + dönüştürme motoru.
+
+Snowflake'ten gelen frame bir kez profillenir: sayısal, para, yıl benzeri ve tarih
+kolonları tespit edilir, tarih formatı örnekten öğrenilir ve tüm dönüşümler tek
+vektörel geçişte yapılır. Çıkan `FrameProfile` frame ile birlikte saklanır; sıralama,
+tablo ve iki grafik fonksiyonu aynı profili yeniden kullanır.
+"""
+import datetime as _dt
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+MONEY_KEYWORDS = ("HARCAMA", "CİRO", "CIRO", "HASILAT", "REVENUE", "SATIŞ", "SATIS",
+                  "TUTAR", "BÜTÇE", "BUTCE")
+YEAR_NAMES = ("YIL", "YEAR")
+DATE_NAMES = ("TARIH", "TARİH", "DATE")
+MONTH_NAMES = ("AYISMI",)
+AXIS_NAMES = ("HAFTA", "GUN")  # sayısal görünse de metrik değil, zaman ekseni
+DATE_FORMATS = ("%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d",
+                "%d.%m.%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+SAMPLE_SIZE = 256
+YEAR_SHARE = 0.3
+
+_DATE_LIKE_RE = re.compile(r"^\s*(\d{1,2}[./-]\d{1,2}[./-]\d{4}|\d{4}-\d{2}-\d{2})")
+
+
+@dataclass
+class FrameProfile:
+    """Bir sonuç frame'inin kolon profili (dönüştürme sonrası)."""
+    numeric_cols: list = field(default_factory=list)
+    money_cols: list = field(default_factory=list)
+    parsed_cols: list = field(default_factory=list)  # metin olarak gelip sayıya çevrilenler
+    year_cols: list = field(default_factory=list)
+    year_col: str | None = None
+    date_col: str | None = None
+    date_format: str | None = None
+    month_col: str | None = None
+
+    @property
+    def metric_cols(self) -> list:
+        """Çizilecek metrikler: yıl benzeri, tarih ve zaman ekseni olmayan sayısal kolonlar."""
+        skip = set(self.year_cols) | {self.date_col}
+        return [c for c in self.numeric_cols if c not in skip and str(c).upper() not in AXIS_NAMES]
+
+    @property
+    def is_money(self) -> bool:
+        return any(c in self.money_cols for c in self.metric_cols)
+
+
+# ---------- kolon dönüştürücüler ----------
+def _sample(s: pd.Series) -> pd.Series:
+    return s.dropna().head(SAMPLE_SIZE)
+
+
+def _parse_tr_numbers(s: pd.Series) -> pd.Series | None:
+    """TR biçimli sayı metinlerini (1.234,56 / 1234,5 / 12 ₺) float'a çevirir.
+
+    Boş olmayan değerlerden biri bile sayı değilse None döner (orijinal davranış: dokunma).
+    """
+    notna = s.notna()
+    vals = s[notna]
+    if vals.empty:
+        return None
+    # Tekrarlı değerlerde (YIL, ADET, GRP...) metin işlemleri yalnızca tekil değerlere uygulanır
+    codes, uniques = pd.factorize(vals)
+    dedup = len(uniques) * 2 <= len(vals)
+    txt = pd.Series(uniques if dedup else vals.to_numpy()).astype(str).str.strip()
+    if txt.str.contains("₺", regex=False).any():
+        txt = txt.str.replace("₺", "", regex=False).str.replace(" ", "", regex=False)
+    # Virgül varsa ondalık ayırıcı odur: binlik noktaları at, virgülü noktaya çevir.
+    has_comma = txt.str.contains(",", regex=False)
+    if has_comma.any():
+        fixed = txt[has_comma].str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        txt = txt.where(~has_comma, fixed)
+    num = pd.to_numeric(txt, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if np.isnan(num).any():
+        return None
+    if dedup:
+        num = num[codes]
+    out = pd.Series(np.nan, index=s.index, dtype="float64")
+    out[notna] = num
+    if notna.all() and (num % 1 == 0).all() and np.abs(num).max() < 2**53:
+        return out.astype("int64")
+    return out
+
+
+def learn_date_format(s: pd.Series) -> str | None:
+    """Örnek değerlerin tamamını parse eden ilk açık formatı döndürür."""
+    sample = _sample(s).astype(str).str.strip()
+    if sample.empty:
+        return None
+    for fmt in DATE_FORMATS:
+        parsed = pd.to_datetime(sample, format=fmt, errors="coerce")
+        if parsed.notna().all():
+            return fmt
+    return None
+
+
+def _parse_dates(s: pd.Series, fmt: str | None) -> pd.Series:
+    # Günlük veride tekil tarih sayısı satır sayısından çok küçüktür: tekiller parse edilir
+    codes, uniques = pd.factorize(s)
+    txt = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    formats = ([fmt] if fmt else []) + [f for f in DATE_FORMATS if f != fmt]
+    dt = pd.to_datetime(pd.Series(pd.NaT, index=txt.index))
+    for f in formats:
+        missed = dt.isna()
+        if not missed.any():
+            break
+        dt[missed] = pd.to_datetime(txt[missed], format=f, errors="coerce")
+    missed = dt.isna()
+    if missed.any():
+        # Bilinen formatlara uymayan azınlık için eleman bazlı çıkarıma düş
+        dt[missed] = [pd.to_datetime(v, dayfirst=True, errors="coerce") for v in txt[missed]]
+    # codes == -1 (boş değer) son elemana, yani NaT'a düşer
+    values = np.append(dt.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))[codes]
+    return pd.Series(values, index=s.index, name=s.name)
+
+
+def smart_to_numeric(s: pd.Series) -> pd.Series:
+    """TR sayılarını (1.234,56) -> 1234.56 çevirir; değilse dokunmaz."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s
+    parsed = _parse_tr_numbers(s)
+    return s if parsed is None else parsed
+
+
+def to_datetime_tr(s: pd.Series) -> pd.Series:
+    """'01.11.2024', '1/11/2024', datetime gibi değerleri güvenle datetime'a çevirir."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    sample = _sample(s)
+    if not sample.empty and isinstance(sample.iloc[0], _dt.date):
+        return pd.to_datetime(s, errors="coerce")
+    return _parse_dates(s, learn_date_format(s))
+
+
+# ---------- sınıflandırma ----------
+def _is_money_name(col: str) -> bool:
+    name = str(col).upper()
+    return any(k in name for k in MONEY_KEYWORDS)
+
+
+def _year_like(col: str, s: pd.Series, n_rows: int) -> bool:
+    if str(col).upper() in YEAR_NAMES:
+        return True
+    if not pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+        return False
+    hits = ((s >= 1000) & (s <= 9999) & (s % 1 == 0)).sum()
+    return hits >= max(1, n_rows * YEAR_SHARE)
+
+
+def _set_date_col(profile: FrameProfile, col: str):
+    """İlk tarih kolonunu seçer; TARIH/TARİH adlı kolon varsa onu tercih eder."""
+    if profile.date_col is None or (str(col).upper() in DATE_NAMES
+                                    and str(profile.date_col).upper() not in DATE_NAMES):
+        profile.date_col = col
+
+
+def prepare_frame(df: pd.DataFrame) -> tuple[pd.DataFrame, FrameProfile]:
+    """Frame'i tek geçişte profiller ve dönüştürür; (yeni frame, profil) döndürür.
+
+    Girdi frame değiştirilmez. Metin kolonlarında önce küçük bir örnek denenir; örnek
+    sayı/tarih değilse kolonun tamamına dokunulmaz.
+    """
+    profile = FrameProfile()
+    if df is None:
+        return df, profile
+    n_rows = len(df)
+    cols = []
+    for i, c in enumerate(df.columns):
+        s = df.iloc[:, i]
+        name = str(c).upper()
+        if name in MONTH_NAMES and profile.month_col is None:
+            profile.month_col = c
+        elif pd.api.types.is_datetime64_any_dtype(s):
+            _set_date_col(profile, c)
+        elif s.dtype == object or pd.api.types.is_string_dtype(s):
+            sample = _sample(s)
+            if not sample.empty and isinstance(sample.iloc[0], (_dt.date, pd.Timestamp)):
+                s = pd.to_datetime(s, errors="coerce")
+                _set_date_col(profile, c)
+            elif not sample.empty and _parse_tr_numbers(sample) is not None:
+                parsed = _parse_tr_numbers(s)
+                if parsed is not None:
+                    s = parsed
+                    profile.parsed_cols.append(c)
+            elif not sample.empty and (name in DATE_NAMES or sample.astype(str).str.match(_DATE_LIKE_RE).all()):
+                fmt = learn_date_format(s)
+                if fmt is not None or name in DATE_NAMES:
+                    s = _parse_dates(s, fmt)
+                    profile.date_format = fmt
+                    _set_date_col(profile, c)
+        cols.append(s)
+
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            profile.numeric_cols.append(c)
+            if _is_money_name(c):
+                profile.money_cols.append(c)
+            if _year_like(c, s, n_rows):
+                profile.year_cols.append(c)
+
+    for name in YEAR_NAMES:
+        if name in df.columns:
+            profile.year_col = name
+            break
+    else:
+        profile.year_col = profile.year_cols[0] if profile.year_cols else None
+
+    out = pd.concat(cols, axis=1) if cols else df.copy()
+    out.columns = df.columns
+    return out, profile
+
+
+def pick_year_col(df: pd.DataFrame, profile: FrameProfile | None = None) -> str | None:
+    """YIL/YEAR veya 4 haneli yıl benzeri bir kolonu seç."""
+    if profile is None:
+        _, profile = prepare_frame(df)
+    return profile.year_col
@@ -0,0 +1,115 @@
+"""Token bütçeli sohbet geçmişi.
+
+Her istekte system prompt ve son N tur aynen gönderilir; daha eski turlar
+"soru → SQL → sonuç şekli" özetine indirgenir. Özetler, mesajlara zaten eklenmiş
+`"sql"` ve `"results"` alanlarından üretilir (uzun asistan metni gönderilmez).
+Bütçe aşılırsa önce en eski özetler, sonra aynen gönderilen eski turlar düşürülür.
+"""
+import re
+
+try:  # opsiyonel: kesin token sayımı
+    import tiktoken
+    _ENC = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken yoksa yaklaşık sayım
+    _ENC = None
+
+DEFAULT_BUDGET = 24000
+DEFAULT_KEEP_TURNS = 3
+MESSAGE_OVERHEAD = 4  # rol/ayraç başına yaklaşık token
+
+
+def count_tokens(text: str) -> int:
+    text = str(text or "")
+    if _ENC is not None:
+        return len(_ENC.encode(text))
+    # Türkçe metinde ~3.5 karakter/token
+    return int(len(text) / 3.5) + 1
+
+
+def _message_tokens(m: dict) -> int:
+    return count_tokens(m["content"]) + MESSAGE_OVERHEAD
+
+
+def _compact_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", str(sql or "")).strip()
+
+
+def summarize_result(results, shape: tuple | None = None) -> str:
+    """Sonuç frame'inin kısa şekil özeti (`shape`: önizleme yerine tam sonucun boyutu)."""
+    if results is None:
+        return "sonuç yok"
+    try:
+        rows, cols = shape or results.shape
+        names = ", ".join(map(str, list(results.columns)[:12]))
+        return f"{rows} satır × {cols} kolon ({names})"
+    except Exception:
+        return "sonuç var"
+
+
+def summarize_turn(user: dict | None, assistant: dict | None) -> list:
+    """Eski bir turu kısa user/assistant mesaj çiftine indirger."""
+    out = []
+    if user is not None:
+        q = str(user.get("content") or "")
+        out.append({"role": "user", "content": q if len(q) <= 400 else q[:400] + "…"})
+    if assistant is not None:
+        if assistant.get("sql"):
+            ref = assistant.get("result_ref")
+            shape = ref.shape if ref is not None else None
+            summary = f"[Özet] SQL: {_compact_sql(assistant['sql'])} → {summarize_result(assistant.get('results'), shape)}"
+            for extra in assistant.get("extra_results", []):
+                ref = extra.get("result_ref")
+                summary += (f"\n[Özet] SQL: {_compact_sql(extra['sql'])} → "
+                            f"{summarize_result(extra.get('results'), ref.shape if ref is not None else None)}")
+        else:
+            text = str(assistant.get("content") or "")
+            summary = "[Özet] " + (text if len(text) <= 300 else text[:300] + "…")
+        out.append({"role": "assistant", "content": summary})
+    return out
+
+
+def _turns(messages: list) -> tuple[list, list]:
+    """(system mesajları, [(user, assistant), ...]) olarak ayırır."""
+    system, turns = [], []
+    for m in messages:
+        role = m.get("role")
+        if role == "system":
+            system.append({"role": "system", "content": str(m.get("content") or "")})
+        elif role == "user":
+            turns.append([m, None])
+        elif role == "assistant":
+            if turns and turns[-1][1] is None:
+                turns[-1][1] = m
+            else:
+                turns.append([None, m])
+    return system, turns
+
+
+def _verbatim(turn) -> list:
+    return [{"role": m["role"], "content": str(m.get("content") or "")} for m in turn if m is not None]
+
+
+def build_api_messages(messages: list, budget: int = DEFAULT_BUDGET,
+                       keep_last_turns: int = DEFAULT_KEEP_TURNS) -> tuple[list, int]:
+    """Bütçeye sığan API mesaj listesini ve toplam token sayısını döndürür."""
+    system, turns = _turns(messages)
+    keep = max(1, keep_last_turns)
+    summaries = [summarize_turn(*t) for t in turns[:-keep]]
+    verbatim = [_verbatim(t) for t in turns[-keep:]]
+
+    def total() -> int:
+        parts = system + [m for s in summaries for m in s] + [m for v in verbatim for m in v]
+        return sum(_message_tokens(m) for m in parts)
+
+    tokens = total()
+    # Önce en eski özetleri, sonra (son tur hariç) aynen gönderilen turları özetleyerek küçült
+    while tokens > budget and (summaries or len(verbatim) > 1):
+        if summaries:
+            summaries.pop(0)
+        else:
+            summaries.append(summarize_turn(*turns[-len(verbatim)]))
+            verbatim.pop(0)
+        tokens = total()
+
+    api_messages = system + [m for s in summaries for m in s] + [m for v in verbatim for m in v]
+    return api_messages, tokens
@@ -0,0 +1,197 @@
+"""Soru -> cevap/SQL cache'i.
+
+Aynı soru tekrar geldiğinde LLM çağrısı yapmadan kayıtlı cevabı ve SQL bloğunu döndürür.
+- Anahtar: normalize edilmiş soru + system prompt parmak izi (+ önceki SQL bağlamı)
+- System prompt (GEN_SQL + şema bağlamı) değişince parmak izi değişir, eski kayıtlar düşer
+- İsteğe bağlı bulanık mod: token kümesi benzerliği (Jaccard) ile eşleştirme
+- Kayıtlar yerel diske (JSON) yazılır; yeniden başlatmada kaybolmaz. Her parmak izi
+  (model, prompt modu, şema sürümü) kendi dosyasına yazar, birbirinin kayıtlarını ezmez;
+  yalnızca en son yazılan `keep_files` parmak izi dosyası (+ geçerli olan) tutulur, eskileri silinir
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(".cache", "llm_cache.json")
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_KEEP_FILES = 4
+
+_TR_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i", "Ö": "o", "ö": "o", "Ü": "u", "ü": "u",
+    "Ş": "s", "ş": "s", "Ğ": "g", "ğ": "g", "Ç": "c", "ç": "c",
+})
+
+
+def prompt_fingerprint(system_prompt: str) -> str:
+    """System prompt'un kısa parmak izi."""
+    return hashlib.sha256(str(system_prompt or "").encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint_path(path: str, fingerprint: str) -> str:
+    """`.cache/llm_cache.json` -> `.cache/llm_cache.<parmak izi>.json`."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{fingerprint}{ext or '.json'}"
+
+
+def prune_fingerprint_files(path: str, keep: int, current: str | None = None) -> list[str]:
+    """`path`'in parmak izi kardeşlerinden en son değişen `keep` tanesi (ve `current`) dışındakileri siler.
+
+    Prompt/şema her değiştiğinde yeni bir dosya açıldığından `.cache/` sınırsız büyümesin diye.
+    Silinen yolları döndürür.
+    """
+    root, ext = os.path.splitext(path)
+    directory = os.path.dirname(root) or "."
+    pattern = re.compile(re.escape(os.path.basename(root)) + r"\.[0-9a-f]{16}" + re.escape(ext or ".json") + "$")
+    try:
+        names = [n for n in os.listdir(directory) if pattern.match(n)]
+    except OSError:
+        return []
+    files = []
+    for name in names:
+        full = os.path.join(directory, name)
+        try:
+            files.append((os.path.getmtime(full), full))
+        except OSError:
+            continue
+    files.sort(reverse=True)
+    keep_paths = {f for _, f in files[:max(keep, 0)]}
+    if current is not None:
+        keep_paths.add(fingerprint_path(path, current))
+    removed = []
+    for _, full in files:
+        if full in keep_paths:
+            continue
+        try:
+            os.remove(full)
+            removed.append(full)
+        except OSError:
+            pass
+    return removed
+
+
+def normalize_question(q: str) -> str:
+    """Soruyu aksan/büyük-küçük harf/noktalama duyarsız hale getirir."""
+    q = str(q or "").translate(_TR_FOLD).lower()
+    q = re.sub(r"[^\w\s]", " ", q)
+    return re.sub(r"\s+", " ", q).strip()
+
+
+def _tokens(norm_q: str) -> frozenset:
+    return frozenset(norm_q.split())
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class QuestionCache:
+    """Diske yazılan, parmak izine bağlı soru cache'i."""
+
+    def __init__(self, fingerprint: str, path: str = DEFAULT_PATH, fuzzy: bool = False,
+                 threshold: float = 0.9, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 keep_files: int = DEFAULT_KEEP_FILES):
+        self.fingerprint = fingerprint
+        self.path = fingerprint_path(path, fingerprint)
+        prune_fingerprint_files(path, keep_files, current=fingerprint)
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def key(self, question: str, context: str = "") -> str:
+        raw = "\x1f".join([self.fingerprint, str(context or ""), normalize_question(question)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, question: str, context: str = "") -> dict | None:
+        """Kayıt varsa {"answer", "sql", ...} döndürür."""
+        key = self.key(question, context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.fuzzy:
+                entry = self._fuzzy_lookup(normalize_question(question), str(context or ""))
+            if entry is None:
+                self.misses += 1
+                return None
+            entry["last_used"] = time.time()
+            self.hits += 1
+            return dict(entry)
+
+    def put(self, question: str, answer: str, sql: str | None = None, context: str = ""):
+        norm = normalize_question(question)
+        entry = {
+            "question": norm,
+            "context": str(context or ""),
+            "answer": answer,
+            "sql": sql,
+            "created": time.time(),
+            "last_used": time.time(),
+        }
+        with self._lock:
+            self._entries[self.key(question, context)] = entry
+            if len(self._entries) > self.max_entries:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+                for k in oldest[: len(self._entries) - self.max_entries]:
+                    del self._entries[k]
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                "hit_rate": (self.hits / total) if total else 0.0}
+
+    # ---------- iç yardımcılar ----------
+    def _fuzzy_lookup(self, norm_q: str, context: str) -> dict | None:
+        """Token kümesi en benzer kaydı döndürür; sayılar (yıl, hafta...) birebir aynı olmalı."""
+        toks = _tokens(norm_q)
+        nums = {t for t in toks if t.isdigit()}
+        best, best_score = None, self.threshold
+        for entry in self._entries.values():
+            if entry["context"] != context:
+                continue
+            etoks = _tokens(entry["question"])
+            if {t for t in etoks if t.isdigit()} != nums:
+                continue
+            score = _jaccard(toks, etoks)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("fingerprint") != self.fingerprint:
+            # GEN_SQL veya şema bağlamı değişmiş: eski kayıtlar geçersiz
+            return
+        self._entries = data.get("entries", {})
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint, "entries": self._entries}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
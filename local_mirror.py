@@ -0,0 +1,246 @@
+"""Kapanmış yıllar için yerel DuckDB/Parquet kopyası ve şeffaf sorgu yönlendirme.
+
+GETIR2023REKABET (ve yıl kapandıkça GETIR2024REKABET) artık değişmiyor; bu tablolara
+giden her soru yine de bir Snowflake warehouse'u uyandırır. Bu modül:
+
+- `sync_mirror()`: donmuş tabloları Arrow batch'leriyle Parquet'e yazar. Ham tablolar
+  birebir kopyalanır (üretilen SQL aynı sonucu versin diye); "typed" prompt modu için
+  GETIRREKABET'in donmuş yıl dilimi sayılar parse edilmiş halde ayrıca yazılır.
+- `LocalMirror.route(sql)`: sorgu yalnızca donmuş tablolara dokunuyorsa (typed tabloda
+  YIL filtresi yalnızca donmuş yılları kapsıyorsa) DuckDB SQL'ine çevirir
+  (TRY_CAST, ILIKE, IFF, ... sqlglot ile); GETIR2025REKABET veya GETIRKAMPANYALARI
+  içeren sorgular için None döner ve sorgu Snowflake'e gider.
+
+Eşitleme: `streamlit run local_mirror.py -- --sync`; sentetik veriyle testler: tests/test_local_mirror.py.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pyarrow.parquet as pq
+
+from arrow_fetch import duckdb_batches
+from typed_view import REKABET_COLUMNS, TYPED_TABLE, typed_select
+
+try:  # opsiyonel: SQL ayrıştırma/çeviri
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # sqlglot yoksa yönlendirme devre dışı
+    sqlglot = None
+    exp = None
+
+DEFAULT_DIR = os.path.join(".cache", "mirror")
+FROZEN_TABLES = ("GETIR2023REKABET",)
+MANIFEST = "manifest.json"
+
+
+def _years(tables) -> set:
+    return {int(t[5:9]) for t in tables if t[5:9].isdigit()}
+
+
+# =========================
+# Eşitleme
+# =========================
+def _write_parquet(batches, path: str) -> int:
+    """Batch'leri akış halinde Parquet'e yazar (tam tablo belleğe alınmaz); satır sayısını döndürür."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".parquet.tmp")
+    os.close(fd)
+    writer, rows = None, 0
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, batch.schema, compression="zstd")
+            writer.write(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        os.remove(tmp)
+        return 0
+    os.replace(tmp, path)
+    return rows
+
+
+def sync_mirror(batches_fn, schema_path: str, directory: str = DEFAULT_DIR,
+                frozen=FROZEN_TABLES, columns=REKABET_COLUMNS, typed: bool = True) -> dict:
+    """Donmuş tabloları `batches_fn(sql)` (ör. snowflake_batches) ile Parquet'e kopyalar.
+
+    Yıl kapandığında `frozen` listesine eklenip yeniden çalıştırılır.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"schema_path": schema_path, "synced_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "tables": {}}
+    for table in frozen:
+        rows = _write_parquet(batches_fn(f"SELECT * FROM {schema_path}.{table}"),
+                              os.path.join(directory, f"{table}.parquet"))
+        manifest["tables"][table] = {"rows": rows}
+    if typed:
+        rows = _write_parquet(batches_fn(typed_select(schema_path, columns, sources=frozen)),
+                              os.path.join(directory, f"{TYPED_TABLE}.parquet"))
+        manifest["tables"][TYPED_TABLE] = {"rows": rows, "years": sorted(_years(frozen))}
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(directory, MANIFEST))
+    return manifest
+
+
+# =========================
+# Yönlendirme + yerel çalıştırma
+# =========================
+def _arg(node, name: str):
+    # sqlglot sürümleri arasında bazı argümanlar "from" -> "from_" olarak yeniden adlandırıldı
+    return node.args.get(name) or node.args.get(name + "_")
+
+
+def _literal_years(node) -> set | None:
+    """`YIL = 2023`, `YIL IN (2023, 2024)`, `YIL BETWEEN 2023 AND 2024` koşulundan yıl kümesi."""
+    def num(n):
+        if isinstance(n, exp.Literal):
+            try:
+                return int(str(n.this))
+            except ValueError:
+                return None
+        return None
+
+    def is_year(n):
+        return isinstance(n, exp.Column) and n.name.upper() == "YIL"
+
+    if isinstance(node, exp.EQ):
+        for a, b in ((node.this, node.expression), (node.expression, node.this)):
+            if is_year(a) and num(b) is not None:
+                return {num(b)}
+    if isinstance(node, exp.In) and is_year(node.this):
+        vals = [num(v) for v in node.expressions]
+        if vals and None not in vals:
+            return set(vals)
+    if isinstance(node, exp.Between) and is_year(node.this):
+        lo, hi = num(node.args.get("low")), num(node.args.get("high"))
+        if lo is not None and hi is not None:
+            return set(range(lo, hi + 1))
+    return None
+
+
+def _where_years(select) -> set | None:
+    """WHERE'deki AND ile bağlı YIL koşullarının kesişimi; kısıt yoksa None."""
+    where = select.args.get("where")
+    if where is None:
+        return None
+    years = None
+    for cond in where.this.flatten() if isinstance(where.this, exp.And) else [where.this]:
+        found = _literal_years(cond)
+        if found is not None:
+            years = found if years is None else years & found
+    return years
+
+
+class LocalMirror:
+    """Parquet kopyalarını DuckDB görünümleri olarak açar ve uygun sorguları yerelde çalıştırır."""
+
+    def __init__(self, directory: str = DEFAULT_DIR):
+        import duckdb
+
+        self.directory = directory
+        self.con = duckdb.connect()
+        self._lock = threading.Lock()
+        self.tables: dict = {}
+        self.typed_years: set = set()
+        self.routed = 0
+        self.skipped = 0
+        self.reload()
+
+    def reload(self):
+        """Manifest'i okur ve görünümleri (yeniden) tanımlar; eşitlemeden sonra çağrılır."""
+        try:
+            with open(os.path.join(self.directory, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {"tables": {}}
+        tables = {}
+        for name, info in manifest.get("tables", {}).items():
+            path = os.path.join(self.directory, f"{name}.parquet")
+            if not os.path.exists(path):
+                continue
+            self.con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM read_parquet('{path}')")
+            tables[name] = info
+        with self._lock:
+            self.tables = tables
+            self.typed_years = set(tables.get(TYPED_TABLE, {}).get("years", []))
+
+    @property
+    def available(self) -> bool:
+        return bool(self.tables)
+
+    def route(self, sql: str) -> str | None:
+        """Sorgu yalnızca yerel kopyadan karşılanabiliyorsa DuckDB SQL'i; değilse None."""
+        if sqlglot is None or not self.tables:
+            return None
+        try:
+            tree = sqlglot.parse_one(str(sql).strip().rstrip(";"), read="snowflake")
+            local = self._localize(tree)
+        except Exception:
+            local = None
+        if local is None:
+            self.skipped += 1
+            return None
+        self.routed += 1
+        return local.sql(dialect="duckdb")
+
+    def _localize(self, tree):
+        ctes = {c.alias_or_name.upper() for c in tree.find_all(exp.CTE)}
+        tables = [t for t in tree.find_all(exp.Table) if t.name.upper() not in ctes or t.args.get("db")]
+        if not tables:
+            return None
+        for t in tables:
+            name = t.name.upper()
+            if name not in self.tables:
+                return None  # canlı tablo (GETIR2025REKABET, GETIRKAMPANYALARI, ...)
+            if name == TYPED_TABLE:
+                select = t.find_ancestor(exp.Select)
+                years = _where_years(select) if select is not None else None
+                if not years or not years <= self.typed_years:
+                    return None  # kopya yalnızca donmuş yılları içerir
+        out = tree.copy()
+        for t in out.find_all(exp.Table):
+            if t.name.upper() in self.tables:
+                alias = t.args.get("alias")
+                t.replace(exp.Table(this=exp.to_identifier(t.name.upper()), alias=alias))
+        return out
+
+    def batches(self, local_sql: str):
+        return duckdb_batches(self.con, local_sql)
+
+
+def with_fallback(primary_fn, fallback_fn):
+    """Önce `primary_fn()` batch'lerini dener; ilk batch'ten önce hata olursa `fallback_fn()`'e döner."""
+    try:
+        gen = primary_fn()
+        first = next(gen)
+    except StopIteration:
+        return
+    except Exception:
+        yield from fallback_fn()
+        return
+    yield first
+    yield from gen
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Donmuş REKABET tabloları için yerel kopya")
+    parser.add_argument("--sync", action="store_true", required=True,
+                        help="Snowflake'ten eşitle (st.connection('snowflake') secrets'ı kullanılır)")
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--tables", nargs="*", default=list(FROZEN_TABLES))
+    args = parser.parse_args()
+    import streamlit as st
+
+    from arrow_fetch import snowflake_batches
+
+    conn = st.connection("snowflake")
+    schema = st.secrets.get("SCHEMA_PATH", "GETIR_2023_REVISED.PUBLIC")
+    print(sync_mirror(lambda sql: snowflake_batches(conn, sql), schema, args.dir, frozen=tuple(args.tables)))
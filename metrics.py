@@ -0,0 +1,175 @@
+"""Tur başına gecikme ölçümü ve metrik yüzeyi.
+
+Bir turun her aşaması (prompt kurulumu, LLM ilk token / toplam, SQL çıkarımı, sorgu
+çalıştırma/çekme, frame dönüşümleri, grafik) `TurnTimer` ile ölçülür. Tur bitince:
+
+- tek satır JSON olarak yapılandırılmış loga yazılır (`.cache/metrics/turns.jsonl`),
+- süreç genelindeki `LatencyRegistry`'ye eklenir; bu kayıt Prometheus metin biçiminde
+  dosyaya (node_exporter textfile collector) yazılabilir veya küçük bir HTTP uç noktasından
+  servis edilebilir,
+- son turlar üzerinden aşama başına p50/p95 hesaplanır (admin paneli).
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DEFAULT_LOG_PATH = os.path.join(".cache", "metrics", "turns.jsonl")
+DEFAULT_RECENT = 500
+# Prometheus histogram kovaları (saniye)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRIC_PREFIX = "talkdata"
+
+logger = logging.getLogger("talkdata.metrics")
+
+
+class TurnTimer:
+    """Bir turun aşama süreleri (saniye) ve sayaçları."""
+
+    def __init__(self, **fields):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.fields = dict(fields)
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name: str, seconds: float):
+        """Aşama süresi ekler; aynı aşama birden çok kez ölçülürse toplanır."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def record(self) -> dict:
+        self.stages.setdefault("turn_total", time.perf_counter() - self.started)
+        return {"ts": time.time(), "stages": dict(self.stages), **self.fields}
+
+
+class LatencyRegistry:
+    """Süreç genelinde aşama istatistikleri: son N ölçüm + kümülatif histogram."""
+
+    def __init__(self, log_path: str | None = DEFAULT_LOG_PATH, recent: int = DEFAULT_RECENT,
+                 prometheus_path: str | None = None):
+        self.log_path = log_path
+        self.prometheus_path = prometheus_path
+        self._lock = threading.Lock()
+        self._recent: dict[str, deque] = {}
+        self._recent_size = recent
+        self._hist: dict[str, list] = {}   # aşama -> kova sayaçları
+        self._sum: dict[str, float] = {}
+        self._count: dict[str, int] = {}
+        self._counters: dict[str, float] = {}
+        self.turns = 0
+
+    # ---------- kayıt ----------
+    def observe(self, timer: TurnTimer) -> dict:
+        record = timer.record()
+        with self._lock:
+            self.turns += 1
+            for stage, secs in record["stages"].items():
+                self._recent.setdefault(stage, deque(maxlen=self._recent_size)).append(secs)
+                hist = self._hist.setdefault(stage, [0] * len(BUCKETS))
+                for i, b in enumerate(BUCKETS):
+                    if secs <= b:
+                        hist[i] += 1
+                self._sum[stage] = self._sum.get(stage, 0.0) + secs
+                self._count[stage] = self._count.get(stage, 0) + 1
+            for key in ("rows", "bytes"):
+                if isinstance(record.get(key), (int, float)):
+                    self._counters[key] = self._counters.get(key, 0) + record[key]
+            for key in ("cache_hit", "llm_cache_hit", "local_refine", "prefetch_hit", "error"):
+                if record.get(key):
+                    self._counters[key] = self._counters.get(key, 0) + 1
+        self._write_log(record)
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+        return record
+
+    # ---------- okuma ----------
+    def percentiles(self, qs=(50, 95)) -> dict:
+        """{aşama: {"n", "p50", "p95"}} (saniye), son N tur üzerinden."""
+        with self._lock:
+            snapshot = {s: list(v) for s, v in self._recent.items()}
+        out = {}
+        for stage, vals in snapshot.items():
+            arr = np.asarray(vals)
+            out[stage] = {"n": len(vals), **{f"p{q}": float(np.percentile(arr, q)) for q in qs}}
+        return out
+
+    def prometheus_text(self) -> str:
+        """Prometheus metin biçimi (histogram + sayaçlar)."""
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Tur aşaması süresi (saniye).", f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage in sorted(self._hist):
+                for b, c in zip(BUCKETS, self._hist[stage]):
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{b}"}} {c}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {self._count[stage]}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {self._sum[stage]:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {self._count[stage]}')
+            lines += [f"# TYPE {METRIC_PREFIX}_turns_total counter", f"{METRIC_PREFIX}_turns_total {self.turns}"]
+            for key in sorted(self._counters):
+                metric = f"{METRIC_PREFIX}_{key}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {self._counters[key]:g}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Metin dosyasını atomik yazar (textfile collector yarım dosya okumasın)."""
+        directory = os.path.dirname(path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """`/metrics` uç noktasını arka plan thread'inde açar."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    # ---------- iç yardımcılar ----------
+    def _write_log(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        logger.info(line)
+        if not self.log_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
@@ -0,0 +1,243 @@
+"""Kullanıcı cevabı okurken olası takip sorgularını önceden çalıştırma (spekülatif prefetch).
+
+"Getir 2024 aylık NETTUTAR" cevabından sonraki soru çoğunlukla aynı sorgunun başka bir
+yılı, başka bir MARKA'sı veya NETTUTAR yerine GRP'sidir. Bu modül:
+
+- çalıştırılan SQL'den yıl tablosu (GETIR20xxREKABET) / `YIL = 20xx` literal'i, MARKA literal'i veya metrik kolonu
+  değiştirilmiş birkaç varyant türetir (`variant_queries`),
+- varyantları ayrı, tek işçili (düşük öncelikli) bir executor'da çalıştırıp sonucu
+  paylaşılan sorgu cache'ine yazar; sonraki turun SQL'i kanonik olarak eşleşirse sonuç
+  cache'ten (veya sürmekte olan prefetch'i bekleyerek) anında gelir,
+- yeni tur başlayınca sırada bekleyen varyantları iptal eder,
+- kayan pencerede harcanan warehouse süresini sınırlar ve isabet oranını raporlar.
+"""
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from query_cache import _STRING_OR_IDENT, canonical_sql
+
+# Takip sorularında birbirinin yerine en sık istenen metrikler
+METRIC_SWAPS = {
+    "NETTUTAR": ("GRP",),
+    "GRP": ("NETTUTAR",),
+    "ADET": ("GRP",),
+    "BRFIYAT": ("NETTUTAR",),
+}
+DEFAULT_MAX_VARIANTS = 4
+DEFAULT_BRAND_VARIANTS = 2
+
+# Yalnızca yıl tablosu adı ve YIL = 20xx literal'i; şema adındaki yıl (GETIR_2023_REVISED) değişmez
+_YEAR_TABLE_RE = re.compile(r"(?<![A-Z0-9_])GETIR(20\d\d)REKABET(?![A-Z0-9_])", re.IGNORECASE)
+_YEAR_LITERAL_RE = re.compile(r"\bYIL\s*=\s*'?(20\d\d)'?(?!\d)", re.IGNORECASE)
+_MARKA_LITERAL_RE = re.compile(r"\bMARKA\s*(?:=|I?LIKE)\s*'((?:[^']|'')*)'", re.IGNORECASE)
+
+
+def _outside_literals(sql: str, fn) -> str:
+    """`fn`'i yalnızca string literal / tırnaklı identifier dışındaki parçalara uygular."""
+    parts = _STRING_OR_IDENT.split(sql)
+    return "".join(p if i % 2 else fn(p) for i, p in enumerate(parts))
+
+
+def _code_only(sql: str) -> str:
+    return " ".join(_STRING_OR_IDENT.split(sql)[::2])
+
+
+def year_tables(names) -> list[int]:
+    """Tablo adlarındaki (GETIR2024REKABET) yıllar."""
+    return sorted({int(m.group(1)) for n in names for m in _YEAR_TABLE_RE.finditer(str(n))})
+
+
+def _swap_year(sql: str, years) -> list:
+    code = _code_only(sql)
+    found = {m.group(1) for m in _YEAR_TABLE_RE.finditer(code)} | {m.group(1) for m in _YEAR_LITERAL_RE.finditer(sql)}
+    if len(found) != 1:
+        return []  # yıl yok veya çok yıllı karşılaştırma: hangi yılın değişeceği belirsiz
+    year = found.pop()
+
+    def swap(pattern, text, y):
+        return pattern.sub(lambda m: m.group(0).replace(year, str(y)) if m.group(1) == year else m.group(0), text)
+
+    # Önce komşu yıllar (2024 -> 2023, 2025), sonra diğerleri
+    others = sorted((y for y in years if y != int(year)), key=lambda y: (abs(y - int(year)), -y))
+    return [swap(_YEAR_LITERAL_RE, _outside_literals(sql, lambda p, y=y: swap(_YEAR_TABLE_RE, p, y)), y)
+            for y in others]
+
+
+def _swap_brand(sql: str, brands, limit: int) -> list:
+    literals = {m.group(1) for m in _MARKA_LITERAL_RE.finditer(sql)}
+    if len(literals) != 1:
+        return []
+    literal = literals.pop()
+    core = literal.strip("%")
+    out = []
+    for brand in brands:
+        if len(out) >= limit:
+            break
+        if brand.upper() == core.upper() or ("%" in literal and core.upper() in brand.upper()):
+            continue  # aynı marka veya ILIKE '%MIGROS%' zaten MIGROS SANAL MARKET'i kapsıyor
+        new = literal.replace(core, brand.replace("'", "''"), 1)
+        out.append(_MARKA_LITERAL_RE.sub(lambda m: m.group(0).replace(f"'{literal}'", f"'{new}'"), sql))
+    return out
+
+
+def _swap_metric(sql: str, swaps: dict) -> list:
+    code = _code_only(sql)
+    out = []
+    for metric, targets in swaps.items():
+        # Alt çizgi sınır sayılmaz: TOPLAM_NETTUTAR takma adı da değişir, GRP1544ABC1 değişmez
+        pattern = re.compile(rf"(?<![A-Z0-9]){metric}(?![A-Z0-9])", re.IGNORECASE)
+        if not pattern.search(code):
+            continue
+        for target in targets:
+            if re.search(rf"(?<![A-Z0-9]){target}(?![A-Z0-9])", code, re.IGNORECASE):
+                continue  # iki metrik zaten birlikte sorgulanıyor
+            out.append(_outside_literals(sql, lambda p: pattern.sub(target, p)))
+        break  # yalnızca ilk bulunan metrik değiştirilir
+    return out
+
+
+def variant_queries(sql: str, years=(), brands=(), metric_swaps: dict = METRIC_SWAPS,
+                    max_variants: int = DEFAULT_MAX_VARIANTS,
+                    brand_variants: int = DEFAULT_BRAND_VARIANTS) -> list[str]:
+    """Olası takip sorguları: yıl, MARKA ve metrik değişimleri (bu öncelikle, tekrarsız)."""
+    seen = {canonical_sql(sql)}
+    out = []
+    for variant in (_swap_year(sql, years) + _swap_brand(sql, brands, brand_variants)
+                    + _swap_metric(sql, metric_swaps)):
+        key = canonical_sql(variant)
+        if key not in seen:
+            seen.add(key)
+            out.append(variant)
+    return out[:max_variants]
+
+
+class Prefetcher:
+    """Varyantları düşük öncelikte çalıştırır; warehouse süresi `budget_s` / `window_s` ile sınırlı.
+
+    `contains(sql)` cache'te geçerli kayıt olup olmadığını (istatistiğe dokunmadan) söyler;
+    `schedule`'a verilen `make_task(sql)` script thread'inde çağrılır ve çalıştırılacak
+    sıfır argümanlı fonksiyonu (sonuç: `(df, profile, meta)`) ya da atlanacaksa None döndürür.
+    """
+
+    def __init__(self, contains, budget_s: float = 120.0, window_s: float = 3600.0, workers: int = 1):
+        self.contains = contains
+        self.budget_s = budget_s
+        self.window_s = window_s
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._spend: deque = deque()     # (bitiş zamanı, saniye)
+        self._queued: list = []
+        self._speculated: dict = {}      # kanonik SQL -> zaman (gönderilmiş / tamamlanmış varyantlar)
+        self.scheduled = 0
+        self.ran = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.over_budget = 0
+        self.hits = 0
+        self.queries = 0
+
+    # ---------- zamanlama ----------
+    def schedule(self, variants: list, make_task) -> int:
+        """Varyantları sıraya koyar; cache'te olanlar ve bütçe dolduysa hepsi atlanır."""
+        if self.budget_s <= 0 or self.spent() >= self.budget_s:
+            with self._lock:
+                self.over_budget += len(variants)
+            return 0
+        self._prune()
+        n = 0
+        for sql in variants:
+            key = canonical_sql(sql)
+            with self._lock:
+                if key in self._speculated:
+                    continue
+            if self.contains(sql):
+                continue
+            task = make_task(sql)
+            if task is None:
+                continue
+            with self._lock:
+                self._speculated[key] = time.time()
+                self.scheduled += 1
+                self._queued.append((key, self._executor.submit(self._run, key, task)))
+            n += 1
+        return n
+
+    def pause(self) -> int:
+        """Yeni tur başladı: sırada bekleyen (başlamamış) varyantları iptal eder; sürenler biter."""
+        with self._lock:
+            queued, self._queued = self._queued, []
+        dropped = [key for key, future in queued if future.cancel()]
+        with self._lock:
+            for key in dropped:
+                self._speculated.pop(key, None)
+            self.cancelled += len(dropped)
+        return len(dropped)
+
+    def _prune(self):
+        """Biten işleri ve pencereden eski (artık isabet sayılmayacak) varyant kayıtlarını atar."""
+        cutoff = time.time() - self.window_s
+        with self._lock:
+            self._queued = [(k, f) for k, f in self._queued if not f.done()]
+            self._speculated = {k: t for k, t in self._speculated.items() if t >= cutoff}
+
+    def _run(self, key: str, task):
+        if self.spent() >= self.budget_s:
+            with self._lock:
+                self.over_budget += 1
+                self._speculated.pop(key, None)
+            return None
+        t0 = time.perf_counter()
+        try:
+            _, _, meta = task()
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+                self._speculated.pop(key, None)
+            raise
+        cost = 0.0 if meta.get("cache_hit") else meta.get("fetch_s", time.perf_counter() - t0)
+        with self._lock:
+            self.ran += 1
+            self._spend.append((time.monotonic(), cost))
+        return meta
+
+    # ---------- metrikler ----------
+    def spent(self) -> float:
+        """Son `window_s` içinde prefetch'in harcadığı warehouse süresi (saniye)."""
+        cutoff = time.monotonic() - self.window_s
+        with self._lock:
+            while self._spend and self._spend[0][0] < cutoff:
+                self._spend.popleft()
+            return sum(s for _, s in self._spend)
+
+    def note_result(self, sql: str, cache_hit: bool) -> bool:
+        """Turdaki her sorgu sonucu için çağrılır; sonuç bir prefetch'ten geldiyse True."""
+        key = canonical_sql(sql)
+        with self._lock:
+            self.queries += 1
+            hit = cache_hit and self._speculated.pop(key, None) is not None
+            if hit:
+                self.hits += 1
+            return hit
+
+    def stats(self) -> dict:
+        spent = self.spent()
+        with self._lock:
+            return {
+                "scheduled": self.scheduled,
+                "ran": self.ran,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "over_budget": self.over_budget,
+                "hits": self.hits,
+                "hit_rate": (self.hits / self.ran) if self.ran else 0.0,      # işe yarayan prefetch oranı
+                "coverage": (self.hits / self.queries) if self.queries else 0.0,  # prefetch'ten gelen sorgu oranı
+                "spent_s": round(spent, 2),
+                "budget_s": self.budget_s,
+            }
+
+    def shutdown(self):
+        self.pause()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,156 @@
+"""Soruya duyarlı system prompt kurucu (sağlayıcı tarafı prompt cache'ine uygun sıralama).
+
+`get_multi_table_prompt` tüm kuralları, ~50 alanlık <fieldContext>'i ve dört tablonun
+kolon listelerini tek metinde birleştirir; üç REKABET tablosunun kolonları birebir
+aynı olduğu halde üç kez tekrarlanır. Bu kurucu:
+
+1. Aynı kolon listesine sahip tabloları tek <table> bloğunda birleştirir.
+2. Metni değişmeyenden değişene sıralar: kurallar -> şema -> alan açıklamaları.
+   Böylece uzun ve sabit bir önek her istekte aynı kalır ve sağlayıcının otomatik
+   prompt cache'inden (ör. OpenAI, >=1024 token önek) faydalanır.
+3. İsteğe bağlı olarak yalnızca soruyla ilgili alan açıklamalarını ve tabloları koyar
+   (değişken kısım en sonda olduğu için önek cache'i bozulmaz).
+4. Önce/sonra token sayılarını raporlar.
+"""
+import re
+from dataclasses import dataclass
+
+from history import count_tokens
+from llm_cache import normalize_question
+from schema_context import render_shared_table_context, render_table_context
+
+FIELD_RE = re.compile(r"^\s*([A-Z0-9_İŞĞÜÖÇ]+)\s*:\s*(.+)$")
+FIELD_NOTE = "Alanların açıklamaları aşağıda <fieldContext> içinde verilmiştir."
+
+# Her zaman gönderilen temel alanlar (kuralların çoğu bunlara atıf yapar)
+CORE_FIELDS = ("MARKA", "YIL", "AYISMI", "TARIH", "MECRA", "NETTUTAR", "GRP")
+# Soru kelimesi -> alan eşlemesi (normalize edilmiş, aksansız küçük harf kök)
+FIELD_SYNONYMS = {
+    "butce": ("NETTUTAR", "MECRA"), "yatirim": ("NETTUTAR", "MECRA"), "harcama": ("NETTUTAR",),
+    "sos": ("NETTUTAR",), "tutar": ("NETTUTAR", "BRFIYAT"), "fiyat": ("BRFIYAT",),
+    "sov": ("GRP",), "grp": ("GRP", "GRP1544ABC1", "GRP3020ABC1", "GRPXSURE20ABC1"),
+    "abc1": ("GRP1544ABC1", "GRPXSURE20ABC1", "GRP3020ABC1"),
+    "gun": ("GUN", "TARIH"), "gunluk": ("TARIH",), "hafta": ("HAFTA",), "ay": ("AYISMI",), "aylik": ("AYISMI",),
+    "saat": ("SAATDILIMI", "BASLANGIC"), "kusak": ("DAYPART", "SPOTTIPI"), "daypart": ("DAYPART",),
+    "kanal": ("ANAYAYIN", "TEMATIKKANALTURU"), "program": ("PROGRAM", "TPGRUP"),
+    "imaj": ("IMAJPROMO",), "promo": ("IMAJPROMO",), "spot": ("SPOTTIPI", "SPOTKONUMU", "FSPOTTIPI"),
+    "kampanya": ("KAMPANYA", "KAMPANYADETAY"), "slogan": ("REKLAMSLOGANI",), "sure": ("SURE",),
+    "sektor": ("ANASEKTOR", "SEKTOR"), "il": ("ILI",), "sehir": ("ILI",), "bolge": ("BOLGE",),
+    "adet": ("ADET",), "frekans": ("FREKANS",), "kategori": ("KATEGORI", "KATEGORIDETAY"),
+    "versiyon": ("VERSIYON",), "partner": ("PARTNER",), "firma": ("REKLAMINFIRMASI",),
+    "urun": ("URUNTURU", "URUNHIZMET"), "unite": ("UNITE", "UNITEDETAY"),
+}
+# Bu kelimeler geçmezse kampanya planı tablosu (GETIRKAMPANYALARI) gönderilmez
+CAMPAIGN_TABLE_WORDS = ("plan", "reach", "erisim", "kampanyalari", "kampanya tablosu", "medya plani")
+CAMPAIGN_TABLE = "GETIRKAMPANYALARI"
+
+
+def parse_field_context(field_context: str) -> dict:
+    """<fieldContext> metnini {ALAN: satır} sözlüğüne çevirir (sıra korunur)."""
+    fields = {}
+    for line in field_context.splitlines():
+        m = FIELD_RE.match(line)
+        if m:
+            fields[m.group(1)] = line.strip()
+    return fields
+
+
+def group_identical_tables(columns: dict) -> list:
+    """Aynı kolon listesine sahip tabloları gruplar: [([tablo, ...], [(kolon, tip), ...]), ...]."""
+    groups = {}
+    for table, cols in columns.items():
+        key = tuple((c.upper(), str(t).upper()) for c, t in cols)
+        groups.setdefault(key, ([], list(cols)))[0].append(table)
+    return list(groups.values())
+
+
+def _stem_tokens(text: str) -> set:
+    return set(normalize_question(text).split())
+
+
+@dataclass
+class PromptParts:
+    prefix: str       # kurallar: oturumlar ve sorular arasında sabit
+    schema: str       # şema bağlamı: şema değişmedikçe sabit
+    fields: str       # alan açıklamaları: tam hali sabit, seçili hali soruya göre değişir
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(p for p in (self.prefix, self.schema, self.fields) if p)
+
+
+class PromptBuilder:
+    """GEN_SQL şablonu + <fieldContext> + şema kolonlarından system prompt kurar."""
+
+    def __init__(self, template: str, field_context: str, columns: dict, table_description: str):
+        self.template = template
+        self.field_context = field_context
+        self.columns = columns
+        self.table_description = table_description
+        self.fields = parse_field_context(field_context)
+        # Kurallar metni: şema ve alan açıklamaları yerinden çıkarılıp sona taşınır
+        prefix = template.format(context="").replace(field_context, FIELD_NOTE)
+        self.prefix = re.sub(r"\n{3,}", "\n\n", prefix).strip()
+        self.groups = group_identical_tables(columns)
+
+    # ---------- parçalar ----------
+    def schema_context(self, tables: set | None = None) -> str:
+        blocks = []
+        for names, cols in self.groups:
+            names = [n for n in names if tables is None or n in tables]
+            if not names:
+                continue
+            if len(names) == 1:
+                blocks.append(render_table_context(names[0], self.table_description, cols))
+            else:
+                blocks.append(render_shared_table_context(names, self.table_description, cols))
+        return "\n".join(b.strip() for b in blocks)
+
+    def fields_block(self, names=None) -> str:
+        lines = [l for n, l in self.fields.items() if names is None or n in names]
+        return "<fieldContext>\n" + "\n".join(lines) + "\n</fieldContext>"
+
+    def parts(self) -> PromptParts:
+        """Soruya bağlı olmayan tam prompt (önek + tüm şema + tüm alanlar)."""
+        return PromptParts(self.prefix, self.schema_context(), self.fields_block())
+
+    def parts_for_question(self, question: str) -> PromptParts:
+        """Yalnızca soruyla ilgili alanlar/tablolar; önek ve (büyük ölçüde) şema aynı kalır."""
+        return PromptParts(self.prefix, self.schema_context(self.relevant_tables(question)),
+                           self.fields_block(self.relevant_fields(question)))
+
+    # ---------- seçim ----------
+    def relevant_fields(self, question: str) -> list:
+        tokens = _stem_tokens(question)
+        picked = set(CORE_FIELDS)
+        for tok in tokens:
+            for stem, fields in FIELD_SYNONYMS.items():
+                if tok == stem or (len(stem) >= 4 and tok.startswith(stem)):
+                    picked.update(fields)
+        for name, line in self.fields.items():
+            if name.lower() in tokens:
+                picked.add(name)
+                continue
+            # Soruda alanın örnek değerlerinden biri geçiyorsa (ör. "televizyon" -> MECRA)
+            samples = line.split("Örnek değerler:", 1)[-1] if "Örnek değerler:" in line else ""
+            values = {normalize_question(v) for v in samples.split(",") if len(v.strip()) >= 4}
+            if any(v and v in normalize_question(question) for v in values):
+                picked.add(name)
+        return [n for n in self.fields if n in picked]
+
+    def relevant_tables(self, question: str) -> set:
+        q = normalize_question(question)
+        tables = set(self.columns)
+        if not any(w in q for w in CAMPAIGN_TABLE_WORDS):
+            tables = {t for t in tables if not t.upper().endswith(CAMPAIGN_TABLE)} or tables
+        return tables
+
+    # ---------- rapor ----------
+    def token_report(self, legacy_prompt: str, question: str | None = None) -> dict:
+        report = {"legacy": count_tokens(legacy_prompt)}
+        parts = self.parts()
+        report["deduped"] = count_tokens(parts.text)
+        report["cacheable_prefix"] = count_tokens(parts.prefix + "\n\n" + parts.schema)
+        if question:
+            report["question"] = count_tokens(self.parts_for_question(question).text)
+        return report
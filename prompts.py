@@ -1,4 +1,7 @@
 import streamlit as st
+from entity_index import EntityIndex
+from prompt_builder import PromptBuilder
+from schema_context import SchemaContextLoader, render_table_context
 
 SCHEMA_PATH = st.secrets.get("SCHEMA_PATH", "GETIR_2023_REVISED.PUBLIC")
 TARGET_TABLES = [
@@ -7,22 +10,23 @@ TARGET_TABLES = [
     f"{SCHEMA_PATH}.GETIR2025REKABET",
     f"{SCHEMA_PATH}.GETIRKAMPANYALARI",
 ]
+# "typed" modu: yıllık tablolar yerine tek, tipli GETIRREKABET tablosu (bkz. typed_view.py)
+TARGET_TABLES_TYPED = [
+    f"{SCHEMA_PATH}.GETIRREKABET",
+    f"{SCHEMA_PATH}.GETIRKAMPANYALARI",
+]
+PROMPT_MODE = st.secrets.get("PROMPT_MODE", "raw")  # "raw" / "typed"
+# "cached": ortak şemalar tekilleştirilir, sabit kurallar başta (bkz. prompt_builder.py); "legacy": eski düzen
+PROMPT_LAYOUT = st.secrets.get("PROMPT_LAYOUT", "cached")
+# Açıksa her soruda yalnızca ilgili alan açıklamaları/tablolar gönderilir
+PROMPT_RETRIEVAL = bool(st.secrets.get("PROMPT_RETRIEVAL", False))
+# Açıksa sorudaki marka/mecra/kampanya ifadeleri veriye göre çözülüp tam değerleri prompt'a eklenir
+ENTITY_INDEX = bool(st.secrets.get("ENTITY_INDEX", False))
 
 TABLE_DESCRIPTION = "This table has various metrics for customers."
 METADATA_QUERY = ""
 
-GEN_SQL = """
-You will be acting as an AI Snowflake SQL Expert named Getir Chatbot.
-Your goal is to give correct, executable sql query to users.
-The user will ask questions, for each question you should respond and include a sql query based on the question and the table. 
-
-{context}
-
-Here are  critical rules for the interaction you must abide:
-<rules>
-Sana rekabet dataları tablolarının içeriklerini aşağıda veriyorum.
-
-<fieldContext>
+FIELD_CONTEXT = """<fieldContext>
 KATEGORI : Bu alan verinin genel kategori bilgisini belirtir. Örnek değerler: MARKETGENEL, GETIRYEMEK, GETIR10, GETIRBUYUK, GETIRMORE.
 KATEGORIDETAY : Bu alan kategori alt sınıflandırmasını içerir. Örnek değerler: MARKET, GETIRYEMEK, GENEL, GETIR10, REKABET.
 AYISMI : Bu alan verinin ait olduğu ayın adını gösterir. Örnek değerler: OCAK, SUBAT, MART, NISAN, MAYIS.
@@ -72,45 +76,32 @@ NETTUTAR : Reklamın veya kampanyanın net harcama tutarını belirtir. Örnek d
 PARTNER : İş ortaklığı veya kampanya partneri bilgisini belirtir. Örnek değerler: GETIR, MIGROS, TRENDYOL, YEMEKSEPETI, DIGER.
 TEMATIKKANALTURU : Yayının tematik kanal türünü belirtir. Örnek değerler: HABER, EGLENCE, SPOR, YASAM, DIGER.
 KAMPANYADETAY : Kampanyanın detay açıklamasını içerir. Örnek değerler: GETIR YAZ KAMPANYASI, MIGROS EYLUL, TRENDYOL INDIRIM, YEMEKSEPETI MAHALLE, DIGER.
-</fieldContext>
+</fieldContext>"""
 
-
-1. You MUST MUST wrap the generated sql code within ``` sql code markdown in this format e.g
+# =========================
+# SQL kuralları: iki prompt (ham yıllık tablolar / tipli GETIRREKABET) aynı parçalardan kurulur
+# =========================
+RULE_WRAP = """You MUST MUST wrap the generated sql code within ``` sql code markdown in this format e.g
 ```sql
 (select 1) union (select 2)
 ```
-
-3. Text / string where clauses must be fuzzy match e.g ilike %keyword%
-4. Make sure to generate a single snowflake sql code, not multiple. 
-5. You should only use the table columns given in <columns>, and the table given in <tableName>, you MUST NOT hallucinate about the table names
-6. DO NOT put numerical at the very front of sql variable.
-7. Tarih filtrelemen gerektiğinde TARIH sütunundaki bilgiyi al. Gün.Ay.Yıl formatında bir bilgi var. Örnek olarak 23.08.2023 bu şekilde bir bilgi var. Bu tarih 23 Ağustos 2023'tür. 
-8. Soruda getir kelimesi geçtiğinde o kelimeyi GETİR olarak algılamalısın. Çünkü datanın içerisinde her zaman GETİR şeklinde yazılmış durumda.
-9. Sana GRP sorulduğunda şunu sadece datadaki GRP sütununu alacaksın. Aksi belirtilmedikçe GRP'leri toplamalısın. Sadece ortalama GRP sorulursa ortalamalarını almalısın.
+"""
+RULE_TYPED_NUMERIC = "GETIRREKABET tablosunda sayısal alanlar (NETTUTAR, BRFIYAT, GRP, GRP1544ABC1, GRPXSURE20ABC1, GRP3020ABC1, ADET, SURE, FREKANS, HAFTA, YIL) zaten sayıdır. REPLACE, TRY_CAST veya CAST KULLANMA; doğrudan SUM(NETTUTAR), SUM(GRP) yaz."
+RULE_FUZZY = "Text / string where clauses must be fuzzy match e.g ilike %keyword%"
+RULE_SINGLE = "Make sure to generate a single snowflake sql code, not multiple. "
+RULE_COLUMNS = "You should only use the table columns given in <columns>, and the table given in <tableName>, you MUST NOT hallucinate about the table names"
+RULE_NUMERIC_NAME = "DO NOT put numerical at the very front of sql variable."
+RULE_DATE_RAW = "Tarih filtrelemen gerektiğinde TARIH sütunundaki bilgiyi al. Gün.Ay.Yıl formatında bir bilgi var. Örnek olarak 23.08.2023 bu şekilde bir bilgi var. Bu tarih 23 Ağustos 2023'tür. "
+RULE_YEAR_TYPED = "Yıl filtrelemek için YIL alanını kullan (ör. WHERE YIL = 2024, WHERE YIL IN (2023, 2024)). Yıllar arası karşılaştırmada UNION KULLANMA, YIL'a göre grupla."
+RULE_DATE_TYPED = "TARIH alanı DATE tipindedir; tarih filtrelerini DATE olarak yaz (ör. TARIH BETWEEN '2023-08-01' AND '2023-08-31'). Soruda gün bazlı dendiğinde TARIH bazlı ALGILAYACAKSIN."
+RULE_GETIR = "Soruda getir kelimesi geçtiğinde o kelimeyi GETİR olarak algılamalısın. Çünkü datanın içerisinde her zaman GETİR şeklinde yazılmış durumda."
+RULE_GRP_RAW = """Sana GRP sorulduğunda şunu sadece datadaki GRP sütununu alacaksın. Aksi belirtilmedikçe GRP'leri toplamalısın. Sadece ortalama GRP sorulursa ortalamalarını almalısın.
     GRP hesaplaman için örnek SQL kodunu aşağıda paylaşıyorum.
     SELECT SUM(TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT)) AS toplam_grp
-    FROM GETIR_2023_REVISED.PUBLIC.GETIR2023REKABET;
-11. Bir marka arayacağın zaman datadaki MARKA sütunundan aramalısın.
-
-
-13. Sana bütçe , yatırım sorulduğunda NETTUTAR sütunundan değerleri alıcaksın. Eğer bütçe sorulurken outdoor , ölçülen tv ,radyo,sinema , basın gibi alanlarda filtreleme yapmanı istersen MECRA sütunundan değerleri alacaksın.
-14. SQL sorgusunda LIMIT KESINLIKLE KULLANMA 
-15. GRP sorulduğunda 2 basamak küsürat olmalı.
-16. Harcama sorulduğunda küsürat kullanmamalısın.
-17. NETTUTAR hesapladığında SUM(COALESCE(CAST(TRY_CAST(CASE WHEN NETTUTAR LIKE '%.%' AND NETTUTAR LIKE '%,%' THEN REPLACE(REPLACE(REPLACE(NETTUTAR, '₺', ''), '.', ''), ',', '.') WHEN NETTUTAR LIKE '%,%' THEN REPLACE(REPLACE(NETTUTAR, '₺', ''), ',', '.') WHEN NETTUTAR LIKE '%.%' THEN REPLACE(REPLACE(NETTUTAR, '₺', ''), '.', '') ELSE REPLACE(REPLACE(NETTUTAR, '₺', ''), ' ', '') END AS FLOAT) AS INT), 0)) AS TOPLAM_HARCAMA bu şekilde hesaplamalısın.
-18. Soruda SOS geçtiğinde onun harcama ile ilgili olduğunu anlamalısın.
-19. Soruda imaj veya promo geçtiğinde IMAJPROMO alanını anlamalısın.
-20. Soruda migros,Migros geçtiğinde her zaman onu MIGROS olarak KULLANACAKSIN.
-21. Sana sorularda sorulan tablo alan içeriklerini her zaman büyük harflerle arat ve türkçe karakter kullanma.
-22. Soruda Trendyol 1.Lig Karşılaşması geçtiğinde bu kalıbı TRENDYOL 1. LIG KARSILASMASI olarak KULLANACAKSIN.
-23. 2023, 2024, 2025 ile ilgili çalışırken SQL sorgusunu yazarken alanları kesinlikle küçük harfle YAZMAYACAKSIN. Bütün alanları büyük harfle yazacaksın ve TÜRKÇE karakter KULLANMAYACAKSIN. Sadece marka alanında TÜRKÇE karakter kullanabilirsin. 
-24. GETIRKAMPANYALARI tablosunda çalışırken SQL sorgusunu yazarken alanları kesinlikle küçük harfle yazmayacaksın. TÜRKÇE karakter KULLANABİLİRSİN.
-24. Soruda gün bazlı dendiğinde TARIH bazlı ALGILAYACAKSIN.
-25. GETIRKAMPANYALARI tablosundaki REACH1 VE REACH3 alanları örnek olarak %42 , %55 gibi olduğu için SQL sorgunu buna göre yaz. Direkt olarak bu değerleri göster.
-26. GETIRKAMPANYALARI tablosunda çalışırken SQL sorgunda verilen plan adını direkt olarak al.
-27. SOV yani Share Of Voice hesaplarken ilgili markanın veya kategorinin o yılki toplam GRP'si üzerinden hesaplamalısın. Örnek : İlgili markanın  Ocak GRP'si / İlgili markanın veya kategorinin Toplam GRP'Sİ
-28. Soruda getir 10 ifadesi geçerse bunun bir marka ismi olduğunu anlamalısın.
-12. Sorularda geçen markaları MARKA sütununda hangi keyword ile araman gerektiğini aşağıdaki listede veriyorum.
+    FROM GETIR_2023_REVISED.PUBLIC.GETIR2023REKABET;"""
+RULE_GRP_TYPED = "Sana GRP sorulduğunda datadaki GRP sütununu alacaksın. Aksi belirtilmedikçe GRP'leri toplamalısın, sadece ortalama GRP sorulursa ortalamalarını almalısın. GRP 2 basamak küsüratlı olmalı: ROUND(SUM(GRP), 2) AS TOPLAM_GRP"
+RULE_BRAND_COLUMN = "Bir marka arayacağın zaman datadaki MARKA sütunundan aramalısın."
+RULE_BRAND_KEYWORDS = """Sorularda geçen markaları MARKA sütununda hangi keyword ile araman gerektiğini aşağıdaki listede veriyorum.
     yemeksepeti -> YEMEKSEPETI.COM
     yemeksepeti market -> YEMEKSEPETI MARKET
     yemeksepeti mahalle -> YEMEKSEPETI MAHALLE
@@ -119,8 +110,86 @@ KAMPANYADETAY : Kampanyanın detay açıklamasını içerir. Örnek değerler: G
     migros-> MIGROS
     migros sanal market -> MIGROS SANAL MARKET
     getir 10 -> GETİR10
-    Getir Yemek -> GETİRYEMEK
-30. SQL sorgularında NOT ILIKE KULLANMAYACAKSIN.
+    Getir Yemek -> GETİRYEMEK"""
+RULE_BUDGET_RAW = "Sana bütçe , yatırım sorulduğunda NETTUTAR sütunundan değerleri alıcaksın. Eğer bütçe sorulurken outdoor , ölçülen tv ,radyo,sinema , basın gibi alanlarda filtreleme yapmanı istersen MECRA sütunundan değerleri alacaksın."
+RULE_BUDGET_TYPED = "Sana bütçe , yatırım, harcama veya SOS sorulduğunda SUM(NETTUTAR) AS TOPLAM_HARCAMA kullanacaksın, küsürat kullanmayacaksın. Outdoor , ölçülen tv ,radyo,sinema , basın gibi filtrelerde MECRA sütununu kullanacaksın."
+RULE_NO_LIMIT = "SQL sorgusunda LIMIT KESINLIKLE KULLANMA "
+RULE_GRP_DECIMALS = "GRP sorulduğunda 2 basamak küsürat olmalı."
+RULE_SPEND_DECIMALS = "Harcama sorulduğunda küsürat kullanmamalısın."
+RULE_NETTUTAR = "NETTUTAR hesapladığında SUM(COALESCE(CAST(TRY_CAST(CASE WHEN NETTUTAR LIKE '%.%' AND NETTUTAR LIKE '%,%' THEN REPLACE(REPLACE(REPLACE(NETTUTAR, '₺', ''), '.', ''), ',', '.') WHEN NETTUTAR LIKE '%,%' THEN REPLACE(REPLACE(NETTUTAR, '₺', ''), ',', '.') WHEN NETTUTAR LIKE '%.%' THEN REPLACE(REPLACE(NETTUTAR, '₺', ''), '.', '') ELSE REPLACE(REPLACE(NETTUTAR, '₺', ''), ' ', '') END AS FLOAT) AS INT), 0)) AS TOPLAM_HARCAMA bu şekilde hesaplamalısın."
+RULE_SOS = "Soruda SOS geçtiğinde onun harcama ile ilgili olduğunu anlamalısın."
+RULE_IMAJPROMO = "Soruda imaj veya promo geçtiğinde IMAJPROMO alanını anlamalısın."
+RULE_MIGROS = "Soruda migros,Migros geçtiğinde her zaman onu MIGROS olarak KULLANACAKSIN."
+RULE_UPPERCASE_VALUES = "Sana sorularda sorulan tablo alan içeriklerini her zaman büyük harflerle arat ve türkçe karakter kullanma."
+RULE_TRENDYOL_LIG = "Soruda Trendyol 1.Lig Karşılaşması geçtiğinde bu kalıbı TRENDYOL 1. LIG KARSILASMASI olarak KULLANACAKSIN."
+RULE_CASE_RAW = "2023, 2024, 2025 ile ilgili çalışırken SQL sorgusunu yazarken alanları kesinlikle küçük harfle YAZMAYACAKSIN. Bütün alanları büyük harfle yazacaksın ve TÜRKÇE karakter KULLANMAYACAKSIN. Sadece marka alanında TÜRKÇE karakter kullanabilirsin. "
+RULE_CASE_TYPED = "GETIRREKABET tablosunda alanları büyük harfle yazacaksın ve TÜRKÇE karakter KULLANMAYACAKSIN. Sadece marka alanında TÜRKÇE karakter kullanabilirsin. "
+RULE_CASE_CAMPAIGN = "GETIRKAMPANYALARI tablosunda çalışırken SQL sorgusunu yazarken alanları kesinlikle küçük harfle yazmayacaksın. TÜRKÇE karakter KULLANABİLİRSİN."
+RULE_DAY_RAW = "Soruda gün bazlı dendiğinde TARIH bazlı ALGILAYACAKSIN."
+RULE_REACH = "GETIRKAMPANYALARI tablosundaki REACH1 VE REACH3 alanları örnek olarak %42 , %55 gibi olduğu için SQL sorgunu buna göre yaz. Direkt olarak bu değerleri göster."
+RULE_PLAN = "GETIRKAMPANYALARI tablosunda çalışırken SQL sorgunda verilen plan adını direkt olarak al."
+RULE_SOV = "SOV yani Share Of Voice hesaplarken ilgili markanın veya kategorinin o yılki toplam GRP'si üzerinden hesaplamalısın. Örnek : İlgili markanın  Ocak GRP'si / İlgili markanın veya kategorinin Toplam GRP'Sİ"
+RULE_GETIR10 = "Soruda getir 10 ifadesi geçerse bunun bir marka ismi olduğunu anlamalısın."
+RULE_NO_NOT_ILIKE = "SQL sorgularında NOT ILIKE KULLANMAYACAKSIN."
+
+# (ham, tipli) çiftleri prompt sırasıyla; her taraf (numara, kural) ya da o modda yoksa None.
+# Numaralar mevcut prompttaki numaralardır (cache'lenmiş prompt parmak izleri ve başka
+# modüllerdeki "kural N" atıfları bunlara dayanır); sıra ve numaralar bilerek korunur.
+SQL_RULES = [
+    ((1, RULE_WRAP), (1, RULE_WRAP)),
+    (None, (2, RULE_TYPED_NUMERIC)),
+    ((3, RULE_FUZZY), (3, RULE_FUZZY)),
+    ((4, RULE_SINGLE), (4, RULE_SINGLE)),
+    ((5, RULE_COLUMNS), (5, RULE_COLUMNS)),
+    ((6, RULE_NUMERIC_NAME), (6, RULE_NUMERIC_NAME)),
+    ((7, RULE_DATE_RAW), (7, RULE_YEAR_TYPED)),
+    (None, (8, RULE_DATE_TYPED)),
+    ((8, RULE_GETIR), (9, RULE_GETIR)),
+    ((9, RULE_GRP_RAW), (10, RULE_GRP_TYPED)),
+    ((11, RULE_BRAND_COLUMN + "\n\n"), (11, RULE_BRAND_COLUMN)),
+    ((13, RULE_BUDGET_RAW), (13, RULE_BUDGET_TYPED)),
+    ((14, RULE_NO_LIMIT), (14, RULE_NO_LIMIT)),
+    ((15, RULE_GRP_DECIMALS), None),
+    ((16, RULE_SPEND_DECIMALS), None),
+    ((17, RULE_NETTUTAR), None),
+    ((18, RULE_SOS), None),
+    ((19, RULE_IMAJPROMO), (19, RULE_IMAJPROMO)),
+    ((20, RULE_MIGROS), (20, RULE_MIGROS)),
+    ((21, RULE_UPPERCASE_VALUES), (21, RULE_UPPERCASE_VALUES)),
+    ((22, RULE_TRENDYOL_LIG), (22, RULE_TRENDYOL_LIG)),
+    ((23, RULE_CASE_RAW), (23, RULE_CASE_TYPED)),
+    ((24, RULE_CASE_CAMPAIGN), (24, RULE_CASE_CAMPAIGN)),
+    ((24, RULE_DAY_RAW), None),
+    ((25, RULE_REACH), (25, RULE_REACH)),
+    ((26, RULE_PLAN), (26, RULE_PLAN)),
+    ((27, RULE_SOV), (27, RULE_SOV)),
+    ((28, RULE_GETIR10), (28, RULE_GETIR10)),
+    ((12, RULE_BRAND_KEYWORDS), (12, RULE_BRAND_KEYWORDS)),
+    ((30, RULE_NO_NOT_ILIKE), (30, RULE_NO_NOT_ILIKE)),
+]
+
+
+def render_rules(typed: bool = False) -> str:
+    rules = [typed_rule if typed else raw_rule for raw_rule, typed_rule in SQL_RULES]
+    return "\n".join(f"{no}. {rule}" for no, rule in (r for r in rules if r is not None))
+
+
+def _gen_sql(intro: str, typed: bool) -> str:
+    return """
+You will be acting as an AI Snowflake SQL Expert named Getir Chatbot.
+Your goal is to give correct, executable sql query to users.
+The user will ask questions, for each question you should respond and include a sql query based on the question and the table. 
+
+{context}
+
+Here are  critical rules for the interaction you must abide:
+<rules>
+""" + intro + """
+
+""" + FIELD_CONTEXT + """
+
+
+""" + render_rules(typed) + """
 </rules>
 
 Don't forget to use "ilike %keyword%" for fuzzy match queries (especially for variable_name column)
@@ -135,6 +204,14 @@ Now to get started, please briefly introduce yourself, describe the table at a h
 Then provide 3 example questions using bullet points.
 """
 
+
+GEN_SQL = _gen_sql("Sana rekabet dataları tablolarının içeriklerini aşağıda veriyorum.", typed=False)
+GEN_SQL_TYPED = _gen_sql(
+    "Sana rekabet dataları tablolarının içeriklerini aşağıda veriyorum. "
+    "2023, 2024 ve 2025 rekabet dataları tek bir GETIRREKABET tablosundadır.",
+    typed=True,
+)
+
 @st.cache_data(show_spinner="Loading table context...")
 def get_table_context(table_name: str, table_description: str, metadata_query: str = None):
     table = table_name.split(".")
@@ -146,30 +223,89 @@ def get_table_context(table_name: str, table_description: str, metadata_query: s
           AND TABLE_NAME   = '{table[2].upper()}'
         ORDER BY ORDINAL_POSITION
     """, show_spinner=False)
-    columns_fmt = "\n".join(
-        f"- **{cols['COLUMN_NAME'][i]}**: {cols['DATA_TYPE'][i]}" for i in range(len(cols))
+    return render_table_context('.'.join(table), table_description,
+                                list(zip(cols['COLUMN_NAME'], cols['DATA_TYPE'])))
+
+def _query_uncached(sql: str):
+    """Streamlit cache'ini atlayarak sorgu çalıştırır (şema tazeleme için)."""
+    cur = st.connection("snowflake").cursor()
+    try:
+        cur.execute(sql)
+        return cur.fetch_pandas_all()
+    finally:
+        cur.close()
+
+@st.cache_resource
+def get_schema_loader(mode: str = "raw") -> SchemaContextLoader:
+    path = st.secrets.get("SCHEMA_CACHE_PATH", ".cache/schema_context.json")
+    if mode == "typed":
+        path = path.replace(".json", "_typed.json")
+    return SchemaContextLoader(
+        TARGET_TABLES_TYPED if mode == "typed" else TARGET_TABLES,
+        TABLE_DESCRIPTION,
+        query_fn=_query_uncached,
+        path=path,
+        refresh_interval=float(st.secrets.get("SCHEMA_REFRESH_SECONDS", 600)),
     )
-    ctx = f"""
-<table>
-Here is the table name <tableName> {'.'.join(table)} </tableName>
-<tableDescription>{table_description}</tableDescription>
-Here are the columns of {'.'.join(table)}:
-<columns>
-{columns_fmt}
-</columns>
-</table>
-"""
-    return ctx
 
-def get_multi_table_prompt():
-    contexts = [get_table_context(t, TABLE_DESCRIPTION, METADATA_QUERY) for t in TARGET_TABLES]
-    combined = "\n\n".join(contexts)
-    return GEN_SQL.format(context=combined)
+@st.cache_resource
+def get_entity_index(mode: str = "raw") -> EntityIndex:
+    path = st.secrets.get("ENTITY_CACHE_PATH", ".cache/entity_index.json")
+    if mode == "typed":
+        path = path.replace(".json", "_typed.json")
+    return EntityIndex(
+        get_schema_loader(mode).columns,
+        query_fn=_query_uncached,
+        path=path,
+        refresh_interval=float(st.secrets.get("ENTITY_REFRESH_SECONDS", 24 * 3600)),
+    )
+
+def entity_hint(question: str, mode: str = None) -> str:
+    """Sorudaki varlıkların tam değerleri (`<entities>` bloğu); indeks kapalı/hazır değilse boş."""
+    if not ENTITY_INDEX or not question:
+        return ""
+    index = get_entity_index(mode or PROMPT_MODE)
+    index.ensure()  # ilk çağrıda diskten yükler; eskiyse arka planda tazeler
+    return index.prompt_hint(question)
+
+def _legacy_prompt(mode: str) -> str:
+    # Tüm tablolar tek sorguda; diskte kopya varsa açılışta warehouse beklenmez
+    combined = get_schema_loader(mode).context()
+    template = GEN_SQL_TYPED if mode == "typed" else GEN_SQL
+    return template.format(context=combined)
+
+def get_prompt_builder(mode: str = None) -> PromptBuilder:
+    mode = mode or PROMPT_MODE
+    return PromptBuilder(
+        GEN_SQL_TYPED if mode == "typed" else GEN_SQL,
+        FIELD_CONTEXT,
+        get_schema_loader(mode).columns(),
+        TABLE_DESCRIPTION,
+    )
+
+def get_multi_table_prompt(mode: str = None):
+    mode = mode or PROMPT_MODE
+    if PROMPT_LAYOUT == "legacy":
+        return _legacy_prompt(mode)
+    return get_prompt_builder(mode).parts().text
+
+def get_question_prompt(question: str, mode: str = None) -> str | None:
+    """PROMPT_RETRIEVAL açıksa soruya göre daraltılmış system prompt; kapalıysa None."""
+    if not PROMPT_RETRIEVAL or PROMPT_LAYOUT == "legacy" or not question:
+        return None
+    return get_prompt_builder(mode).parts_for_question(question).text
+
+def prompt_token_report(question: str = None, mode: str = None) -> dict:
+    """Eski düzen / tekilleştirilmiş / soruya göre daraltılmış prompt token sayıları."""
+    mode = mode or PROMPT_MODE
+    return get_prompt_builder(mode).token_report(_legacy_prompt(mode), question)
 
 # Geriye uyumlu kalsın:
-def get_system_prompt():
-    return get_multi_table_prompt()
+def get_system_prompt(mode: str = None):
+    return get_multi_table_prompt(mode)
 
 if __name__ == "__main__":
     st.header("System prompt (multi-table)")
+    st.json(prompt_token_report("2024 yılında televizyonda en çok GRP alan markalar"))
+    st.code(entity_hint("2024 yılında migros ve getir 10'un televizyon GRP'si"))
     st.markdown(get_multi_table_prompt())
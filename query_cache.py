@@ -0,0 +1,238 @@
+"""Süreç genelinde paylaşılan sorgu sonucu cache'i.
+
+Aynı (kanonik) SQL için Snowflake'e tekrar gitmeden sonucu döndürür.
+- Anahtar: kanonikleştirilmiş SQL (boşluk, string dışı büyük/küçük harf, sondaki ';')
+- Bellek boyutuna göre LRU tahliye
+- Tablo bazlı TTL (geçmiş yıl tabloları neredeyse hiç değişmez)
+- Single-flight: aynı sorgu aynı anda birden fazla oturumdan gelirse tek çalıştırma yapılır,
+  diğerleri onun sonucunu bekler.
+"""
+import re
+import threading
+import time
+from concurrent.futures import CancelledError
+from collections import OrderedDict
+
+# Tablo adı (şema öneki olmadan) -> saniye cinsinden TTL
+DEFAULT_TTL = 15 * 60
+TABLE_TTLS = {
+    "GETIR2023REKABET": 7 * 24 * 3600,
+    "GETIR2024REKABET": 24 * 3600,
+    "GETIR2025REKABET": 30 * 60,
+    "GETIRKAMPANYALARI": 30 * 60,
+}
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_STRING_OR_IDENT = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+([A-Z0-9_$\.\"]+)", re.IGNORECASE)
+
+
+def canonical_sql(sql: str) -> str:
+    """SQL'i cache anahtarı için kanonik hale getirir.
+
+    String literal'leri ve tırnaklı identifier'ları olduğu gibi bırakır; geri kalanında
+    boşlukları tek boşluğa indirir, büyük harfe çevirir ve sondaki ';' karakterlerini atar.
+    """
+    parts = _STRING_OR_IDENT.split(str(sql or ""))
+    out = []
+    for i, part in enumerate(parts):
+        if i % 2 == 1:  # literal / tırnaklı identifier
+            out.append(part)
+        else:
+            part = re.sub(r"\s+", " ", part)
+            out.append(re.sub(r"\s*([(),])\s*", r"\1", part).upper())
+    canon = "".join(out).strip()
+    while canon.endswith(";"):
+        canon = canon[:-1].rstrip()
+    return canon
+
+
+def referenced_tables(sql: str) -> set[str]:
+    """FROM/JOIN sonrası geçen tablo adlarını (şema öneki olmadan, büyük harf) döndürür."""
+    names = set()
+    for ref in _TABLE_REF.findall(canonical_sql(sql)):
+        name = ref.replace('"', "").split(".")[-1].upper()
+        if name and not name.startswith("("):
+            names.add(name)
+    return names
+
+
+def ttl_for(sql: str, table_ttls: dict | None = None, default_ttl: float = DEFAULT_TTL) -> float:
+    """Sorgunun dokunduğu tablolar arasından en kısa TTL'i seçer."""
+    table_ttls = TABLE_TTLS if table_ttls is None else table_ttls
+    ttls = [table_ttls[t] for t in referenced_tables(sql) if t in table_ttls]
+    return min(ttls) if ttls else default_ttl
+
+
+def frame_nbytes(value) -> int:
+    """DataFrame (veya benzeri) için yaklaşık bellek boyutu; tuple/list ise elemanların toplamı."""
+    if isinstance(value, (tuple, list)):
+        return sum(frame_nbytes(v) for v in value)
+    try:
+        return int(value.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        try:
+            return int(value.nbytes)
+        except Exception:
+            return 0
+
+
+class _InFlight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class QueryCache:
+    """Thread-safe, boyut sınırlı, TTL'li ve single-flight sorgu sonucu cache'i."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, table_ttls: dict | None = None,
+                 default_ttl: float = DEFAULT_TTL, sizeof=frame_nbytes):
+        self.max_bytes = max_bytes
+        self.table_ttls = TABLE_TTLS if table_ttls is None else dict(table_ttls)
+        self.default_ttl = default_ttl
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple] = OrderedDict()  # key -> (value, nbytes, expires_at)
+        self._inflight: dict[str, _InFlight] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+
+    # ---------- okuma / yazma ----------
+    def get(self, sql: str):
+        """Geçerli bir kayıt varsa döndürür, yoksa None."""
+        key = canonical_sql(sql)
+        with self._lock:
+            return self._lookup(key)
+
+    def contains(self, sql: str) -> bool:
+        """Geçerli kayıt var mı (hit/miss sayaçlarına ve LRU sırasına dokunmadan)."""
+        key = canonical_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.monotonic()
+
+    def put(self, sql: str, value, ttl: float | None = None):
+        key = canonical_sql(sql)
+        if ttl is None:
+            ttl = ttl_for(key, self.table_ttls, self.default_ttl)
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_run(self, sql: str, run, ttl: float | None = None):
+        """Cache'te varsa döndürür; yoksa `run()` ile çalıştırır.
+
+        Aynı anahtar için uçuşta bir çalıştırma varsa onu bekler (single-flight).
+        `run` içindeki hata bekleyen tüm çağıranlara iletilir ve cache'e yazılmaz;
+        iptal (`CancelledError`) iletilmez, bekleyenlerden biri sorguyu yeniden çalıştırır.
+
+        Sayaçlar: sorguyu çalıştıran lider miss, cache'ten veya uçuştaki sorgudan sonuç alan
+        çağıran hit sayılır (ikincisi ayrıca `waits`'e eklenir).
+        """
+        key = canonical_sql(sql)
+        while True:
+            with self._lock:
+                value = self._lookup(key, count=False)
+                if value is not None:
+                    self.hits += 1
+                    return value
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    self.misses += 1
+                    flight = self._inflight[key] = _InFlight()
+                else:
+                    self.waits += 1
+            if leader:
+                break
+            flight.event.wait()
+            if isinstance(flight.error, CancelledError):
+                continue  # lider iptal edildi (ör. kullanıcı yeni soru sordu); bekleyen kendisi çalıştırır
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self.hits += 1  # uçuştaki sorgunun sonucu: warehouse'a gidilmedi
+            return flight.value
+
+        try:
+            value = run()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+            if ttl is None:
+                ttl = ttl_for(key, self.table_ttls, self.default_ttl)
+            with self._lock:
+                self._store(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self, table: str | None = None):
+        """Tüm cache'i veya belirli bir tabloya dokunan kayıtları siler."""
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            table = table.split(".")[-1].upper()
+            for key in [k for k in self._entries if table in referenced_tables(k)]:
+                self._drop(key)
+
+    # ---------- metrikler ----------
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # ---------- iç yardımcılar (kilit altında çağrılır) ----------
+    def _lookup(self, key: str, count: bool = True):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += count
+            return None
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.misses += count
+            return None
+        self._entries.move_to_end(key)
+        self.hits += count
+        return value
+
+    def _store(self, key: str, value, ttl: float):
+        if value is None or ttl <= 0:
+            return
+        nbytes = self._sizeof(value)
+        if nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (value, nbytes, time.monotonic() + ttl)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
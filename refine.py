@@ -0,0 +1,282 @@
+"""Takip sorularını önceki sonuç üzerinde yerelde cevaplama (LLM/warehouse'a gitmeden).
+
+"Şimdi yüzde olarak", "sadece televizyon", "çeyrek bazında", "SOV'u nedir" gibi takip
+soruları çoğunlukla bir önceki cevabı yeniden dilimler. Bu modül soruda bu dönüşümleri
+tanır ve son mesajdaki sonuç frame'ine vektörel pandas ile uygular:
+
+- filtre: sonuçta zaten bulunan bir değere ("sadece televizyon" -> MECRA == TELEVIZYON),
+- çeyrek: ay (AYISMI) veya tarih eksenini çeyreklere toplar (yalnızca toplanabilir metrikler),
+- yüzde payı: her zaman diliminde boyut değerleri arasında (boyut yoksa yıl içinde) pay,
+- SOV (kural 27): markanın/kategorinin aylık GRP'si / aynı markanın o yılki toplam GRP'si
+  (zaman ekseni yoksa: marka GRP'si / yıl toplam GRP'si).
+
+Yüzde payı ve SOV filtreden önce tüm sonuç üzerinde hesaplanır ("sadece Migros'un payı"
+%100 çıkmaz). Gerekli kolonlar sonuçta yoksa, soru sonuçta olmayan bir yıl/değer ya da
+sonuçta bulunmayan bir metrik (GRP, NETTUTAR, ADET, ...) veya boyut (mecra, kanal, ...)
+istiyorsa None döner ve soru her zamanki gibi LLM'e gider.
+"""
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from frame_engine import FrameProfile, prepare_frame
+from llm_cache import normalize_question
+from time_axis import month_axis
+
+PERCENT_WORDS = ("yuzde", "yuzdelik", "yuzdesel", "pay", "paylari", "payi", "oransal", "percent", "percentage")
+SOV_WORDS = ("sov", "share of voice")
+QUARTER_WORDS = ("ceyrek", "ceyrekler", "ceyreklik", "quarter", "quarterly")
+FILTER_WORDS = ("sadece", "yalnizca", "yalniz", "only", "filtrele")
+
+BRAND_NAMES = ("MARKA", "ANAMARKA", "KATEGORI", "KATEGORIDETAY")
+TIME_NAMES = ("AYISMI", "TARIH", "TARİH", "HAFTA", "GUN", "CEYREK")
+# Toplanabilir metrik adları; ortalama/oran/erişim gibi metrikler çeyreklere toplanamaz
+ADDITIVE_HINTS = ("GRP", "TUTAR", "HARCAMA", "BUTCE", "ADET", "SURE", "TOPLAM", "SOS", "SAYI", "COUNT", "SUM")
+NON_ADDITIVE_HINTS = ("ORT", "AVG", "ORAN", "YUZDE", "PAY", "SOV", "REACH", "FREKANS", "PCT")
+QUARTER_ORDER = ["1. ÇEYREK", "2. ÇEYREK", "3. ÇEYREK", "4. ÇEYREK"]
+QUARTER_TYPE = pd.CategoricalDtype(QUARTER_ORDER, ordered=True)
+MAX_FILTER_VALUES = 500
+
+# Soruda adı geçen metrik -> sonuç kolon adında aranan parçalar; sonuçta yoksa yeni sorgu gerekir
+METRIC_WORDS = {
+    ("grp", "sov"): ("GRP",),
+    ("nettutar", "harcama", "butce", "yatirim", "tutar", "sos", "maliyet"):
+        ("NETTUTAR", "TUTAR", "HARCAMA", "BUTCE", "YATIRIM", "SOS"),
+    ("brfiyat", "brut"): ("BRFIYAT", "BRUT"),
+    ("adet", "spot sayisi"): ("ADET", "SAYI", "COUNT"),
+    ("sure", "saniye"): ("SURE",),
+    ("frekans",): ("FREKANS",),
+    ("reach", "erisim"): ("REACH",),
+}
+# Boyut kolonu -> (kolonun kendisini anan kelimeler, değerlerini anan kelimeler)
+DIMENSION_WORDS = {
+    "MECRA": (("mecra",), ("televizyon", "tv", "radyo", "basin", "outdoor", "dijital", "sinema", "internet")),
+    "ANAYAYIN": (("kanal", "anayayin"), ()),
+    "PROGRAM": (("program",), ()),
+    "DAYPART": (("daypart",), ()),
+    "SPOTTIPI": (("spot tipi", "spottipi"), ("kusak", "alt bant")),
+    "IMAJPROMO": (("imajpromo",), ("imaj", "promo")),
+    "ILI": (("sehir", "ilde", "iller"), ("istanbul", "ankara", "izmir", "bursa", "antalya")),
+    "BOLGE": (("bolge",), ()),
+    "SEKTOR": (("sektor",), ()),
+    "KAMPANYA": (("kampanya",), ()),
+}
+
+_YEAR_RE = re.compile(r"\b(20\d\d)\b")
+
+
+@dataclass
+class Refinement:
+    df: pd.DataFrame
+    profile: FrameProfile
+    steps: list = field(default_factory=list)
+
+    @property
+    def description(self) -> str:
+        return ("Bu cevap bir önceki sonuçtan yerelde hesaplandı (yeni sorgu çalıştırılmadı): "
+                + ", ".join(self.steps) + ".")
+
+
+def _has(q: str, words) -> bool:
+    padded = f" {q} "
+    return any(f" {w} " in padded for w in words)
+
+
+def _mentions(q: str, words) -> bool:
+    """`_has` + Türkçe ek payı: 5+ harfli kelimeler ekli halde de sayılır ("harcamasi", "televizyonda")."""
+    padded = f" {q} "
+    return any(f" {w} " in padded or (len(w) >= 5 and f" {w}" in padded) for w in words)
+
+
+def has_refinement_intent(question: str) -> bool:
+    """Ucuz ön kontrol: soruda tanınan bir dönüşüm kelimesi var mı (tam frame yüklemeden önce)."""
+    q = normalize_question(question)
+    return any(_has(q, words) for words in (PERCENT_WORDS, SOV_WORDS, QUARTER_WORDS, FILTER_WORDS))
+
+
+def _dimension_cols(df: pd.DataFrame, profile: FrameProfile) -> list:
+    skip = set(profile.numeric_cols) | {profile.date_col, profile.month_col}
+    return [c for c in df.columns if c not in skip and str(c).upper() not in TIME_NAMES
+            and (pd.api.types.is_string_dtype(df[c]) or isinstance(df[c].dtype, pd.CategoricalDtype))]
+
+
+def _time_cols(df: pd.DataFrame) -> list:
+    return [c for c in df.columns if str(c).upper() in TIME_NAMES]
+
+
+def _missing_metric(q: str, df: pd.DataFrame, profile: FrameProfile) -> bool:
+    """Soru sonuçta karşılığı olmayan bir metrik istiyor mu (NETTUTAR sonucunda "GRP'si")."""
+    names = [str(c).upper() for c in profile.numeric_cols if c in df.columns]
+    return any(_mentions(q, words) and not any(h in n for n in names for h in hints)
+               for words, hints in METRIC_WORDS.items())
+
+
+def _missing_dimension(q: str, df: pd.DataFrame, filtered: set) -> bool:
+    """Soru sonuçta olmayan bir boyutu ("mecra bazında") veya filtrelenemeyen bir değerini istiyor mu."""
+    for col, (names, values) in DIMENSION_WORDS.items():
+        cols = {c for c in df.columns if str(c).upper() == col}
+        if _mentions(q, names) and not cols:
+            return True
+        if _mentions(q, values) and not cols & filtered:
+            return True  # "televizyon" dendi ama sonuçta MECRA yok ya da TELEVIZYON değeri yok
+    return False
+
+
+def _is_additive(col) -> bool:
+    name = str(col).upper()
+    return any(h in name for h in ADDITIVE_HINTS) and not any(h in name for h in NON_ADDITIVE_HINTS)
+
+
+# ---------- dönüşümler ----------
+def _filter(df: pd.DataFrame, q: str, dims: list):
+    """Soruda geçen, sonuçta bulunan değerlere göre filtreler; eşleşme yoksa None.
+
+    Dönüş: (filtrelenmiş frame, adımlar, filtrelenen kolonlar).
+    """
+    padded = f" {q} "
+    masks, steps, cols = [], [], set()
+    for c in dims:
+        values = df[c].dropna().unique()
+        if len(values) > MAX_FILTER_VALUES:
+            continue
+        hits = [v for v in values if len(normalize_question(v)) >= 3 and f" {normalize_question(v)} " in padded]
+        if hits:
+            masks.append(df[c].isin(hits))
+            steps.append(f"{c} = {', '.join(map(str, hits))}")
+            cols.add(c)
+    if not masks:
+        return None
+    mask = masks[0]
+    for m in masks[1:]:
+        mask &= m
+    return df.loc[mask], steps, cols
+
+
+def _quarters(df: pd.DataFrame, profile: FrameProfile, metrics: list):
+    """Ay/tarih eksenini çeyreklere toplar; toplanamayan metrik varsa None."""
+    if not metrics or not all(_is_additive(c) for c in metrics):
+        return None
+    if profile.month_col is not None and profile.month_col in df.columns:
+        months = month_axis(df[profile.month_col])
+        idx = months.cat.codes.to_numpy()
+        drop = profile.month_col
+    elif profile.date_col is not None and profile.date_col in df.columns:
+        idx = (pd.to_datetime(df[profile.date_col]).dt.month - 1).to_numpy()
+        drop = profile.date_col
+    else:
+        return None
+    quarter = pd.Categorical.from_codes(
+        [i // 3 if i >= 0 else -1 for i in idx], dtype=QUARTER_TYPE)
+    keys = [c for c in df.columns if c not in metrics and c != drop and str(c).upper() not in TIME_NAMES]
+    out = df.drop(columns=[c for c in _time_cols(df)]).assign(CEYREK=quarter)
+    out = out.groupby(keys + ["CEYREK"], observed=True, sort=True, dropna=False)[metrics].sum().reset_index()
+    return out
+
+
+def _percent(df: pd.DataFrame, metrics: list, dims: list, year_col: str | None) -> pd.DataFrame:
+    """Her zaman diliminde boyut değerleri arasında pay; boyut yoksa yıl (veya tümü) içinde pay."""
+    times = _time_cols(df)
+    if dims and times:
+        keys = ([year_col] if year_col else []) + times
+    else:
+        keys = [year_col] if year_col else []
+    out = df.copy()
+    for c in metrics:
+        total = out.groupby(keys, observed=True, dropna=False)[c].transform("sum") if keys else out[c].sum()
+        out[f"{c}_YUZDE"] = (out[c] / total * 100).round(2)
+    return out.drop(columns=metrics)
+
+
+def _sov(df: pd.DataFrame, grp_col: str, dims: list, year_col: str | None) -> pd.DataFrame:
+    """Kural 27: markanın dönem GRP'si / aynı markanın o yılki toplam GRP'si.
+
+    Zaman ekseni varsa her marka (ve varsa MECRA gibi diğer boyutlar) serisi yıl içinde
+    %100'e tamamlanır; zaman ekseni yoksa markalar arasında yıl toplamına göre pay alınır.
+    """
+    times = _time_cols(df)
+    year = [year_col] if year_col else []
+    if times and dims:
+        keys = dims + year
+    else:
+        keys = year
+    total = df.groupby(keys, observed=True, dropna=False)[grp_col].transform("sum") if keys else df[grp_col].sum()
+    return df.assign(SOV=(df[grp_col] / total * 100).round(2))
+
+
+# ---------- giriş noktası ----------
+def refine(question: str, df: pd.DataFrame, profile: FrameProfile | None = None) -> Refinement | None:
+    """Soru önceki sonucun yerel bir dönüşümüyse sonucu hesaplar; değilse None."""
+    if df is None or df.empty:
+        return None
+    q = normalize_question(question)
+    want_sov = _has(q, SOV_WORDS)
+    want_pct = _has(q, PERCENT_WORDS) and not want_sov
+    want_quarter = _has(q, QUARTER_WORDS)
+    want_filter = _has(q, FILTER_WORDS)
+    if not (want_sov or want_pct or want_quarter or want_filter):
+        return None
+    if profile is None:
+        df, profile = prepare_frame(df)
+    year_col = profile.year_col if profile.year_col in df.columns else None
+
+    # Sonuçta olmayan bir yıl isteniyorsa yeni sorgu gerekir
+    years = {int(y) for y in _YEAR_RE.findall(q)}
+    if years:
+        have = set(pd.to_numeric(df[year_col], errors="coerce").dropna().astype(int)) if year_col else set()
+        if not years <= have:
+            return None
+
+    dims = _dimension_cols(df, profile)
+    # Yıl benzeri görünen ama adı toplanabilir metrik olan kolonlar (ör. 4 haneli tutarlar) da metriktir
+    metrics = [c for c in profile.numeric_cols if c in df.columns and c != year_col
+               and (c in profile.metric_cols or _is_additive(c))]
+    if _missing_metric(q, df, profile):
+        return None  # soru sonuçta olmayan bir metrik istiyor
+
+    # Filtre yalnızca hangi satırların gösterileceğini seçer; önce kontrol edilir, pay/SOV'dan sonra uygulanır
+    filtered = _filter(df, q, dims)
+    if _missing_dimension(q, df, filtered[2] if filtered is not None else set()):
+        return None
+    if filtered is None and want_filter:
+        return None  # "sadece X" ama X sonuçta yok
+    steps = []
+    out = df
+
+    if want_quarter:
+        rolled = _quarters(out, profile, metrics)
+        if rolled is None:
+            return None
+        out = rolled
+        steps.append("çeyrek bazında toplam")
+
+    if want_sov:
+        grp = next((c for c in metrics if "GRP" in str(c).upper()), None)
+        if grp is None:
+            return None
+        brand = [c for c in dims if c in out.columns]
+        if not any(str(c).upper() in BRAND_NAMES for c in brand):
+            return None  # SOV marka/kategori bazında tanımlı
+        out = _sov(out, grp, brand, year_col)
+        steps.append(f"SOV ({grp}, kural 27)")
+    elif want_pct:
+        if not metrics:
+            return None
+        out = _percent(out, metrics, [d for d in dims if d in out.columns], year_col)
+        steps.append("yüzde payları")
+
+    if filtered is not None:
+        # Pay/SOV tüm sonuç üzerinden hesaplandı; filtre artık yalnızca gösterilen satırları seçer
+        refiltered = _filter(out, q, [d for d in dims if d in out.columns])
+        if refiltered is None:
+            return None
+        out, filter_steps, _ = refiltered
+        steps += filter_steps
+        if out.empty:
+            return None
+
+    if not steps:
+        return None
+    out = out.reset_index(drop=True)
+    new_df, new_profile = prepare_frame(out)
+    return Refinement(df=new_df, profile=new_profile, steps=steps)
@@ -0,0 +1,188 @@
+"""Oturum sonuçları için sınırlı bellekli sonuç deposu.
+
+Her turun tam sonuç frame'i `st.session_state` içinde tutulursa süreç belleği
+kullanıcı ve tur sayısıyla birlikte sınırsız büyür. Bu depo:
+
+- tam frame'i sıkıştırılmış Arrow IPC (Feather v2) dosyası olarak yerel diske yazar,
+- süreç genelinde bir bellek bütçesi altında son kullanılan frame'leri (LRU) tutar,
+- bütçe aşılınca en eski frame'leri bellekten düşürür (dosya diskte kalır),
+- düşürülen frame istendiğinde dosyayı memory-map ederek tembel yükler.
+
+Session state'te yalnızca küçük bir önizleme ve `ResultRef` kalır.
+"""
+import atexit
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from query_cache import frame_nbytes
+
+DEFAULT_DIR = os.path.join(".cache", "results")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 4 * 1024 * 1024 * 1024
+DEFAULT_PREVIEW_ROWS = 200
+DEFAULT_COMPRESSION = "zstd"  # "lz4" / "uncompressed" (sıkıştırmasız dosya sıfır kopya okunur)
+
+
+@dataclass(frozen=True)
+class ResultRef:
+    """Depodaki bir sonucun session state'te tutulan hafif tanıtıcısı."""
+    key: str
+    rows: int
+    cols: int
+    nbytes: int
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+
+class ResultStore:
+    """Süreç genelinde, bellek bütçeli ve diske taşan sonuç deposu."""
+
+    def __init__(self, directory: str = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES, compression: str = DEFAULT_COMPRESSION):
+        # Süreçler birbirinin dosyalarını silmesin diye PID alt dizini
+        self.directory = os.path.join(directory, str(os.getpid()))
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._files: OrderedDict[str, int] = OrderedDict()  # key -> dosya boyutu
+        self._bytes = 0
+        self._disk_bytes = 0
+        self.spills = 0
+        self.loads = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        atexit.register(self.clear)
+
+    # ---------- genel API ----------
+    def put(self, df: pd.DataFrame) -> ResultRef:
+        """Frame'i diske yazar ve bellekte tutar; tanıtıcısını döndürür."""
+        key = uuid.uuid4().hex
+        size = frame_nbytes(df)
+        self._spill(key, df)
+        with self._lock:
+            self._memory[key] = (df, size)
+            self._bytes += size
+            self._evict_memory(keep=key)
+        return ResultRef(key=key, rows=len(df), cols=df.shape[1], nbytes=size)
+
+    def get(self, ref: ResultRef | str) -> pd.DataFrame | None:
+        """Frame'i döndürür; bellekte yoksa diskten yükler. Silinmişse None."""
+        key = ref.key if isinstance(ref, ResultRef) else ref
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+                return hit[0]
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        df = self._load(key)
+        if df is None:
+            return None
+        size = frame_nbytes(df)
+        with self._lock:
+            if key not in self._memory:
+                self._memory[key] = (df, size)
+                self._bytes += size
+                self._evict_memory(keep=key)
+            self.loads += 1
+        return df
+
+    def discard(self, ref: ResultRef | str):
+        key = ref.key if isinstance(ref, ResultRef) else ref
+        with self._lock:
+            entry = self._memory.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+            size = self._files.pop(key, None)
+            if size is not None:
+                self._disk_bytes -= size
+        if size is not None:
+            _remove(self._path(key))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._files.clear()
+            self._bytes = self._disk_bytes = 0
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "files": len(self._files),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes,
+                "spills": self.spills,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    # ---------- iç yardımcılar ----------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".arrow")
+
+    def _spill(self, key: str, df: pd.DataFrame):
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            os.makedirs(self.directory, exist_ok=True)
+            feather.write_feather(table, self._path(key), compression=self.compression)
+            size = os.path.getsize(self._path(key))
+        except (OSError, ValueError, pa.ArrowException):
+            # Diske yazılamayan frame (ör. tekrarlı kolon adları) yalnızca bellekte yaşar
+            return
+        with self._lock:
+            self._files[key] = size
+            self._disk_bytes += size
+            self.spills += 1
+            removed = []
+            while self._disk_bytes > self.max_disk_bytes and len(self._files) > 1:
+                old, old_size = self._files.popitem(last=False)
+                self._disk_bytes -= old_size
+                removed.append(old)
+        for old in removed:
+            _remove(self._path(old))
+
+    def _load(self, key: str) -> pd.DataFrame | None:
+        try:
+            with pa.memory_map(self._path(key), "r") as source:
+                table = feather.read_table(source, memory_map=True)
+            return table.to_pandas()
+        except (OSError, pa.ArrowException):
+            return None
+
+    def _evict_memory(self, keep: str):
+        """Bütçe aşıldıysa en eski frame'leri bellekten düşürür (diskte olanlar geri yüklenebilir)."""
+        for key in list(self._memory):
+            if self._bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            _, size = self._memory.pop(key)
+            self._bytes -= size
+            self.evictions += 1
+
+
+def preview(df: pd.DataFrame, rows: int = DEFAULT_PREVIEW_ROWS) -> pd.DataFrame:
+    """Session state'te tutulacak önizleme (bağımsız kopya; tam frame'e referans tutmaz)."""
+    return df.head(rows).copy()
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,289 @@
+"""Önceden toplanmış rollup tabloları ve otomatik sorgu yönlendirici.
+
+Soruların çoğu GETIR2023/2024/2025REKABET tablolarında NETTUTAR, GRP veya ADET'in
+MARKA × YIL × AYISMI × MECRA kırılımında toplamıdır. Her seferinde ham spot satırları
+taranıp kural 17'deki REPLACE/TRY_CAST ifadesi satır satır hesaplanmasın diye:
+
+- `rollup_ddl()` bu toplamları sayılar zaten parse edilmiş halde materialize eden
+  CREATE TABLE ... AS SELECT ifadelerini üretir (kaynak tablo KAYNAK kolonunda tutulur).
+- `RollupRouter.route(sql)` üretilen sorgunun gruplama kolonları, filtreleri ve
+  toplamları bir rollup'tan karşılanabiliyorsa sorguyu o rollup'a yeniden yazar.
+
+Rollup'lar kurulduğu andaki anlık görüntüdür. Donmuş yıl tablolarına (FROZEN_SOURCES)
+giden sorgular her zaman yönlendirilir; hâlâ yüklenen tablolar (GETIR2025REKABET) yalnızca
+`is_fresh` kontrolü (ör. `FreshnessCheck`: rollup kaynaktaki son değişiklikten sonra mı
+kuruldu) geçerse yönlendirilir, yoksa sorgu ham tabloya gider.
+
+DDL: `python rollups.py --ddl GETIR_2023_REVISED.PUBLIC`; DuckDB üzerinde testler: tests/test_rollups.py.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+try:  # opsiyonel: SQL ayrıştırma
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # sqlglot yoksa yönlendirme devre dışı
+    sqlglot = None
+    exp = None
+
+SOURCE_TABLES = ("GETIR2023REKABET", "GETIR2024REKABET", "GETIR2025REKABET")
+# Yılı kapanmış, artık değişmeyen kaynaklar (bkz. local_mirror.FROZEN_TABLES)
+FROZEN_SOURCES = ("GETIR2023REKABET",)
+
+# Kural 17 (NETTUTAR) ve kural 9 (GRP) ile aynı satır bazlı parse ifadeleri
+NETTUTAR_EXPR = (
+    "COALESCE(CAST(TRY_CAST(CASE "
+    "WHEN NETTUTAR LIKE '%.%' AND NETTUTAR LIKE '%,%' THEN REPLACE(REPLACE(REPLACE(NETTUTAR, '₺', ''), '.', ''), ',', '.') "
+    "WHEN NETTUTAR LIKE '%,%' THEN REPLACE(REPLACE(NETTUTAR, '₺', ''), ',', '.') "
+    "WHEN NETTUTAR LIKE '%.%' THEN REPLACE(REPLACE(NETTUTAR, '₺', ''), '.', '') "
+    "ELSE REPLACE(REPLACE(NETTUTAR, '₺', ''), ' ', '') END AS FLOAT) AS INT), 0)"
+)
+MEASURES = {
+    "NETTUTAR": NETTUTAR_EXPR,
+    "GRP": "TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT)",
+    "ADET": "TRY_CAST(REPLACE(ADET, ',', '.') AS FLOAT)",
+}
+ROW_COUNT = "SATIR"
+SOURCE_COL = "KAYNAK"
+
+
+@dataclass(frozen=True)
+class Rollup:
+    name: str
+    dims: tuple
+
+
+# Küçükten büyüğe: yönlendirici ihtiyacı karşılayan ilk (en küçük) rollup'ı seçer
+DEFAULT_ROLLUPS = (
+    Rollup("REKABET_RU_MARKA_YIL", ("MARKA", "YIL")),
+    Rollup("REKABET_RU_MARKA_YIL_AY_MECRA", ("MARKA", "YIL", "AYISMI", "MECRA")),
+)
+
+
+# =========================
+# Rollup üretici
+# =========================
+def rollup_select(rollup: Rollup, schema_path: str, sources=SOURCE_TABLES) -> str:
+    """Rollup içeriğini üreten SELECT (Snowflake SQL)."""
+    dims = ", ".join(rollup.dims)
+    measures = ",\n    ".join(f"SUM({expr}) AS {name}" for name, expr in MEASURES.items())
+    branches = "\n    UNION ALL\n    ".join(
+        f"SELECT '{t}' AS {SOURCE_COL}, * FROM {schema_path}.{t}" for t in sources
+    )
+    return (
+        f"SELECT {SOURCE_COL}, {dims},\n    {measures},\n    COUNT(*) AS {ROW_COUNT}\n"
+        f"FROM (\n    {branches}\n) AS SRC\n"
+        f"GROUP BY {SOURCE_COL}, {dims}"
+    )
+
+
+def rollup_ddl(schema_path: str, rollups=DEFAULT_ROLLUPS, sources=SOURCE_TABLES) -> list:
+    """Tüm rollup'lar için CREATE OR REPLACE TABLE ifadeleri (Snowflake SQL)."""
+    return [
+        f"CREATE OR REPLACE TABLE {schema_path}.{r.name} AS\n{rollup_select(r, schema_path, sources)}"
+        for r in rollups
+    ]
+
+
+def build_rollups(execute, schema_path: str, rollups=DEFAULT_ROLLUPS, dialect: str = "snowflake"):
+    """Rollup'ları `execute(sql)` ile oluşturur/yeniler. DuckDB için dialect="duckdb"."""
+    for ddl in rollup_ddl(schema_path, rollups):
+        if dialect != "snowflake":
+            if sqlglot is None:
+                raise RuntimeError("DuckDB için DDL çevirisi sqlglot gerektirir.")
+            ddl = sqlglot.transpile(ddl, read="snowflake", write=dialect)[0]
+        execute(ddl)
+
+
+# =========================
+# Sorgu yönlendirici
+# =========================
+def _arg(node, name: str):
+    # sqlglot sürümleri arasında bazı argümanlar "from" -> "from_" olarak yeniden adlandırıldı
+    return node.args.get(name) or node.args.get(name + "_")
+
+
+def _is_aggregate(node) -> bool:
+    """Seçim ifadesinin tüm kolonları bir toplam fonksiyonunun içinde mi."""
+    return node.find(exp.AggFunc) is not None and all(
+        c.find_ancestor(exp.AggFunc) is not None for c in node.find_all(exp.Column))
+
+
+def _measure_name(arg) -> str | None:
+    """SUM argümanı çıplak ölçü kolonu ya da birebir MEASURES ifadesiyse ölçü adı; değilse None."""
+    while isinstance(arg, exp.Paren):
+        arg = arg.this
+    if isinstance(arg, exp.Column) and not arg.table and arg.name.upper() in MEASURES:
+        return arg.name.upper()
+    sql = arg.sql(dialect="snowflake").upper()
+    return next((name for name, tree in _MEASURE_SQL.items() if tree == sql), None)
+
+
+def last_altered_sql(schema_path: str, tables) -> str:
+    """Tabloların son değişme zamanları (Snowflake INFORMATION_SCHEMA)."""
+    db, schema = schema_path.split(".", 1)
+    names = ", ".join(f"'{t.upper()}'" for t in tables)
+    return (f"SELECT TABLE_NAME, LAST_ALTERED FROM {db}.INFORMATION_SCHEMA.TABLES "
+            f"WHERE TABLE_SCHEMA = '{schema.upper()}' AND TABLE_NAME IN ({names})")
+
+
+class FreshnessCheck:
+    """`check(kaynak, rollup)`: rollup kaynak tablodaki son değişiklikten sonra kurulduysa True.
+
+    `query_fn(sql)` TABLE_NAME / LAST_ALTERED kolonlu bir DataFrame döndürür; zamanlar `ttl`
+    saniye saklanır (her soruda INFORMATION_SCHEMA sorgulanmaz). Sorgu hatası veya eksik
+    bilgi güncel değil sayılır.
+    """
+
+    def __init__(self, query_fn, schema_path: str, rollups=DEFAULT_ROLLUPS, sources=SOURCE_TABLES,
+                 ttl: float = 300.0):
+        self.query_fn = query_fn
+        self.sql = last_altered_sql(schema_path, [*sources, *(r.name for r in rollups)])
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._altered: dict = {}
+        self._loaded_at = None
+
+    def __call__(self, source: str, rollup: str) -> bool:
+        altered = self._load()
+        built, changed = altered.get(rollup.upper()), altered.get(source.upper())
+        return built is not None and changed is not None and built >= changed
+
+    def _load(self) -> dict:
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._altered
+            try:
+                df = self.query_fn(self.sql)
+                self._altered = {str(n).upper(): t for n, t in zip(df["TABLE_NAME"], df["LAST_ALTERED"])}
+            except Exception:
+                self._altered = {}
+            self._loaded_at = time.monotonic()
+            return self._altered
+
+
+class RollupRouter:
+    """Üretilen sorgu bir rollup'tan karşılanabiliyorsa onu rollup'a yeniden yazar.
+
+    `frozen` tablolara giden sorgular her zaman, diğer kaynaklara gidenler yalnızca
+    `is_fresh(kaynak, rollup_adı)` True dönerse yönlendirilir.
+    """
+
+    def __init__(self, rollups=DEFAULT_ROLLUPS, sources=SOURCE_TABLES, schema_path: str | None = None,
+                 frozen=FROZEN_SOURCES, is_fresh=None):
+        self.rollups = sorted(rollups, key=lambda r: len(r.dims))
+        self.sources = {t.upper() for t in sources}
+        self.frozen = {t.upper() for t in frozen}
+        self.schema_path = schema_path
+        self.is_fresh = is_fresh
+        self.routed = 0
+        self.skipped = 0
+        self.stale = 0
+
+    def route(self, sql: str) -> str | None:
+        """Yeniden yazılmış SQL'i döndürür; sorgu rollup'a uygun değilse None."""
+        if sqlglot is None:
+            return None
+        try:
+            tree = sqlglot.parse_one(str(sql).strip().rstrip(";"), read="snowflake")
+            routed = self._route_node(tree)
+        except Exception:
+            routed = None
+        if routed is None:
+            self.skipped += 1
+            return None
+        self.routed += 1
+        return routed.sql(dialect="snowflake")
+
+    def _route_node(self, node):
+        if isinstance(node, exp.Subquery):
+            inner = self._route_node(node.this)
+            if inner is None:
+                return None
+            out = node.copy()
+            out.set("this", inner)
+            return out
+        if isinstance(node, exp.Union):
+            left, right = self._route_node(node.left), self._route_node(node.right)
+            if left is None or right is None:
+                return None
+            out = node.copy()
+            out.set("this", left)
+            out.set("expression", right)
+            return out
+        if isinstance(node, exp.Select):
+            return self._route_select(node)
+        return None
+
+    def _route_select(self, select):
+        if _arg(select, "with") or select.args.get("joins") or select.args.get("distinct"):
+            return None
+        if select.args.get("laterals") or select.args.get("qualify"):
+            return None
+        from_ = _arg(select, "from")
+        if from_ is None or not isinstance(from_.this, exp.Table):
+            return None
+        table = from_.this
+        if table.name.upper() not in self.sources:
+            return None
+        if any(isinstance(n, exp.Select) for n in select.find_all(exp.Select) if n is not select):
+            return None  # alt sorgular desteklenmez
+
+        if select.is_star or any(isinstance(e, exp.Star) for e in select.expressions):
+            return None  # satır detayı istenmiş; rollup satırları daraltır
+        if select.args.get("group") is None and not all(_is_aggregate(e) for e in select.expressions):
+            return None  # toplama yok: satır detayı (ör. SELECT MARKA, YIL ... WHERE ...)
+
+        out = select.copy()
+        # Toplamları rollup ölçülerine çevir; yalnızca çıplak kolon veya birebir MEASURES ifadesi
+        for agg in list(out.find_all(exp.AggFunc)):
+            if isinstance(agg, exp.Sum):
+                name = _measure_name(agg.this)
+                if name is None:
+                    return None
+                agg.replace(exp.Sum(this=exp.column(name)))
+            elif isinstance(agg, exp.Count) and isinstance(agg.this, exp.Star) and not agg.args.get("distinct"):
+                agg.replace(exp.Sum(this=exp.column(ROW_COUNT)))
+            else:
+                return None  # AVG, MIN, MAX, COUNT(DISTINCT ...) rollup'tan doğru hesaplanamaz
+
+        aliases = {e.alias.upper() for e in out.expressions if e.alias}
+        needed = set()
+        for col in out.find_all(exp.Column):
+            name = col.name.upper()
+            if isinstance(col.parent, exp.Sum) and (name in MEASURES or name == ROW_COUNT):
+                continue
+            if name in aliases and col.find_ancestor(exp.Order, exp.Having) is not None:
+                continue
+            needed.add(name)
+
+        rollup = next((r for r in self.rollups if needed <= set(r.dims)), None)
+        if rollup is None:
+            return None
+        source = table.name.upper()
+        if source not in self.frozen and not (self.is_fresh is not None and self.is_fresh(source, rollup.name)):
+            self.stale += 1
+            return None  # kaynak rollup kurulduktan sonra değişmiş olabilir
+
+        prefix = self.schema_path or ".".join(p.name for p in table.parts[:-1])
+        target = exp.to_table(f"{prefix}.{rollup.name}" if prefix else rollup.name)
+        if table.alias:
+            target.set("alias", exp.TableAlias(this=exp.to_identifier(table.alias)))
+        _arg(out, "from").this.replace(target)
+        out.where(exp.column(SOURCE_COL).eq(exp.Literal.string(table.name.upper())), copy=False)
+        return out
+
+
+_MEASURE_SQL = ({name: sqlglot.parse_one(expr, read="snowflake").sql(dialect="snowflake").upper()
+                 for name, expr in MEASURES.items()} if sqlglot is not None else {})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rekabet rollup tabloları")
+    parser.add_argument("--ddl", metavar="SCHEMA_PATH", required=True,
+                        help="Snowflake DDL'ini yazdır (ör. GETIR_2023_REVISED.PUBLIC)")
+    args = parser.parse_args()
+    print(";\n\n".join(rollup_ddl(args.ddl)) + ";")
@@ -0,0 +1,194 @@
+"""Tek sorgulu, diske yazılan şema bağlamı yükleyici.
+
+Tüm hedef tabloların kolonları tek bir INFORMATION_SCHEMA sorgusuyla çekilir ve
+render edilmiş bağlam yerel diske yazılır. Sonraki açılışlarda diskteki kopya hemen
+döner; tabloların LAST_ALTERED parmak izi arka planda kontrol edilir ve değişmişse
+bağlam yenilenir. Böylece uygulama açılışı bloklayan bir warehouse çağrısı gerektirmez.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(".cache", "schema_context.json")
+
+
+def render_table_context(table_name: str, table_description: str, columns: list) -> str:
+    """Tek tablonun prompt bağlamı (`columns`: [(COLUMN_NAME, DATA_TYPE), ...])."""
+    columns_fmt = "\n".join(f"- **{name}**: {dtype}" for name, dtype in columns)
+    return f"""
+<table>
+Here is the table name <tableName> {table_name} </tableName>
+<tableDescription>{table_description}</tableDescription>
+Here are the columns of {table_name}:
+<columns>
+{columns_fmt}
+</columns>
+</table>
+"""
+
+
+def render_shared_table_context(table_names: list, table_description: str, columns: list) -> str:
+    """Kolon listesi birebir aynı tablolar için tek bağlam bloğu (kolonlar bir kez yazılır)."""
+    names = ", ".join(table_names)
+    columns_fmt = "\n".join(f"- **{name}**: {dtype}" for name, dtype in columns)
+    return f"""
+<table>
+Here are the table names <tableName> {names} </tableName>
+<tableDescription>{table_description} These tables have exactly the same columns; each table holds one year of data.</tableDescription>
+Here are the columns of each of these tables:
+<columns>
+{columns_fmt}
+</columns>
+</table>
+"""
+
+
+def _split(table: str) -> tuple[str, str, str]:
+    db, schema, name = table.split(".")
+    return db.upper(), schema.upper(), name.upper()
+
+
+def _group_by_schema(tables: list) -> dict:
+    groups = {}
+    for t in tables:
+        db, schema, name = _split(t)
+        groups.setdefault((db, schema), []).append(name)
+    return groups
+
+
+def _in_list(names: list) -> str:
+    return ", ".join(f"'{n}'" for n in names)
+
+
+def fingerprint_sql(db: str, schema: str, names: list) -> str:
+    return f"""
+        SELECT TABLE_NAME, LAST_ALTERED
+        FROM {db}.INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = '{schema}'
+          AND TABLE_NAME IN ({_in_list(names)})
+        ORDER BY TABLE_NAME
+    """
+
+
+def columns_sql(db: str, schema: str, names: list) -> str:
+    return f"""
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE
+        FROM {db}.INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{schema}'
+          AND TABLE_NAME IN ({_in_list(names)})
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """
+
+
+class SchemaContextLoader:
+    """Hedef tabloların şema bağlamını diskten servis eder, arka planda tazeler.
+
+    `query_fn(sql) -> DataFrame` warehouse'a cache'siz sorgu atan fonksiyondur.
+    """
+
+    def __init__(self, tables: list, table_description: str, query_fn,
+                 path: str = DEFAULT_PATH, refresh_interval: float = 600):
+        self.tables = list(tables)
+        self.table_description = table_description
+        self.query_fn = query_fn
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._state = None  # {"fingerprint", "tables": {tam_ad: [[kolon, tip], ...]}, "context"}
+        self._checked_at = 0.0
+
+    # ---------- genel API ----------
+    def context(self) -> str:
+        """Render edilmiş bağlamı döndürür; diskte kopya varsa bloklamaz."""
+        with self._lock:
+            if self._state is None:
+                self._state = self._load_disk()
+        if self._state is None:
+            # İlk kurulum: diskte kopya yok, mecburen senkron çek
+            self.refresh(force=True)
+        elif time.monotonic() - self._checked_at > self.refresh_interval:
+            self.refresh_async()
+        return self._state["context"]
+
+    def columns(self) -> dict:
+        """{tam tablo adı: [(kolon, tip), ...]}"""
+        self.context()
+        return {t: [tuple(c) for c in cols] for t, cols in self._state["tables"].items()}
+
+    def refresh_async(self):
+        if self._refreshing.locked():
+            return
+        threading.Thread(target=self._refresh_quietly, name="schema-refresh", daemon=True).start()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Parmak izini kontrol eder, değişmişse kolonları tek sorguda yeniden çeker.
+
+        Bağlam değiştiyse True döner.
+        """
+        with self._refreshing:
+            self._checked_at = time.monotonic()
+            fp = self._fingerprint()
+            current = self._state
+            if not force and current is not None and current.get("fingerprint") == fp:
+                return False
+            tables = self._fetch_columns()
+            context = "\n\n".join(
+                render_table_context(t, self.table_description, tables.get(t, [])) for t in self.tables
+            )
+            state = {"fingerprint": fp, "tables": tables, "context": context}
+            with self._lock:
+                self._state = state
+            self._save_disk(state)
+            return current is None or current.get("context") != context
+
+    # ---------- iç yardımcılar ----------
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception:
+            # Arka plan tazeleme başarısızsa diskteki bağlamla devam edilir
+            pass
+
+    def _fingerprint(self) -> str:
+        h = hashlib.sha256("|".join(self.tables + [self.table_description]).encode("utf-8"))
+        for (db, schema), names in _group_by_schema(self.tables).items():
+            df = self.query_fn(fingerprint_sql(db, schema, names))
+            for name, altered in zip(df["TABLE_NAME"], df["LAST_ALTERED"]):
+                h.update(f"{db}.{schema}.{name}={altered}".encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def _fetch_columns(self) -> dict:
+        tables = {t: [] for t in self.tables}
+        by_upper = {".".join(_split(t)): t for t in self.tables}
+        for (db, schema), names in _group_by_schema(self.tables).items():
+            df = self.query_fn(columns_sql(db, schema, names))
+            for name, col, dtype in zip(df["TABLE_NAME"], df["COLUMN_NAME"], df["DATA_TYPE"]):
+                full = by_upper.get(f"{db}.{schema}.{name}")
+                if full is not None:
+                    tables[full].append([col, dtype])
+        return tables
+
+    def _load_disk(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if sorted(state.get("tables", {})) != sorted(self.tables) or "context" not in state:
+            return None
+        return state
+
+    def _save_disk(self, state: dict):
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
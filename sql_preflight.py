@@ -0,0 +1,200 @@
+"""Üretilen SQL için yerel ön kontrol (warehouse'a gitmeden).
+
+Model kural 5'e rağmen bazen olmayan tablo/kolon adları üretir; her hata bir Snowflake
+round-trip'ine ve "SQL çalıştırma hatası"na mal olur. Bu modül SQL'i sqlglot ile
+(Snowflake diyalekti) yerelde ayrıştırır ve her tablo/kolon referansını diskte cache'li
+şemaya (`SchemaContextLoader.columns()`) karşı çözer:
+
+- birebir eşleşen adlar olduğu gibi kalır,
+- Türkçe aksan/nokta duyarsız (`tr_key`) tek eşleşmesi olan adlar otomatik düzeltilir
+  (ör. GETİR2024REKABET -> GETIR2024REKABET, BÜTÇE -> BUTCE),
+- çözülemeyenler için sorgu reddedilir ve en yakın adaylar önerilir.
+
+Ayrıştırılamayan SQL engellenmez (sqlglot her Snowflake sözdizimini tanımayabilir).
+"""
+import difflib
+import time
+from dataclasses import dataclass, field
+
+from time_axis import tr_key
+
+try:  # opsiyonel: SQL ayrıştırma
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # sqlglot yoksa ön kontrol devre dışı
+    sqlglot = None
+    exp = None
+
+
+@dataclass
+class PreflightResult:
+    sql: str                      # çalıştırılacak SQL (düzeltildiyse yeni hali)
+    ok: bool = True
+    checked: bool = True          # False: ayrıştırılamadı / şema yok, kontrol edilmedi
+    errors: list = field(default_factory=list)
+    fixes: list = field(default_factory=list)  # [(eski, yeni), ...]
+    elapsed_s: float = 0.0
+
+    @property
+    def corrected(self) -> bool:
+        return bool(self.fixes)
+
+
+class _Table:
+    def __init__(self, full: str, columns: list):
+        self.full = full.upper()
+        self.name = self.full.split(".")[-1]
+        self.columns = {c.upper(): c for c, _ in columns}
+        self.column_keys = {}
+        for c in self.columns:
+            self.column_keys.setdefault(tr_key(c), []).append(c)
+
+
+def _arg(node, name: str):
+    # sqlglot sürümleri arasında bazı argümanlar "from" -> "from_" olarak yeniden adlandırıldı
+    return node.args.get(name) or node.args.get(name + "_")
+
+
+class SqlValidator:
+    """Şemaya karşı tablo/kolon çözümleyici. `columns`: {tam tablo adı: [(kolon, tip), ...]}."""
+
+    def __init__(self, columns: dict, autocorrect: bool = True):
+        self.autocorrect = autocorrect
+        self.tables = [_Table(t, cols) for t, cols in columns.items()]
+        self.by_full = {t.full: t for t in self.tables}
+        self.by_name = {}
+        self.by_key = {}
+        for t in self.tables:
+            self.by_name.setdefault(t.name, []).append(t)
+            self.by_key.setdefault(tr_key(t.name), []).append(t)
+
+    def check(self, sql: str) -> PreflightResult:
+        t0 = time.perf_counter()
+        result = PreflightResult(sql=sql)
+        if sqlglot is None or not self.tables:
+            result.checked = False
+        else:
+            try:
+                tree = sqlglot.parse_one(str(sql).strip().rstrip(";"), read="snowflake")
+            except Exception:
+                tree = None
+                result.checked = False
+            if tree is not None:
+                self._check_tree(tree, result)
+                if result.ok and result.fixes:
+                    result.sql = tree.sql(dialect="snowflake", pretty=True)
+        result.elapsed_s = time.perf_counter() - t0
+        return result
+
+    # ---------- tablolar ----------
+    def _resolve_table(self, node, ctes: set, result: PreflightResult):
+        name = node.name.upper()
+        if name in ctes and not node.args.get("db"):
+            return None  # CTE referansı
+        parts = [p.name.upper() for p in node.parts]
+        full = ".".join(parts)
+        if full in self.by_full:
+            return self.by_full[full]
+        matches = self.by_name.get(name, [])
+        if matches:
+            if len(parts) == 1:
+                return matches[0]  # şemasız ad (veya aynı ad birden çok şemada): ilk eşleşme
+            # db.schema öneki kataloğun sonuna uymalı; uymuyorsa tablo Snowflake'te bulunamaz
+            suffix = [t for t in matches if t.full.endswith("." + full)]
+            if suffix:
+                return suffix[0]
+            if len(matches) == 1 and self.autocorrect:
+                return self._requalify(node, matches[0], full, result)
+        keyed = self.by_key.get(tr_key(name), [])
+        if len(keyed) == 1 and self.autocorrect:
+            table = keyed[0]
+            if len(parts) > 1 and not table.full.endswith("." + ".".join(parts[:-1] + [table.name])):
+                return self._requalify(node, table, full, result)
+            result.fixes.append((node.name, table.name))
+            node.set("this", exp.to_identifier(table.name))
+            return table
+        hint = difflib.get_close_matches(name, list(self.by_name), n=2)
+        result.ok = False
+        result.errors.append(f"Tablo bulunamadı: {full}" + (f" (bunu mu kastettiniz: {', '.join(hint)})" if hint else ""))
+        return None
+
+    @staticmethod
+    def _requalify(node, table: _Table, written: str, result: PreflightResult):
+        """Tablo referansını kataloğun gerçek yoluna (db.şema.tablo) yeniden yazar."""
+        path = table.full.split(".")
+        node.set("this", exp.to_identifier(path[-1]))
+        node.set("db", exp.to_identifier(path[-2]) if len(path) > 1 else None)
+        node.set("catalog", exp.to_identifier(path[-3]) if len(path) > 2 else None)
+        result.fixes.append((written, table.full))
+        return table
+
+    # ---------- kolonlar ----------
+    def _check_tree(self, tree, result: PreflightResult):
+        ctes = {c.alias_or_name.upper() for c in tree.find_all(exp.CTE)}
+        resolved = {}  # id(Table düğümü) -> _Table
+        for node in tree.find_all(exp.Table):
+            if isinstance(node.this, exp.Identifier) or node.name:
+                resolved[id(node)] = self._resolve_table(node, ctes, result)
+
+        for select in tree.find_all(exp.Select):
+            self._check_select(select, resolved, result)
+
+    def _check_select(self, select, resolved: dict, result: PreflightResult):
+        sources = {}     # alias/ad -> _Table
+        opaque = False   # alt sorgu/CTE/fonksiyon kaynağı: kolonları bilinmiyor
+        from_ = _arg(select, "from")
+        source_nodes = ([from_.this] if from_ is not None else []) + [j.this for j in select.args.get("joins") or []]
+        for src in source_nodes:
+            if isinstance(src, exp.Table) and resolved.get(id(src)) is not None:
+                table = resolved[id(src)]
+                sources[(src.alias or table.name).upper()] = table
+                sources.setdefault(table.name, table)
+            else:
+                opaque = True
+        if select.args.get("laterals"):
+            opaque = True
+        if not sources:
+            return
+
+        aliases = {e.alias.upper() for e in select.expressions if e.alias}
+        for col in list(select.find_all(exp.Column)):
+            if col.find_ancestor(exp.Select) is not select or isinstance(col.this, exp.Star):
+                continue
+            name = col.name.upper()
+            qualifier = col.table.upper() if col.table else None
+            if qualifier:
+                table = sources.get(qualifier)
+                if table is None:
+                    continue  # alt sorgu/CTE alias'ı
+                candidates = [table]
+            else:
+                if name in aliases:
+                    continue
+                candidates = list({id(t): t for t in sources.values()}.values())
+            if any(name in t.columns for t in candidates):
+                continue
+            if not qualifier and opaque:
+                continue  # kolon bilinmeyen kaynaktan gelebilir
+            fixed = self._fix_column(col, candidates)
+            if fixed is not None:
+                result.fixes.append((col.name, fixed))
+                col.set("this", exp.to_identifier(fixed))
+                continue
+            pool = sorted({c for t in candidates for c in t.columns})
+            hint = difflib.get_close_matches(name, pool, n=2)
+            result.ok = False
+            result.errors.append(
+                f"Kolon bulunamadı: {col.sql(dialect='snowflake')}"
+                + (f" (bunu mu kastettiniz: {', '.join(hint)})" if hint else "")
+            )
+
+    def _fix_column(self, col, candidates: list) -> str | None:
+        if not self.autocorrect:
+            return None
+        hits = {c for t in candidates for c in t.column_keys.get(tr_key(col.name), [])}
+        return next(iter(hits)) if len(hits) == 1 else None
+
+
+def preflight(sql: str, columns: dict, autocorrect: bool = True) -> PreflightResult:
+    """Tek seferlik kontrol kısayolu."""
+    return SqlValidator(columns, autocorrect=autocorrect).check(sql)
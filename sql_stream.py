@@ -0,0 +1,43 @@
+"""Model çıktısından ```sql bloklarını çıkarma.
+
+`SqlFenceDetector` token akışını parça parça alır ve kapanış ``` geldiği anda
+tamamlanan SQL bloğunu döndürür; böylece sorgu, model açıklamayı yazmaya devam
+ederken arka planda başlatılabilir.
+"""
+import re
+
+SQL_FENCE_RE = re.compile(r"```sql\s*(.+?)\s*```", re.DOTALL | re.IGNORECASE)
+_OPEN_FENCE_RE = re.compile(r"```sql\s*", re.IGNORECASE)
+
+
+def extract_sql_blocks(text: str) -> list[str]:
+    """Tam metindeki tüm ```sql bloklarını sırasıyla döndürür."""
+    return [m.group(1).strip() for m in SQL_FENCE_RE.finditer(text or "")]
+
+
+class SqlFenceDetector:
+    """Akan metin üzerinde artımlı ```sql ... ``` dedektörü."""
+
+    def __init__(self):
+        self.text = ""
+        self.blocks: list[str] = []
+        self._pos = 0  # henüz tamamlanmamış ilk açılışın aranacağı konum
+
+    def feed(self, chunk: str) -> list[str]:
+        """Yeni parçayı ekler; bu parçayla kapanan SQL bloklarını döndürür."""
+        if chunk:
+            self.text += chunk
+        new = []
+        while True:
+            m = _OPEN_FENCE_RE.search(self.text, self._pos)
+            if m is None:
+                break
+            close = self.text.find("```", m.end())
+            if close < 0:
+                break
+            sql = self.text[m.end():close].strip()
+            self._pos = close + 3
+            if sql:
+                new.append(sql)
+        self.blocks.extend(new)
+        return new
@@ -1,10 +1,29 @@
 # app.py
-from openai import OpenAI
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import altair as alt
 import streamlit as st
-from prompts import get_system_prompt  # prompts.py içinde tanımlı olmalı
+from prompts import (ENTITY_INDEX, PROMPT_MODE, SCHEMA_PATH, TARGET_TABLES, _query_uncached, entity_hint, get_entity_index,
+                     get_question_prompt, get_schema_loader, get_system_prompt, prompt_token_report)  # prompts.py içinde tanımlı olmalı
+from query_cache import QueryCache
+from llm_cache import QuestionCache, prompt_fingerprint
+from sql_stream import SqlFenceDetector
+from arrow_fetch import BatchFetch, snowflake_batches
+from frame_engine import FrameProfile, prepare_frame
+from history import build_api_messages
+from time_axis import apply_time_axes, normalize_months, sort_by_time
+from rollups import FreshnessCheck, RollupRouter
+from local_mirror import LocalMirror, with_fallback
+from result_store import ResultStore, preview
+from metrics import LatencyRegistry, TurnTimer
+from sql_preflight import PreflightResult, SqlValidator
+from charts import build_date_chart, build_monthly_chart, needs_pushdown, plan_chart_query, show_chart
+from history import summarize_result
+from refine import has_refinement_intent, refine
+from turn_pipeline import Block, PendingQuery, TurnPipeline
+from prefetch import Prefetcher, variant_queries, year_tables
+from warmup import get_llm_client, get_session_pool, pooled_batches, start_warmup, touch_llm_keepalive
 
 # =========================
 # Altair/Vega: Türkçe sayı & tarih yereli
@@ -52,216 +71,299 @@ alt.renderers.set_embed_options(
 #     login_screen()
 #     st.stop()
 
+# Rerun başına render süresi ölçümü
+_RENDER_START = time.perf_counter()
+
 # =========================
 # Başlık
 # =========================
 st.title("Getir - Talk To Your Competition Data")
 
 # =========================
-# OpenAI Client
+# Isınma + OpenAI Client
 # =========================
-client = OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", None))
+# Süreçte bir kez: şema bağlamı, oturum havuzu ve LLM bağlantısı arka planda hazırlanır
+# (`python warmup.py -- talkdata.py` ile başlatıldıysa ilk kullanıcıdan önce zaten başlamıştır)
+_WARMUP = start_warmup()
+client = get_llm_client()
 
 # =========================
-# Yardımcılar
+# Sorgu sonucu cache'i (tüm oturumlar ortak)
 # =========================
-MONTH_ORDER = ["OCAK","ŞUBAT","MART","NİSAN","MAYIS","HAZİRAN",
-               "TEMMUZ","AĞUSTOS","EYLÜL","EKİM","KASIM","ARALIK"]
-MONTH_ORDER_IDX = {m:i for i,m in enumerate(MONTH_ORDER, start=1)}
-
-def smart_to_numeric(s: pd.Series) -> pd.Series:
-    """TR sayılarını (1.234,56) -> 1234.56 çevirir; değilse dokunmaz."""
-    if pd.api.types.is_numeric_dtype(s):
-        return s
-    s = s.astype(str).str.strip()
-    mask_both = s.str.contains(",", na=False) & s.str.contains(r"\.", regex=True, na=False)
-    s.loc[mask_both] = s.loc[mask_both].str.replace(".", "", regex=False)
-    mask_only_comma = s.str.contains(",", na=False) & ~s.str.contains(r"\.", regex=True, na=False)
-    s.loc[mask_only_comma] = s.loc[mask_only_comma].str.replace(",", ".", regex=False)
-    return pd.to_numeric(s, errors="ignore")
-
-def to_datetime_tr(s: pd.Series) -> pd.Series:
-    """'01.11.2024', '1/11/2024', datetime gibi değerleri güvenle datetime'a çevirir."""
-    if pd.api.types.is_datetime64_any_dtype(s):
-        return s
-    s = s.astype(str).str.strip()
-    dt = pd.to_datetime(s, dayfirst=True, errors="coerce")
-    return dt
-
-# ---------- Ay normalizasyonu: aksan/nokta duyarsız ----------
-def tr_key(x: str) -> str:
-    """Türkçe ay metnini aksan/nokta duyarsız anahtara çevirir."""
-    x = str(x or "").strip().upper()
-    # Türkçe özel harfleri ASCII benzerine indir
-    x = (x.replace("İ", "I")
-           .replace("I", "I")
-           .replace("ı", "I")
-           .replace("i", "I")
-           .replace("Ö", "O").replace("Ü", "U")
-           .replace("Ş", "S").replace("Ğ", "G")
-           .replace("Ç", "C"))
-    x = re.sub(r"\s+", "", x)
-    return x
-
-CANON_BY_KEY = {tr_key(m): m for m in MONTH_ORDER}
-
-def normalize_months(df: pd.DataFrame, month_col: str = "AYISMI") -> pd.DataFrame:
-    """AYISMI'nı kanonik ay adına çevirir, geçersizleri atar, sıralama için _AY_ORDER ekler."""
-    if month_col not in df.columns:
-        return df
-    df = df[df[month_col].notna()].copy()
-
-    keys = df[month_col].apply(tr_key)
-    canon = keys.map(CANON_BY_KEY)
-
-    df = df[canon.notna()].copy()
-    if df.empty:
-        return df
-
-    df[month_col] = canon.values
-    df["_AY_ORDER"] = df[month_col].map(MONTH_ORDER_IDX)
-    return df
-# -------------------------------------------------------------
-
-def pick_year_col(df: pd.DataFrame) -> str | None:
-    """YIL/YEAR veya 4 haneli yıl benzeri bir kolonu seç."""
-    if "YIL" in df.columns: return "YIL"
-    if "YEAR" in df.columns: return "YEAR"
-    for c in df.columns:
-        if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_string_dtype(df[c]):
-            s = df[c].astype(str)
-            if (s.str.fullmatch(r"\d{4}", na=False)).sum() >= max(1, len(df) * 0.3):
-                return c
-    return None
+@st.cache_resource
+def get_query_cache() -> QueryCache:
+    return QueryCache(max_bytes=int(st.secrets.get("QUERY_CACHE_MAX_MB", 512)) * 1024 * 1024)
+
+@st.cache_resource
+def get_query_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=int(st.secrets.get("QUERY_WORKERS", 8)), thread_name_prefix="sql")
+
+@st.cache_resource
+def get_rollup_router() -> RollupRouter | None:
+    """Rollup tabloları kurulduysa (ROLLUPS_ENABLED) uygun sorguları onlara yönlendirir.
+
+    Donmuş yıllar her zaman; yüklenmeye devam eden tablolar yalnızca rollup kaynaktaki son
+    değişiklikten sonra kurulduysa (INFORMATION_SCHEMA LAST_ALTERED) rollup'a gider.
+    """
+    if not st.secrets.get("ROLLUPS_ENABLED", False):
+        return None
+    fresh = FreshnessCheck(_query_uncached, SCHEMA_PATH, ttl=float(st.secrets.get("ROLLUP_FRESHNESS_SECONDS", 300)))
+    return RollupRouter(schema_path=SCHEMA_PATH, is_fresh=fresh)
+
+@st.cache_resource
+def get_local_mirror() -> LocalMirror | None:
+    """Donmuş yılların yerel kopyası eşitlendiyse (MIRROR_ENABLED) onlara giden sorgular DuckDB'de çalışır."""
+    if not st.secrets.get("MIRROR_ENABLED", False):
+        return None
+    mirror = LocalMirror(st.secrets.get("MIRROR_DIR", ".cache/mirror"))
+    return mirror if mirror.available else None
+
+def _new_fetch(sql: str) -> BatchFetch:
+    # Cache anahtarı üretilen SQL olarak kalır; çalıştırılan SQL rollup'a yönlenmiş olabilir
+    router = get_rollup_router()
+    exec_sql = (router.route(sql) if router is not None else None) or sql
+    pool = get_session_pool()
+    if pool is not None:
+        remote = lambda: pooled_batches(pool, exec_sql, fallback=lambda: st.connection("snowflake"))
+    else:
+        conn = st.connection("snowflake")
+        remote = lambda: snowflake_batches(conn, exec_sql)
+    # Yalnızca donmuş tablolara dokunan sorgu yerelde; çeviri/çalıştırma hatasında Snowflake'e döner
+    mirror = get_local_mirror()
+    local_sql = mirror.route(sql) if mirror is not None else None
+    batches_fn = (lambda: with_fallback(lambda: mirror.batches(local_sql), remote)) if local_sql else remote
+    return BatchFetch(
+        batches_fn,
+        max_rows=int(st.secrets.get("FETCH_MAX_ROWS", 250_000)),
+        max_bytes=int(st.secrets.get("FETCH_MAX_MB", 256)) * 1024 * 1024,
+    )
 
-def render_monthly_lines(df: pd.DataFrame, month_col: str = "AYISMI"):
-    """Genel çizim: AYISMI + (opsiyonel) YIL + tüm sayısal metrikler (aynı yıl+ay toplanır)."""
-    if df is None or df.empty:
-        return
+def _run_cached(cache: QueryCache, fetch: BatchFetch, sql: str) -> tuple[pd.DataFrame, FrameProfile, dict]:
+    ran = []
+    def run():
+        ran.append(True)
+        res = fetch.run()
+        # Profil + dönüşüm sorguyla birlikte bir kez yapılır ve frame'in yanında cache'lenir
+        t0 = time.perf_counter()
+        df, profile = prepare_frame(res.to_pandas())
+        return df, profile, {"rows": res.rows, "bytes": res.nbytes, "truncated": res.truncated, "reason": res.reason,
+                             "execute_s": res.execute_s, "fetch_s": res.fetch_s,
+                             "prepare_s": time.perf_counter() - t0}
+    df, profile, meta = cache.get_or_run(sql, run)
+    # Cache'teki frame'i bozmamak için sığ kopya döndür
+    return df.copy(deep=False), profile, {**meta, "cache_hit": not ran}
+
+def run_query(sql: str) -> tuple[pd.DataFrame, FrameProfile, dict]:
+    """SQL'i paylaşılan cache üzerinden çalıştırır; aynı sorgu aynı anda tek kez Snowflake'e gider."""
+    return _run_cached(get_query_cache(), _new_fetch(sql), sql)
+
+def submit_query(sql: str) -> PendingQuery:
+    """SQL'i arka planda başlatır (bağlantı ve cache script thread'inde alınır)."""
+    fetch = _new_fetch(sql)
+    return PendingQuery(get_query_executor().submit(_run_cached, get_query_cache(), fetch, sql), fetch)
+
+def show_first_pages(pipeline: TurnPipeline):
+    """Süren sorgulardan ilk sayfası gelenleri kendi yerlerinde hemen gösterir."""
+    for block in pipeline.waiting():
+        if block.preview_shown or block.slot is None:
+            continue
+        page = block.pending.fetch.first_page(timeout=0)
+        if page is not None:
+            block.preview_shown = True
+            with block.slot.container():
+                st.dataframe(page)
+                st.caption(f"İlk {len(page):,} satır gösteriliyor, kalan satırlar yükleniyor…".replace(",", "."))
 
-    df = df.copy()
-    for c in df.columns:
-        try: df[c] = smart_to_numeric(df[c])
-        except Exception: pass
+# =========================
+# Sonuç deposu: session state'te önizleme, tam frame diskte (süreç geneli bellek bütçesi)
+# =========================
+@st.cache_resource
+def get_result_store() -> ResultStore:
+    return ResultStore(
+        directory=st.secrets.get("RESULT_STORE_DIR", ".cache/results"),
+        max_bytes=int(st.secrets.get("RESULT_STORE_MAX_MB", 256)) * 1024 * 1024,
+        max_disk_bytes=int(st.secrets.get("RESULT_STORE_MAX_DISK_MB", 4096)) * 1024 * 1024,
+    )
 
-    if month_col not in df.columns:
-        st.warning(f"Grafik için '{month_col}' kolonu yok.")
-        return
-    df = normalize_months(df, month_col)
-    if df.empty:
-        st.warning("Geçerli ay satırı kalmadı.")
-        return
+# =========================
+# Gecikme metrikleri (yapılandırılmış log + Prometheus metin dosyası / uç noktası)
+# =========================
+@st.cache_resource
+def get_latency_registry() -> LatencyRegistry:
+    registry = LatencyRegistry(
+        log_path=st.secrets.get("METRICS_LOG_PATH", ".cache/metrics/turns.jsonl"),
+        prometheus_path=st.secrets.get("METRICS_PROM_PATH", ".cache/metrics/talkdata.prom"),
+    )
+    port = st.secrets.get("METRICS_PORT")
+    if port:
+        registry.serve(int(port))
+    return registry
 
-    year_col = pick_year_col(df)
-    if year_col:
-        df[year_col] = df[year_col].astype(str)
+# =========================
+# SQL ön kontrolü: tablo/kolonlar warehouse'a gitmeden cache'li şemaya karşı çözülür
+# =========================
+def preflight_sql(sql: str) -> PreflightResult:
+    """PREFLIGHT: "fix" (varsayılan, aksan duyarsız düzeltme) / "check" (yalnızca ret) / "off"."""
+    mode = st.secrets.get("PREFLIGHT", "fix")
+    if mode == "off":
+        return PreflightResult(sql=sql, checked=False)
+    columns = get_schema_loader(PROMPT_MODE).columns()
+    return SqlValidator(columns, autocorrect=(mode == "fix")).check(sql)
 
-    def is_year_like(col: str) -> bool:
-        if col.upper() in ("YIL","YEAR"): return True
-        s = df[col].astype(str)
-        return (s.str.fullmatch(r"\d{4}", na=False)).sum() >= max(1, len(df) * 0.3)
+# =========================
+# Spekülatif prefetch: kullanıcı cevabı okurken olası takip sorguları (yıl / marka / metrik)
+# =========================
+# Yalnızca tablo adlarındaki yıllar (şema adındaki GETIR_2023_REVISED değil)
+PREFETCH_YEARS = year_tables(TARGET_TABLES)
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher | None:
+    """PREFETCH_ENABLED ile açılır; PREFETCH_BUDGET_SECONDS: pencere başına warehouse süresi üst sınırı."""
+    if not st.secrets.get("PREFETCH_ENABLED", False):
+        return None
+    budget = float(st.secrets.get("PREFETCH_BUDGET_SECONDS", 120))
+    if budget <= 0:
+        return None
+    return Prefetcher(
+        get_query_cache().contains,
+        budget_s=budget,
+        window_s=float(st.secrets.get("PREFETCH_WINDOW_SECONDS", 3600)),
+        workers=int(st.secrets.get("PREFETCH_WORKERS", 1)),
+    )
 
-    numeric_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
-    metric_cols = [c for c in numeric_cols if c not in (year_col, "_AY_ORDER") and not is_year_like(c)]
-    if not metric_cols:
-        st.warning("Çizilecek sayısal metrik bulunamadı.")
+def prefetch_followups(sqls: list):
+    """Turun SQL'lerinden varyantlar türetip arka planda cache'e çalıştırır."""
+    prefetcher = get_prefetcher()
+    if prefetcher is None or not sqls:
         return
+    brands = get_entity_index(PROMPT_MODE).top_values("MARKA") if ENTITY_INDEX else []
+    cache = get_query_cache()
 
-    group_keys = [month_col] + ([year_col] if year_col else [])
-    agg = df[group_keys + metric_cols].groupby(group_keys, as_index=False).sum(numeric_only=True)
-
-    long_df = agg.melt(id_vars=group_keys, value_vars=metric_cols,
-                       var_name="Metric", value_name="Değer")
-
-    if year_col:
-        long_df["Seri"] = long_df["Metric"].astype(str) + " - " + long_df[year_col].astype(str)
-    else:
-        long_df["Seri"] = long_df["Metric"].astype(str)
+    def make_task(sql: str):
+        # Varyant ön kontrolden aynen geçmeli; düzeltilirse cache anahtarı modelin SQL'iyle eşleşmez
+        checked = preflight_sql(sql)
+        if not checked.ok or checked.fixes:
+            return None
+        fetch = _new_fetch(sql)
+        return lambda: _run_cached(cache, fetch, sql)
 
-    long_df["_AY_ORDER"] = long_df[month_col].map(MONTH_ORDER_IDX)
-    long_df = long_df.sort_values(["Seri","_AY_ORDER"])
+    max_variants = int(st.secrets.get("PREFETCH_MAX_VARIANTS", 4))
+    for sql in sqls:
+        prefetcher.schedule(variant_queries(sql, PREFETCH_YEARS, brands, max_variants=max_variants), make_task)
 
-    is_integer_vals = (long_df["Değer"].dropna() % 1 == 0).all()
-    money_keywords = ["HARCAMA", "CİRO", "CIRO", "HASILAT", "REVENUE", "SATIŞ", "SATIS", "TUTAR"]
-    is_money = any(any(k in m.upper() for k in money_keywords) for m in metric_cols)
-    if is_money:
-        fmt = "$,.0f" if is_integer_vals else "$,.2f"
-        y_title = "Tutar (₺)"
-    else:
-        fmt = ",.0f" if is_integer_vals else ",.2f"
-        y_title = "Değer"
-
-    x_enc = alt.X(f"{month_col}:N", title="Ay", scale=alt.Scale(domain=MONTH_ORDER))
-    chart = (
-        alt.Chart(long_df)
-        .mark_line(point=True, interpolate="linear")
-        .encode(
-            x=x_enc,
-            y=alt.Y("Değer:Q", title=y_title, axis=alt.Axis(format=fmt)),
-            color=alt.Color("Seri:N", title="Seri"),
-            detail="Seri:N",
-            order=alt.Order("_AY_ORDER:Q"),
-            tooltip=[month_col, "Seri", alt.Tooltip("Değer:Q", title=y_title, format=fmt)],
-        )
-        .properties(height=360)
+# =========================
+# Soru -> SQL cache'i (diskte kalıcı)
+# =========================
+@st.cache_resource
+def get_llm_cache(fingerprint: str) -> QuestionCache:
+    return QuestionCache(
+        fingerprint,
+        path=st.secrets.get("LLM_CACHE_PATH", ".cache/llm_cache.json"),
+        fuzzy=bool(st.secrets.get("LLM_CACHE_FUZZY", False)),
+        keep_files=int(st.secrets.get("LLM_CACHE_KEEP_FILES", 4)),
     )
-    st.altair_chart(chart, use_container_width=True)
 
-def render_date_lines(df: pd.DataFrame, date_col: str = "TARIH"):
-    """Tarih bazlı (günlük/haftalık) tüm sayısal metrikleri çizer."""
-    if df is None or df.empty:
+# =========================
+# Yardımcılar
+# =========================
+def show_frame(df: pd.DataFrame, profile: FrameProfile | None = None):
+    """Sonuç tablosunu gösterir; tarih kolonu GG.AA.YYYY biçiminde görünür."""
+    column_config = {}
+    if profile is not None and profile.date_col is not None:
+        column_config[profile.date_col] = st.column_config.DateColumn(format="DD.MM.YYYY")
+    st.dataframe(df, column_config=column_config or None)
+
+def show_stored_result(message: dict, key: str):
+    """Geçmiş turun önizlemesini gösterir; tam sonuç yalnızca istenirse depodan yüklenir."""
+    ref = message.get("result_ref")
+    results = message["results"]
+    if ref is None or ref.rows <= len(results):
+        show_frame(results, message.get("profile"))
         return
-
-    df = df.copy()
-    for c in df.columns:
-        try: df[c] = smart_to_numeric(df[c])
-        except Exception: pass
-
-    if date_col not in df.columns:
-        if "TARİH" in df.columns:
-            date_col = "TARİH"
-        else:
-            st.warning(f"Grafik için '{date_col}' kolonu yok.")
+    if st.toggle(f"Tüm sonucu göster ({ref.rows:,} satır)".replace(",", "."), key=f"full_{key}"):
+        full = get_result_store().get(ref)
+        if full is not None:
+            show_frame(full, message.get("profile"))
             return
-
-    df[date_col] = to_datetime_tr(df[date_col])
-    df = df[df[date_col].notna()].copy()
-    if df.empty:
-        st.warning("Geçerli tarih satırı kalmadı.")
-        return
-
-    numeric_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
-    metric_cols = [c for c in numeric_cols if c not in (date_col,)]
-    if not metric_cols:
-        st.warning("Çizilecek sayısal metrik bulunamadı.")
-        return
-
-    agg = df[[date_col] + metric_cols].groupby(date_col, as_index=False).sum(numeric_only=True)
-
-    long_df = agg.melt(id_vars=[date_col], value_vars=metric_cols, var_name="Metric", value_name="Değer")
-
-    is_integer_vals = (long_df["Değer"].dropna() % 1 == 0).all()
-    money_keywords = ["HARCAMA", "CİRO", "CIRO", "HASILAT", "REVENUE", "SATIŞ", "SATIS", "TUTAR", "BÜTÇE", "BUTCE"]
-    is_money = any(any(k in m.upper() for k in money_keywords) for m in metric_cols)
-    if is_money:
-        fmt = "$,.0f" if is_integer_vals else "$,.2f"
-        y_title = "Tutar (₺)"
-    else:
-        fmt = ",.0f" if is_integer_vals else ",.2f"
-        y_title = "Değer"
-
-    chart = (
-        alt.Chart(long_df.sort_values(date_col))
-        .mark_line(point=True)
-        .encode(
-            x=alt.X(f"{date_col}:T", title="Tarih"),
-            y=alt.Y("Değer:Q", title=y_title, axis=alt.Axis(format=fmt)),
-            color=alt.Color("Metric:N", title="Metrik"),
-            tooltip=[alt.Tooltip(f"{date_col}:T", title="Tarih"), "Metric", alt.Tooltip("Değer:Q", title=y_title, format=fmt)],
+        st.caption("Tam sonuç artık saklanmıyor; önizleme gösteriliyor.")
+    show_frame(results, message.get("profile"))
+
+def render_block(block: Block, timer: TurnTimer) -> dict:
+    """Biten SQL bloğunu dönüştürüp kendi yerine çizer; mesajda saklanacak kaydı döndürür."""
+    entry = {"sql": block.checked.sql}
+    with block.slot.container():
+        if block.rejected:
+            # Geçersiz tablo/kolon: warehouse'a hiç gidilmedi
+            st.error("SQL ön kontrol hatası: " + "; ".join(block.checked.errors))
+            entry["error"] = "preflight"
+            return entry
+        if block.checked.fixes:
+            st.caption("SQL düzeltildi: " + ", ".join(f"{a} → {b}" for a, b in dict(block.checked.fixes).items()))
+        try:
+            df, profile, meta = block.result()
+            prefetcher = get_prefetcher()
+            if prefetcher is not None and prefetcher.note_result(block.checked.sql, meta["cache_hit"]):
+                timer.set(prefetch_hit=True)
+                st.caption("Sonuç önceden hazırlanmıştı.")
+            render_frame(entry, df, profile, meta, timer)
+        except Exception as e:
+            entry["error"] = type(e).__name__
+            st.error(f"SQL çalıştırma hatası: {e}")
+    return entry
+
+def render_frame(entry: dict, df: pd.DataFrame, profile: FrameProfile, meta: dict, timer: TurnTimer):
+    """Sonuç frame'ini sıralayıp tablo + grafik olarak çizer; saklanacak alanları `entry`'ye yazar."""
+    timer.set(rows=timer.fields.get("rows", 0) + meta["rows"],
+              bytes=timer.fields.get("bytes", 0) + meta["bytes"],
+              cache_hit=timer.fields.get("cache_hit", True) and meta["cache_hit"],
+              truncated=timer.fields.get("truncated", False) or meta["truncated"])
+    if not meta["cache_hit"]:
+        timer.add("query_execute", meta["execute_s"])
+        timer.add("query_fetch", meta["fetch_s"] - meta["execute_s"])
+        timer.add("frame_prepare", meta["prepare_s"])
+
+    # Tabloyu ay veya tarih sütununa göre sırala
+    with timer.stage("frame_transform"):
+        date_col = None
+        if profile.month_col == "AYISMI":
+            df = normalize_months(df, "AYISMI")
+        elif profile.date_col is not None:
+            date_col = profile.date_col
+        df = sort_by_time(apply_time_axes(df), profile.year_col)
+
+    # Session state'te yalnızca önizleme; tam frame depoya (disk + LRU bellek)
+    entry["result_ref"] = get_result_store().put(df)
+    entry["results"] = preview(df, int(st.secrets.get("RESULT_PREVIEW_ROWS", 200)))
+    entry["profile"] = profile
+    show_frame(df, profile)
+    if meta["truncated"]:
+        limit = "satır" if meta["reason"] == "rows" else "boyut"
+        st.warning(
+            f"Sonuç {limit} sınırına ulaştığı için ilk {meta['rows']:,} satırda kesildi. "
+            "Daha dar bir soru (filtre veya toplama) sormayı deneyin.".replace(",", ".")
         )
-        .properties(height=360)
-    )
-    st.altair_chart(chart, use_container_width=True)
+
+    # Kesilmiş sonuçta grafik verisi warehouse'ta toplanır; tam sonuç yerelde toplanıp seyreltilir
+    chart_df, chart_profile = df, profile
+    plan = plan_chart_query(entry["sql"], profile) if needs_pushdown(meta) else None
+    if plan is not None:
+        try:
+            with timer.stage("chart_query"):
+                chart_df, chart_profile, _ = run_query(plan.sql)
+        except Exception:
+            pass  # toplama sorgusu başarısızsa eldeki frame'den çiz
+
+    # Grafik: varsa tarih bazlı, yoksa aylık; kurulan grafik geçmiş için saklanır
+    with timer.stage("chart_build"):
+        if date_col:
+            chart = build_date_chart(chart_df, date_col=date_col, profile=chart_profile,
+                                     max_points=int(st.secrets.get("CHART_MAX_POINTS", 1000)))
+        else:
+            chart = build_monthly_chart(chart_df, month_col="AYISMI", profile=chart_profile)
+    if chart[0] is not None:
+        entry["chart"] = chart
+    with timer.stage("chart_render"):
+        show_chart(*chart)
 
 # =========================
 # System Prompt (cache)
@@ -282,21 +384,96 @@ if prompt := st.chat_input("Sorunu yaz..."):
     st.session_state.messages.append({"role": "user", "content": prompt})
 
 # =========================
-# Mevcut sohbeti göster
+# Mevcut sohbeti göster (son turlar tam, eskiler özet)
 # =========================
-for message in st.session_state.messages:
-    if message["role"] == "system":
-        continue
+def render_message(message: dict, key: str):
+    """Bir mesajı tam çizer; grafik mesajda saklanan hazır spec'ten gelir (yeniden hesaplanmaz)."""
     if message["role"] == "assistant":
         with st.chat_message("assistant", avatar='UM_Logo_Heritage_Red.png'):
             st.write(message["content"])
-            if "results" in message:
-                st.dataframe(message["results"])
+            # Birden çok SQL bloğu: ilk sonuç mesajın kendisinde, diğerleri extra_results'ta
+            for j, part in enumerate([message] + message.get("extra_results", [])):
+                if "results" in part:
+                    show_stored_result(part, key=key if j == 0 else f"{key}_{j}")
+                if "chart" in part:
+                    show_chart(*part["chart"])
     else:
         with st.chat_message("user"):
             st.write(message["content"])
             if "results" in message:
-                st.dataframe(message["results"])
+                show_stored_result(message, key=key)
+
+def turn_label(user: dict | None, assistant: dict | None) -> str:
+    """Eski tur için tek satırlık özet etiketi."""
+    q = str((user or {}).get("content") or "").strip().replace("\n", " ")
+    q = q if len(q) <= 80 else q[:80] + "…"
+    if assistant is not None and "results" in assistant:
+        ref = assistant.get("result_ref")
+        return f"{q} — {summarize_result(assistant['results'], ref.shape if ref is not None else None)}"
+    return q or "(yanıt)"
+
+def render_history(messages: list, full_turns: int):
+    """Son `full_turns` turu tam çizer; daha eskiler istenince açılan tek satırlık özetlerdir."""
+    turns = []  # [[(i, user), (i, assistant)], ...]
+    for i, m in enumerate(messages):
+        if m["role"] == "system":
+            continue
+        if m["role"] == "user" or not turns or turns[-1][1] is not None:
+            turns.append([None, None])
+        turns[-1][0 if m["role"] == "user" else 1] = (i, m)
+    split = max(0, len(turns) - full_turns)
+    if split:
+        with st.expander(f"Önceki {split} soru", expanded=False):
+            for user, assistant in turns[:split]:
+                first = user or assistant
+                label = turn_label(user and user[1], assistant and assistant[1])
+                # Toggle kapalıyken tur içeriği hiç çizilmez (tablo/grafik tarayıcıya gitmez)
+                if st.toggle(label, key=f"open_{first[0]}"):
+                    for i, m in filter(None, (user, assistant)):
+                        render_message(m, key=str(i))
+    for user, assistant in turns[split:]:
+        for i, m in filter(None, (user, assistant)):
+            render_message(m, key=str(i))
+
+render_history(st.session_state.messages, full_turns=int(st.secrets.get("HISTORY_RENDER_TURNS", 3)))
+_HISTORY_MS = (time.perf_counter() - _RENDER_START) * 1000
+
+# =========================
+# Takip sorusu: önceki sonuç yerelde yeniden dilimlenebiliyorsa LLM/warehouse'a gidilmez
+# =========================
+def previous_result(messages: list):
+    """Son kullanıcı mesajından önceki asistan mesajının (tam frame, profil); tek sonuçlu değilse None."""
+    for m in reversed(messages[:-1]):
+        if m["role"] != "assistant":
+            continue
+        if "results" not in m or m.get("extra_results"):
+            return None
+        ref = m.get("result_ref")
+        if ref is None or ref.rows <= len(m["results"]):
+            return m["results"], m.get("profile")
+        full = get_result_store().get(ref)
+        return (full, m.get("profile")) if full is not None else None
+    return None
+
+if (st.secrets.get("LOCAL_REFINE", False) and st.session_state.messages
+        and st.session_state.messages[-1]["role"] == "user"
+        and has_refinement_intent(st.session_state.messages[-1]["content"])):
+    timer = TurnTimer()
+    with timer.stage("refine"):
+        prev = previous_result(st.session_state.messages)
+        refined = refine(st.session_state.messages[-1]["content"], *prev) if prev is not None else None
+    if refined is not None:
+        with st.chat_message("assistant", avatar='UM_Logo_Heritage_Red.png'):
+            st.markdown(refined.description)
+            entry = {"sql": None}  # grafik için toplama sorgusu planlanmaz; veri zaten yerelde
+            meta = {"rows": len(refined.df), "bytes": int(refined.df.memory_usage(deep=True).sum()),
+                    "cache_hit": True, "truncated": False, "reason": None}
+            render_frame(entry, refined.df, refined.profile, meta, timer)
+        entry.pop("sql")
+        timer.set(local_refine=True)
+        st.session_state.messages.append(
+            {"role": "assistant", "content": refined.description, "avatar": 'UM_Logo_Heritage_Red.png', **entry})
+        get_latency_registry().observe(timer)
 
 # =========================
 # Yanıt üretme + SQL varsa çalıştırma
@@ -304,54 +481,190 @@ for message in st.session_state.messages:
 if st.session_state.messages and st.session_state.messages[-1]["role"] != "assistant":
     with st.chat_message("assistant", avatar='UM_Logo_Heritage_Red.png'):
         with st.spinner("Model yanıt üretiyor..."):
-            api_messages = []
-            for m in st.session_state.messages:
-                role = m.get("role")
-                content = m.get("content")
-                if role in ("system", "user", "assistant"):
-                    api_messages.append({"role": role, "content": str(content or "")})
-
-            result = client.chat.completions.create(
-                model="gpt-5",
-                messages=api_messages
-            )
-            response = result.choices[0].message.content or ""
-            st.markdown(response)
+            timer = TurnTimer()
+            llm_cache = get_llm_cache(prompt_fingerprint(st.session_state.system_prompt))
+            last = st.session_state.messages[-1]
+            question = last["content"] if last["role"] == "user" else ""
+            # Takip soruları önceki SQL'e bağlı; bağlam olarak son çalıştırılan SQL'i kullan
+            prev_sql = next((m["sql"] for m in reversed(st.session_state.messages) if m.get("sql")), "")
+
+            # Her SQL bloğu kapandığı anda arka planda başlar; bloklar birbirini beklemez
+            detector = SqlFenceDetector()
+            pipeline = TurnPipeline(preflight_sql, submit_query,
+                                    max_blocks=int(st.secrets.get("MAX_SQL_BLOCKS", 6)))
+            # Önceki tur yarıda kaldıysa (kullanıcı yeni soru sordu) sorguları hâlâ sürüyor olabilir
+            previous = st.session_state.pop("active_turn", None)
+            if previous is not None:
+                previous.cancel()
+            # Sırada bekleyen prefetch'ler bu turun sorgularıyla warehouse için yarışmasın
+            if get_prefetcher() is not None:
+                get_prefetcher().pause()
+            st.session_state.active_turn = pipeline
+            entries: dict[int, dict] = {}
+
+            def start_blocks(sqls: list):
+                for sql in sqls:
+                    with timer.stage("sql_preflight"):
+                        pipeline.add(sql, slot=st.empty())
+
+            def deliver(blocks: list):
+                for block in blocks:
+                    entries[block.index] = render_block(block, timer)
+
+            with pipeline:
+                cached = llm_cache.get(question, context=prev_sql)
+                timer.set(llm_cache_hit=cached is not None)
+                if cached is not None:
+                    detector.feed(cached["answer"])
+                    st.markdown(detector.text)
+                    st.caption("Yanıt cache'ten geldi.")
+                    start_blocks(detector.blocks)
+                else:
+                    # System prompt + son turlar aynen, eski turlar özet; bütçe aşılmaz
+                    with timer.stage("prompt_build"):
+                        # PROMPT_RETRIEVAL: sabit önek aynı kalır, yalnızca ilgili alan/tablolar eklenir
+                        narrowed = get_question_prompt(question)
+                        # Sorudaki marka/mecra/kampanya için tam değerler; önekten sonra eklenir, cache bozulmaz
+                        hint = entity_hint(question)
+                        history = st.session_state.messages
+                        if narrowed is not None or hint:
+                            system = narrowed or history[0]["content"]
+                            if hint:
+                                system = f"{system}\n\n{hint}"
+                            history = [{"role": "system", "content": system}] + history[1:]
+                        api_messages, n_tokens = build_api_messages(
+                            history,
+                            budget=int(st.secrets.get("HISTORY_TOKEN_BUDGET", 24000)),
+                            keep_last_turns=int(st.secrets.get("HISTORY_KEEP_TURNS", 3)),
+                        )
+                    timer.set(request_tokens=n_tokens)
+
+                    resp_container = st.empty()
+                    touch_llm_keepalive()  # kullanıcı aktif: LLM bağlantısı boşta kapanmasın
+                    llm_start = time.perf_counter()
+                    for chunk in client.chat.completions.create(
+                        model="gpt-5",
+                        messages=api_messages,
+                        stream=True,
+                    ):
+                        if not chunk.choices:
+                            continue
+                        if "llm_first_token" not in timer.stages:
+                            timer.add("llm_first_token", time.perf_counter() - llm_start)
+                        closed = detector.feed(chunk.choices[0].delta.content or "")
+                        if closed and not pipeline.blocks:
+                            # SQL çıkarımı: LLM başlangıcından ilk kapanan SQL bloğuna kadar
+                            timer.add("sql_extract", time.perf_counter() - llm_start)
+                        resp_container.markdown(detector.text)
+                        start_blocks(closed)
+                        # Model yazmaya devam ederken biten sorgular hemen çizilir
+                        show_first_pages(pipeline)
+                        deliver(pipeline.poll())
+                    timer.add("llm_total", time.perf_counter() - llm_start)
+                    st.caption(f"İstek boyutu: ~{n_tokens:,} token".replace(",", "."))
+
+                # Kalan sorgular: biten çizilir; kısa aralıklarla dönülür ki yeni soru gelince tur kesilebilsin
+                status = st.empty()
+                while not pipeline.finished:
+                    t0 = time.perf_counter()
+                    ready = pipeline.wait(timeout=0.25)
+                    timer.add("query_wait", time.perf_counter() - t0)
+                    show_first_pages(pipeline)
+                    deliver(ready)
+                    if not pipeline.finished:
+                        done = sum(b.delivered for b in pipeline.blocks)
+                        status.caption(f"Sorgular çalışıyor: {done}/{len(pipeline.blocks)} tamamlandı")
+                status.empty()
+            st.session_state.pop("active_turn", None)
+            if pipeline.skipped:
+                st.caption(f"{pipeline.skipped} ek SQL bloğu çalıştırılmadı (en fazla {pipeline.max_blocks}).")
+            response = detector.text
 
             message = {"role": "assistant", "content": response, "avatar": 'UM_Logo_Heritage_Red.png'}
+            ordered = [entries[i] for i in sorted(entries)]
+            sql_failed = any("error" in e for e in ordered)
+            results = [e for e in ordered if "results" in e]
+            if ordered:
+                message["sql"] = (results or ordered)[0]["sql"]
+            if results:
+                # İlk sonuç eski mesaj alanlarında; diğer bloklar sırasıyla ek sonuçlar olarak saklanır
+                message.update({k: v for k, v in results[0].items() if k != "sql"})
+                if len(results) > 1:
+                    message["extra_results"] = results[1:]
+            timer.set(blocks=len(ordered))
+            if sql_failed:
+                timer.set(error=next(e["error"] for e in ordered if "error" in e))
+
+            # Hatalı SQL üreten cevapları cache'leme
+            if cached is None and response and not sql_failed:
+                llm_cache.put(question, response, sql=message.get("sql"), context=prev_sql)
+            prefetch_followups([e["sql"] for e in results])
+            st.session_state.messages.append(message)
+            get_latency_registry().observe(timer)
+
+# =========================
+# Cache istatistikleri
+# =========================
+with st.sidebar.expander("Sorgu cache"):
+    stats = get_query_cache().stats()
+    st.caption(
+        f"Hit: {stats['hits']} · Miss: {stats['misses']} · Bekleyen: {stats['waits']} · "
+        f"Oran: {stats['hit_rate']:.0%} · {stats['entries']} kayıt, {stats['bytes'] / 1e6:.1f} MB"
+    )
+    rstats = get_result_store().stats()
+    st.caption(
+        f"Sonuç deposu: bellekte {rstats['entries']} frame ({rstats['bytes'] / 1e6:.1f} MB) · "
+        f"diskte {rstats['files']} dosya ({rstats['disk_bytes'] / 1e6:.1f} MB) · "
+        f"geri yükleme: {rstats['loads']}"
+    )
+    if "prompt_tokens" not in st.session_state:
+        st.session_state.prompt_tokens = prompt_token_report()
+    ptok = st.session_state.prompt_tokens
+    st.caption(
+        f"System prompt: {ptok['legacy']:,} → {ptok['deduped']:,} token "
+        f"(cache'lenebilir önek: {ptok['cacheable_prefix']:,})".replace(",", ".")
+    )
+    prefetcher = get_prefetcher()
+    if prefetcher is not None:
+        pstats = prefetcher.stats()
+        st.caption(
+            f"Prefetch: {pstats['ran']} çalıştı, {pstats['hits']} isabet (oran: {pstats['hit_rate']:.0%}, "
+            f"sorguların {pstats['coverage']:.0%}'i) · harcama {pstats['spent_s']:.0f}/{pstats['budget_s']:.0f} sn"
+        )
+    mirror = get_local_mirror()
+    if mirror is not None:
+        st.caption(f"Yerel kopya ({', '.join(mirror.tables)}): {mirror.routed} sorgu yerelde çalıştı")
 
-            sql_match = re.search(r"```sql\s*(.+?)\s*```", response, re.DOTALL | re.IGNORECASE)
-            if sql_match:
-                sql = sql_match.group(1).strip()
-                try:
-                    conn = st.connection("snowflake")
-                    df = conn.query(sql)
-
-                    # Tabloyu ay veya tarih sütununa göre sırala
-                    date_col = None
-                    if "AYISMI" in df.columns:
-                        df = normalize_months(df, "AYISMI")
-                        sort_cols = (["YIL", "_AY_ORDER"] if "YIL" in df.columns else ["_AY_ORDER"])
-                        df = df.sort_values(sort_cols).drop(columns=["_AY_ORDER"])
-                    elif "TARIH" in df.columns or "TARİH" in df.columns:
-                        date_col = "TARIH" if "TARIH" in df.columns else "TARİH"
-                        df[date_col] = to_datetime_tr(df[date_col])
-                        df = df.sort_values(date_col)
-                        try:
-                            df[date_col] = df[date_col].dt.strftime("%d.%m.%Y")
-                        except Exception:
-                            pass
-
-                    message["results"] = df
-                    st.dataframe(df)
-
-                    # Grafik: varsa tarih bazlı, yoksa aylık
-                    if date_col:
-                        render_date_lines(df.copy(), date_col=date_col)
-                    else:
-                        render_monthly_lines(df.copy(), month_col="AYISMI")
-
-                except Exception as e:
-                    st.error(f"SQL çalıştırma hatası: {e}")
+if not _WARMUP.finished.is_set():
+    pending_steps = [k for k, v in _WARMUP.readiness()["steps"].items() if v["status"] in ("pending", "running")]
+    st.sidebar.caption("Isınma sürüyor: " + ", ".join(pending_steps))
 
-            st.session_state.messages.append(message)
+st.sidebar.caption(
+    f"Render: {(time.perf_counter() - _RENDER_START) * 1000:.0f} ms "
+    f"(geçmiş: {_HISTORY_MS:.0f} ms)"
+)
+
+# =========================
+# Admin paneli: aşama başına p50/p95 (son turlar)
+# =========================
+if st.secrets.get("ADMIN_PANEL", False):
+    with st.sidebar.expander("Gecikme (p50 / p95)"):
+        pct = get_latency_registry().percentiles()
+        if pct:
+            st.dataframe(
+                pd.DataFrame(
+                    [{"Aşama": k, "Tur": v["n"], "p50 (ms)": v["p50"] * 1000, "p95 (ms)": v["p95"] * 1000}
+                     for k, v in sorted(pct.items(), key=lambda kv: -kv[1]["p95"])]
+                ).round(1),
+                hide_index=True,
+            )
+        else:
+            st.caption("Henüz ölçülmüş tur yok.")
+    with st.sidebar.expander("Isınma"):
+        st.json(_WARMUP.readiness())
+        pool = get_session_pool()
+        if pool is not None:
+            st.caption(" · ".join(f"{k}: {v}" for k, v in pool.stats().items()))
+        if ENTITY_INDEX:
+            st.caption("Varlık indeksi: " + " · ".join(
+                f"{k}: {v}" for k, v in get_entity_index(PROMPT_MODE).stats().items() if k != "built_at"))
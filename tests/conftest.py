@@ -0,0 +1,17 @@
+"""Ortak test kurulumu.
+
+Modüller import anında `st.secrets` okur ve `.cache/` altına yazar; testler repo kökü
+import yolunda, boş bir `.streamlit/secrets.toml` bulunan geçici bir dizinde çalışır.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_WORKDIR = tempfile.mkdtemp(prefix="talkdata-tests-")
+os.makedirs(os.path.join(_WORKDIR, ".streamlit"))
+open(os.path.join(_WORKDIR, ".streamlit", "secrets.toml"), "w").close()
+os.chdir(_WORKDIR)
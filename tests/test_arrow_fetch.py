@@ -0,0 +1,36 @@
+import pyarrow as pa
+
+from arrow_fetch import BatchFetch
+
+
+def _wide(rows: int, width: int = 1000) -> pa.Table:
+    return pa.table({"ID": list(range(rows)), "TEXT": ["x" * width] * rows})
+
+
+def test_first_batch_is_cut_to_byte_budget():
+    big = _wide(1000)
+    budget = big.nbytes // 10
+    res = BatchFetch(lambda: iter([big]), max_bytes=budget).run()
+    assert res.truncated and res.reason == "bytes"
+    assert 0 < res.rows < 1000
+    assert res.nbytes <= budget
+    assert res.table.column("ID").to_pylist() == list(range(res.rows))
+
+
+def test_later_batch_is_cut_to_remaining_budget():
+    first, second = _wide(100), _wide(1000)
+    budget = first.nbytes + second.nbytes // 2
+    res = BatchFetch(lambda: iter([first, second]), max_bytes=budget).run()
+    assert res.truncated and res.reason == "bytes"
+    assert 100 < res.rows < 1100
+    assert res.nbytes <= budget
+
+
+def test_within_limits_not_truncated():
+    res = BatchFetch(lambda: iter([_wide(10), _wide(10)])).run()
+    assert not res.truncated and res.rows == 20
+
+
+def test_row_cap():
+    res = BatchFetch(lambda: iter([_wide(10, 1), _wide(10, 1)]), max_rows=15).run()
+    assert res.truncated and res.reason == "rows" and res.rows == 15
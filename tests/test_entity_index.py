@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+import entity_index
+from entity_index import EntityIndex, EntityMatch, distinct_sql, entity_key
+
+VALUES = {
+    "MARKA": {"GETİR": 50, "GETİRYEMEK": 30, "GETİR10": 20, "MIGROS": 40, "MIGROS SANAL MARKET": 10,
+              "TRENDYOL.COM": 25, "TRENDYOL YEMEK": 15, "YEMEKSEPETI.COM": 30, "YEMEKSEPETI MARKET": 12,
+              "YEMEKSEPETI MAHALLE": 8},
+    "MECRA": {"TELEVIZYON": 100, "RADYO": 40, "OUTDOOR": 20},
+    "KAMPANYA": {"MIGROS EYLUL": 5, "GETIR YAZ": 7},
+}
+
+
+def _index(tmp_path, values=VALUES):
+    rows = [(col, val, n) for col, vals in values.items() for val, n in vals.items()]
+    df = pd.DataFrame(rows, columns=["KOLON", "DEGER", "ADET"])
+    columns = {"P.REKABET": [(c, "TEXT") for c in values]}
+    index = EntityIndex(lambda: columns, lambda sql: df, path=str(tmp_path / "idx.json"))
+    index.ensure(block=True)
+    return index
+
+
+def _by_column(matches):
+    return {m.column: m for m in matches}
+
+
+def test_distinct_sql_covers_entity_columns_only():
+    sql = distinct_sql({"P.T": [("MARKA", "TEXT"), ("GRP", "TEXT"), ("MECRA", "TEXT")]})
+    assert "'MARKA' AS KOLON" in sql and "'MECRA' AS KOLON" in sql and "GRP" not in sql
+
+
+def test_exact_and_suffix_matches(tmp_path):
+    found = _by_column(_index(tmp_path).resolve("2024'te Migros'un televizyondaki harcaması"))
+    assert found["MECRA"].predicate() == "MECRA = 'TELEVIZYON'"
+    assert found["MARKA"].predicate() == "MARKA IN ('MIGROS', 'MIGROS SANAL MARKET')"
+
+
+def test_longest_span_wins(tmp_path):
+    matches = _index(tmp_path).resolve("yemeksepeti market ve trendyol yemek")
+    assert [(m.mention, m.values) for m in matches] == [
+        ("yemeksepeti market", ["YEMEKSEPETI MARKET"]), ("trendyol yemek", ["TRENDYOL YEMEK"])]
+
+
+def test_alias_suffix(tmp_path):
+    found = _by_column(_index(tmp_path).resolve("trendyol.com bütçesi"))
+    assert found["MARKA"].values[0] == "TRENDYOL.COM"
+
+
+def test_fuzzy_match(tmp_path):
+    found = _by_column(_index(tmp_path).resolve("yemeksepetti mahalle"))
+    assert found["MARKA"].values == ["YEMEKSEPETI MAHALLE"]
+    assert found["MARKA"].score < 1.0
+
+
+def test_siblings_over_limit_fall_back_to_ilike(tmp_path, monkeypatch):
+    monkeypatch.setattr(entity_index, "MAX_VALUES_PER_MENTION", 2)
+    found = _by_column(_index(tmp_path).resolve("getir"))
+    assert found["MARKA"].predicate() == "MARKA ILIKE '%GETİR%'"
+
+
+def test_prompt_hint(tmp_path):
+    index = _index(tmp_path)
+    assert index.prompt_hint("hava nasıl") == ""
+    hint = index.prompt_hint("migros radyo")
+    assert hint.startswith("<entities>") and "MECRA = 'RADYO'" in hint
+
+
+def test_index_persisted_to_disk(tmp_path):
+    _index(tmp_path)
+    reloaded = EntityIndex(lambda: {}, lambda sql: None, path=str(tmp_path / "idx.json"))
+    assert reloaded.ensure() and reloaded.stats()["MARKA"] == len(VALUES["MARKA"])
+
+
+def test_predicate_quotes_values():
+    assert EntityMatch("MARKA", "x", ["D'OR"], 1.0).predicate() == "MARKA = 'D''OR'"
+
+
+# ---------- sentetik veride: çözücünün filtresi ILIKE ile aynı satırları seçmeli ----------
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    duckdb = pytest.importorskip("duckdb")
+    sqlglot = pytest.importorskip("sqlglot")
+    from benchmarks.synthetic import load_duckdb
+
+    con = duckdb.connect()
+    load_duckdb(con, "P", rows_per_year=5_000)
+    rows = con.execute("SELECT table_schema || '.' || table_name, column_name, data_type "
+                       "FROM information_schema.columns WHERE table_schema = 'P'").fetchall()
+    columns: dict = {}
+    for t, c, d in rows:
+        columns.setdefault(t, []).append((c, d))
+    query = lambda sql: con.execute(sqlglot.transpile(sql, read="snowflake", write="duckdb")[0]).df()
+    index = EntityIndex(lambda: columns, query, path=str(tmp_path_factory.mktemp("entity") / "idx.json"))
+    index.ensure(block=True)
+    return con, index
+
+
+@pytest.mark.parametrize("mention, keyword", [
+    ("migros", "MIGROS"), ("trendyol yemek", "TRENDYOL YEMEK"), ("getir", "GETİR"), ("yemeksepeti", "YEMEKSEPETI"),
+])
+def test_resolved_filter_selects_same_rows_as_ilike(synthetic, mention, keyword):
+    con, index = synthetic
+    pred = next(m.predicate() for m in index.resolve(mention) if m.column == "MARKA")
+    count = lambda where: con.execute(f"SELECT COUNT(*) FROM P.GETIR2024REKABET WHERE {where}").fetchone()[0]
+    assert count(pred) == count(f"MARKA ILIKE '%{keyword}%'") > 0
+    assert entity_key(keyword) in entity_key(pred)
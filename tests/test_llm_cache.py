@@ -0,0 +1,39 @@
+import os
+import time
+
+from llm_cache import QuestionCache, fingerprint_path, prompt_fingerprint, prune_fingerprint_files
+
+
+def test_each_fingerprint_has_its_own_file(tmp_path):
+    path = str(tmp_path / "llm_cache.json")
+    raw, typed = prompt_fingerprint("raw prompt"), prompt_fingerprint("typed prompt")
+    QuestionCache(raw, path=path).put("Getir 2024 bütçesi", "cevap raw", sql="SELECT 1")
+    QuestionCache(typed, path=path).put("Getir 2024 bütçesi", "cevap typed", sql="SELECT 2")
+
+    assert os.path.exists(fingerprint_path(path, raw))
+    assert os.path.exists(fingerprint_path(path, typed))
+    assert QuestionCache(raw, path=path).get("getir 2024 butcesi")["answer"] == "cevap raw"
+    assert QuestionCache(typed, path=path).get("getir 2024 butcesi")["answer"] == "cevap typed"
+
+
+def test_old_fingerprint_files_are_pruned(tmp_path):
+    path = str(tmp_path / "llm_cache.json")
+    fps = [prompt_fingerprint(f"prompt {i}") for i in range(5)]
+    now = time.time()
+    for i, fp in enumerate(fps):
+        QuestionCache(fp, path=path, keep_files=10).put("soru", "cevap")
+        os.utime(fingerprint_path(path, fp), (now - 100 + i, now - 100 + i))
+    (tmp_path / "other.json").write_text("{}")
+
+    QuestionCache(fps[0], path=path, keep_files=2)  # en eski ama geçerli parmak izi korunur
+    left = sorted(os.listdir(tmp_path))
+    expected = sorted([os.path.basename(fingerprint_path(path, fp)) for fp in (fps[0], fps[3], fps[4])]
+                      + ["other.json"])
+    assert left == expected
+
+
+def test_prune_ignores_unrelated_files(tmp_path):
+    path = str(tmp_path / "llm_cache.json")
+    (tmp_path / "llm_cache.json").write_text("{}")
+    (tmp_path / "llm_cache.notahash.json").write_text("{}")
+    assert prune_fingerprint_files(path, keep=0) == []
@@ -0,0 +1,89 @@
+import pytest
+
+pytest.importorskip("sqlglot")
+duckdb = pytest.importorskip("duckdb")
+
+import sqlglot
+
+from arrow_fetch import duckdb_batches
+from benchmarks.synthetic import load_duckdb
+from local_mirror import LocalMirror, sync_mirror, with_fallback
+from rollups import NETTUTAR_EXPR
+
+FROZEN = ("GETIR2023REKABET", "GETIR2024REKABET")
+
+
+def _transpile(sql):
+    return sqlglot.transpile(sql, read="snowflake", write="duckdb")[0]
+
+
+@pytest.fixture(scope="module")
+def warehouse():
+    con = duckdb.connect()  # Snowflake stand-in'i
+    load_duckdb(con, "P", rows_per_year=2_000)
+    return con
+
+
+@pytest.fixture(scope="module")
+def mirror(warehouse, tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("mirror"))
+    manifest = sync_mirror(lambda sql: duckdb_batches(warehouse, _transpile(sql)), "P", directory, frozen=FROZEN)
+    assert manifest["tables"]["GETIR2023REKABET"]["rows"] == 2_000
+    return LocalMirror(directory)
+
+
+@pytest.mark.parametrize("sql", [
+    f"SELECT MARKA, SUM({NETTUTAR_EXPR}) AS TOPLAM_HARCAMA FROM P.GETIR2023REKABET "
+    "WHERE MARKA ILIKE '%migros%' GROUP BY MARKA",
+    "SELECT AYISMI, ROUND(SUM(TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT)), 2) AS TOPLAM_GRP "
+    "FROM P.GETIR2024REKABET GROUP BY AYISMI",
+], ids=["nettutar-2023", "grp-2024"])
+def test_frozen_queries_run_locally_with_same_result(warehouse, mirror, sql):
+    local = mirror.route(sql)
+    assert local is not None
+    assert sorted(mirror.con.execute(local).fetchall()) == sorted(warehouse.execute(_transpile(sql)).fetchall())
+
+
+def test_typed_table_routed_only_for_frozen_years(mirror):
+    assert mirror.route("SELECT YIL, ROUND(SUM(GRP), 2) AS G FROM P.GETIRREKABET "
+                        "WHERE YIL IN (2023, 2024) GROUP BY YIL") is not None
+    assert mirror.route("SELECT YIL, SUM(NETTUTAR) FROM P.GETIRREKABET GROUP BY YIL") is None
+    assert mirror.route("SELECT SUM(NETTUTAR) FROM P.GETIRREKABET WHERE YIL = 2025") is None
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT MARKA FROM P.GETIR2025REKABET",
+    "SELECT * FROM P.GETIRKAMPANYALARI",
+    "SELECT A.MARKA FROM P.GETIR2023REKABET A JOIN P.GETIR2025REKABET B ON A.MARKA = B.MARKA",
+])
+def test_live_tables_go_to_snowflake(mirror, sql):
+    assert mirror.route(sql) is None
+
+
+def test_mirror_without_manifest_is_unavailable(tmp_path):
+    mirror = LocalMirror(str(tmp_path))
+    assert not mirror.available
+    assert mirror.route("SELECT * FROM P.GETIR2023REKABET") is None
+
+
+def test_fallback_when_local_fails_before_first_batch():
+    def broken():
+        raise RuntimeError("Catalog Error")
+        yield  # pragma: no cover
+
+    assert list(with_fallback(broken, lambda: iter(["remote"]))) == ["remote"]
+
+
+def test_no_fallback_after_first_batch():
+    def partial():
+        yield "local-1"
+        raise RuntimeError("disk")
+
+    out = with_fallback(partial, lambda: iter(["remote"]))
+    assert next(out) == "local-1"
+    with pytest.raises(RuntimeError):
+        next(out)
+
+
+def test_local_result_used_when_it_works():
+    assert list(with_fallback(lambda: iter(["a", "b"]), lambda: iter(["remote"]))) == ["a", "b"]
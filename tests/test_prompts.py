@@ -0,0 +1,47 @@
+import pytest
+
+import prompts
+
+SECTION_MARKERS = (
+    "<fieldContext>", "</fieldContext>", "<rules>", "</rules>", "{context}",
+    "You will be acting as an AI Snowflake SQL Expert",
+    "Don't forget to use \"ilike %keyword%\"",
+    "Now to get started",
+)
+
+
+@pytest.mark.parametrize("template", [prompts.GEN_SQL, prompts.GEN_SQL_TYPED], ids=["raw", "typed"])
+@pytest.mark.parametrize("marker", SECTION_MARKERS)
+def test_each_section_appears_once(template, marker):
+    assert template.count(marker) == 1
+
+
+@pytest.mark.parametrize("typed", [False, True], ids=["raw", "typed"])
+def test_each_rule_rendered_once(typed):
+    text = prompts.render_rules(typed)
+    for raw_rule, typed_rule in prompts.SQL_RULES:
+        rule = typed_rule if typed else raw_rule
+        if rule is not None:
+            assert text.count(f"{rule[0]}. {rule[1]}") == 1
+
+
+def test_raw_prompt_keeps_rule_numbers():
+    # Başka modüllerdeki "kural N" atıfları ve cache'lenmiş prompt parmak izleri bu numaralara dayanır
+    text = prompts.render_rules(typed=False)
+    assert f"17. {prompts.RULE_NETTUTAR}" in text
+    assert f"14. {prompts.RULE_NO_LIMIT}" in text
+    assert f"24. {prompts.RULE_DAY_RAW}" in text
+    assert f"27. {prompts.RULE_SOV}" in text
+    assert f"5. {prompts.RULE_COLUMNS}" in text
+    assert text.index(prompts.RULE_GETIR10) < text.index(prompts.RULE_BRAND_KEYWORDS)
+
+
+def test_typed_prompt_drops_raw_parsing_rules():
+    assert prompts.RULE_NETTUTAR not in prompts.GEN_SQL_TYPED
+    assert prompts.RULE_TYPED_NUMERIC in prompts.GEN_SQL_TYPED
+    assert len(prompts.GEN_SQL_TYPED) < len(prompts.GEN_SQL)
+
+
+@pytest.mark.parametrize("template", [prompts.GEN_SQL, prompts.GEN_SQL_TYPED], ids=["raw", "typed"])
+def test_template_formats_with_context_only(template):
+    assert "CTX" in template.format(context="CTX")
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from refine import refine
+
+
+@pytest.fixture
+def spend():
+    """Aylık marka bazında NETTUTAR sonucu (MECRA kolonu yok)."""
+    return pd.DataFrame({
+        "YIL": [2024] * 4,
+        "AYISMI": ["OCAK", "OCAK", "SUBAT", "SUBAT"],
+        "MARKA": ["MIGROS", "GETIR", "MIGROS", "GETIR"],
+        "TOPLAM_NETTUTAR": [300.0, 100.0, 200.0, 200.0],
+    })
+
+
+@pytest.fixture
+def grp():
+    return pd.DataFrame({
+        "YIL": [2024] * 3,
+        "MARKA": ["MIGROS", "GETIR", "A101"],
+        "TOPLAM_GRP": [50.0, 30.0, 20.0],
+    })
+
+
+def test_filter_only(spend):
+    out = refine("sadece migros", spend)
+    assert out is not None
+    assert set(out.df["MARKA"]) == {"MIGROS"}
+    assert "önceki sonuç" in out.description
+
+
+def test_metric_not_in_result(spend):
+    assert refine("sadece migros'un GRP'si ne kadar?", spend) is None
+
+
+def test_dimension_not_in_result(spend):
+    assert refine("2024'te sadece Migros'un televizyon harcaması", spend) is None
+    assert refine("mecra bazında yüzde olarak", spend) is None
+
+
+def test_dimension_value_not_in_result():
+    df = pd.DataFrame({"MECRA": ["RADYO", "BASIN"], "TOPLAM_NETTUTAR": [1.0, 2.0]})
+    assert refine("sadece televizyon", df) is None
+    assert list(refine("sadece radyo", df).df["MECRA"]) == ["RADYO"]
+
+
+def test_year_not_in_result(spend):
+    assert refine("sadece 2023 migros", spend) is None
+
+
+def test_percent_computed_before_filter(spend):
+    out = refine("sadece Migros'un payı", spend)
+    assert out is not None
+    assert list(out.df["MARKA"]) == ["MIGROS", "MIGROS"]
+    assert list(out.df["TOPLAM_NETTUTAR_YUZDE"]) == [75.0, 50.0]
+
+
+def test_sov_computed_before_filter(grp):
+    out = refine("sadece migros SOV", grp)
+    assert out is not None
+    assert list(out.df["SOV"]) == [50.0]
+
+
+def test_quarters(spend):
+    out = refine("çeyrek bazında", spend)
+    assert out is not None
+    totals = out.df.groupby("MARKA")["TOPLAM_NETTUTAR"].sum().to_dict()
+    assert totals == {"GETIR": 300.0, "MIGROS": 500.0}
+
+
+def test_not_a_refinement(spend):
+    assert refine("getir'in 2024 bütçesi nedir", spend) is None
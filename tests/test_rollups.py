@@ -0,0 +1,114 @@
+import pytest
+
+pytest.importorskip("sqlglot")
+
+from rollups import NETTUTAR_EXPR, FreshnessCheck, RollupRouter, last_altered_sql
+
+AGG_2024 = "SELECT MARKA, SUM(NETTUTAR) AS T FROM P.GETIR2024REKABET GROUP BY MARKA"
+AGG_2023 = "SELECT MARKA, SUM(NETTUTAR) AS T FROM P.GETIR2023REKABET GROUP BY MARKA"
+
+
+def test_live_tables_not_routed_without_freshness_check():
+    router = RollupRouter()
+    assert router.route(AGG_2023) is not None
+    assert router.route(AGG_2024) is None
+    assert router.stale == 1
+
+
+def test_live_table_routed_only_when_rollup_is_fresh():
+    calls = []
+
+    def is_fresh(source, rollup):
+        calls.append((source, rollup))
+        return source == "GETIR2025REKABET"
+
+    router = RollupRouter(is_fresh=is_fresh)
+    assert router.route(AGG_2024) is None
+    assert router.route(AGG_2024.replace("2024", "2025")) is not None
+    assert calls == [("GETIR2024REKABET", "REKABET_RU_MARKA_YIL"), ("GETIR2025REKABET", "REKABET_RU_MARKA_YIL")]
+
+
+def test_freshness_check_compares_last_altered():
+    import pandas as pd
+
+    queries = []
+
+    def query_fn(sql):
+        queries.append(sql)
+        return pd.DataFrame({
+            "TABLE_NAME": ["GETIR2025REKABET", "GETIR2024REKABET", "REKABET_RU_MARKA_YIL"],
+            "LAST_ALTERED": pd.to_datetime(["2026-10-18 12:00", "2026-01-01 00:00", "2026-10-18 06:00"]),
+        })
+
+    check = FreshnessCheck(query_fn, "DB.PUBLIC", ttl=60)
+    assert check("GETIR2024REKABET", "REKABET_RU_MARKA_YIL")
+    assert not check("GETIR2025REKABET", "REKABET_RU_MARKA_YIL")
+    assert not check("GETIR2025REKABET", "REKABET_RU_MARKA_YIL_AY_MECRA")  # rollup bilgisi yok
+    assert len(queries) == 1
+    assert queries[0] == last_altered_sql("DB.PUBLIC", [
+        "GETIR2023REKABET", "GETIR2024REKABET", "GETIR2025REKABET",
+        "REKABET_RU_MARKA_YIL", "REKABET_RU_MARKA_YIL_AY_MECRA"])
+
+
+def test_freshness_check_failure_is_stale():
+    def query_fn(sql):
+        raise RuntimeError("no access")
+
+    router = RollupRouter(is_fresh=FreshnessCheck(query_fn, "DB.PUBLIC"))
+    assert router.route(f"SELECT SUM({NETTUTAR_EXPR}) FROM P.GETIR2025REKABET") is None
+
+
+# ---------- DuckDB üzerinde uçtan uca: ham sorgu ile yönlendirilmiş sorgu aynı sonucu vermeli ----------
+@pytest.fixture(scope="module")
+def duck():
+    duckdb = pytest.importorskip("duckdb")
+    from rollups import SOURCE_TABLES, build_rollups
+
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA P")
+    rows = [
+        ("GETIR", "2024", "OCAK", "TELEVIZYON", "1.234,56", "2,5", "1"),
+        ("GETIR", "2024", "OCAK", "DIJITAL", "100", "1,0", "2"),
+        ("GETIR", "2024", "ŞUBAT", "TELEVIZYON", "2.000,00", "3,5", "1"),
+        ("MIGROS", "2024", "OCAK", "TELEVIZYON", "5.000", "4,0", "3"),
+    ]
+    for t in SOURCE_TABLES:
+        con.execute(f"CREATE TABLE P.{t} (MARKA VARCHAR, YIL VARCHAR, AYISMI VARCHAR, MECRA VARCHAR, "
+                    f"NETTUTAR VARCHAR, GRP VARCHAR, ADET VARCHAR)")
+        con.executemany(f"INSERT INTO P.{t} VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    build_rollups(con.execute, "P", dialect="duckdb")
+    return con
+
+
+def _run(con, sql):
+    import sqlglot
+
+    return sorted(con.execute(sqlglot.transpile(sql, read="snowflake", write="duckdb")[0]).fetchall())
+
+
+@pytest.mark.parametrize("sql", [
+    f"SELECT MARKA, AYISMI, SUM({NETTUTAR_EXPR}) AS TOPLAM_HARCAMA FROM P.GETIR2023REKABET "
+    "WHERE MARKA ILIKE '%getir%' GROUP BY MARKA, AYISMI ORDER BY TOPLAM_HARCAMA DESC",
+    "SELECT MARKA, ROUND(SUM(TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT)), 2) AS TOPLAM_GRP, COUNT(*) AS N "
+    "FROM P.GETIR2023REKABET GROUP BY MARKA ORDER BY MARKA",
+    "SELECT SUM(TRY_CAST(REPLACE(ADET, ',', '.') AS FLOAT)) FROM P.GETIR2023REKABET WHERE MECRA = 'TELEVIZYON'",
+])
+def test_routed_query_matches_raw(duck, sql):
+    routed = RollupRouter().route(sql)
+    assert routed is not None and "REKABET_RU_" in routed
+    assert _run(duck, routed) == _run(duck, sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM P.GETIR2023REKABET WHERE MARKA = 'GETIR'",
+    "SELECT MARKA, YIL FROM P.GETIR2023REKABET WHERE MECRA = 'TELEVIZYON'",
+    "SELECT MARKA, SUM(IFF(TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT) > 1, 1, 0)) FROM P.GETIR2023REKABET GROUP BY MARKA",
+    "SELECT SUM(TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT) / 100) FROM P.GETIR2023REKABET",
+    "SELECT MARKA, AVG(TRY_CAST(REPLACE(GRP, ',', '.') AS FLOAT)) FROM P.GETIR2023REKABET GROUP BY MARKA",
+    "SELECT SPOTTIPI, SUM(GRP) FROM P.GETIR2023REKABET GROUP BY SPOTTIPI",
+    "SELECT MARKA, SUM(GRP) FROM P.GETIRKAMPANYALARI GROUP BY MARKA",
+])
+def test_router_rejects(sql):
+    router = RollupRouter()
+    assert router.route(sql) is None
+    assert router.skipped == 1
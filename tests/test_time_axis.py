@@ -0,0 +1,26 @@
+import pandas as pd
+
+from time_axis import apply_time_axes, sort_by_time
+
+
+def test_unknown_weekday_kept_and_sorted_last():
+    df = pd.DataFrame({"GUN": ["SALI", "PZT", "PAZARTESI", None], "N": [1, 2, 3, 4]})
+    out = apply_time_axes(df)
+    assert list(out["GUN"].astype(object)[:3]) == ["SALI", "PZT", "PAZARTESİ"]
+    assert out["GUN"].isna().tolist() == [False, False, False, True]
+    assert list(sort_by_time(out)["N"]) == [3, 1, 2, 4]
+
+
+def test_non_numeric_week_kept():
+    df = pd.DataFrame({"HAFTA": ["32", "2024-31", "31"], "N": [1, 2, 3]})
+    out = apply_time_axes(df)
+    assert out["HAFTA"].notna().all()
+    assert list(out["HAFTA"].astype(object)) == [32, "2024-31", 31]
+    assert list(sort_by_time(out)["N"]) == [3, 1, 2]
+
+
+def test_known_values_unchanged():
+    df = pd.DataFrame({"HAFTA": [33, 31], "GUN": ["CUMA", "SALI"]})
+    out = apply_time_axes(df)
+    assert list(out["HAFTA"].cat.categories) == [31, 33]
+    assert list(out["GUN"].cat.categories)[:2] == ["PAZARTESİ", "SALI"]
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+pytest.importorskip("sqlglot")
+duckdb = pytest.importorskip("duckdb")
+
+import sqlglot
+
+from rollups import NETTUTAR_EXPR, SOURCE_TABLES
+from typed_view import TYPED_TABLE, build_typed_table, tr_number_sql, typed_ddl
+
+COLS = ("MARKA", "YIL", "AYISMI", "TARIH", "MECRA", "NETTUTAR", "GRP", "ADET")
+ROWS = [
+    ("GETIR", "2024", "OCAK", "05.01.2024", "TELEVIZYON", "1.234,56", "2,5", "1"),
+    ("GETIR", "2024", "OCAK", "06.01.2024", "DIJITAL", "100", "1,0", "2"),
+    ("GETIR", "2024", "ŞUBAT", "01.02.2024", "TELEVIZYON", "2.000,00", "3,5", "1"),
+    ("MIGROS", "2024", "OCAK", "05.01.2024", "TELEVIZYON", "5.000", "4,0", "3"),
+]
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA P")
+    for t in SOURCE_TABLES:
+        con.execute(f"CREATE TABLE P.{t} ({', '.join(c + ' VARCHAR' for c in COLS)})")
+        year = t[5:9]  # her tablo kendi yılının satırlarını taşır
+        con.executemany(f"INSERT INTO P.{t} VALUES ({', '.join('?' for _ in COLS)})",
+                        [(r[0], year, r[2], r[3].replace("2024", year)) + r[4:] for r in ROWS])
+    build_typed_table(con.execute, "P", columns=COLS, dialect="duckdb")
+    return con
+
+
+def _raw(con, sql):
+    return sorted(con.execute(sqlglot.transpile(sql, read="snowflake", write="duckdb")[0]).fetchall())
+
+
+@pytest.mark.parametrize("year", [2023, 2024, 2025])
+def test_typed_sums_match_raw_rules(con, year):
+    raw = (f"SELECT MARKA, SUM({NETTUTAR_EXPR}) AS H, ROUND(SUM({tr_number_sql('GRP')}), 2) AS G "
+           f"FROM P.GETIR{year}REKABET GROUP BY MARKA")
+    typed = (f"SELECT MARKA, SUM(NETTUTAR) AS H, ROUND(SUM(GRP), 2) AS G "
+             f"FROM P.{TYPED_TABLE} WHERE YIL = {year} GROUP BY MARKA")
+    assert _raw(con, raw) == sorted(con.execute(typed).fetchall())
+
+
+def test_typed_columns(con):
+    types = {name: kind for name, kind, *_ in con.execute(f"DESCRIBE P.{TYPED_TABLE}").fetchall()}
+    assert types["YIL"] == "INTEGER"
+    assert types["TARIH"] == "DATE"
+    assert types["GRP"] == "DOUBLE"
+    assert types["MARKA"] == "VARCHAR"
+    assert con.execute(f"SELECT MIN(TARIH) FROM P.{TYPED_TABLE} WHERE YIL = 2024").fetchone()[0] \
+        == datetime.date(2024, 1, 5)
+
+
+def test_multi_year_without_union(con):
+    rows = con.execute(f"SELECT YIL, SUM(NETTUTAR) FROM P.{TYPED_TABLE} GROUP BY YIL ORDER BY YIL").fetchall()
+    assert [y for y, _ in rows] == [2023, 2024, 2025]
+    assert len({total for _, total in rows}) == 1
+
+
+def test_snowflake_ddl_is_clustered_by_year():
+    assert typed_ddl("DB.PUBLIC").startswith(f"CREATE OR REPLACE TABLE DB.PUBLIC.{TYPED_TABLE} CLUSTER BY (YIL) AS")
@@ -0,0 +1,46 @@
+import pytest
+
+import warmup
+from warmup import SessionPool, pooled_batches
+
+
+class FakeConn:
+    def __init__(self, name):
+        self.name = name
+
+    def close(self):
+        pass
+
+
+def _batches(conn, sql):
+    yield (conn.name, sql)
+
+
+def _broken_factory():
+    raise TypeError("unexpected keyword argument 'type'")
+
+
+def test_pool_is_off_by_default():
+    assert warmup.get_session_pool() is None
+
+
+def test_pooled_batches_uses_pool_session():
+    pool = SessionPool(lambda: FakeConn("pool"), size=1, keepalive_s=0)
+    assert list(pooled_batches(pool, "SELECT 1", _batches, fallback=lambda: FakeConn("st"))) == [("pool", "SELECT 1")]
+    assert pool.stats()["idle"] == 1
+
+
+def test_pooled_batches_falls_back_when_factory_raises():
+    pool = SessionPool(_broken_factory, size=1, keepalive_s=0)
+    assert list(pooled_batches(pool, "SELECT 1", _batches, fallback=lambda: FakeConn("st"))) == [("st", "SELECT 1")]
+    assert pool.stats()["open"] == 0
+    with pytest.raises(TypeError):
+        list(pooled_batches(pool, "SELECT 1", _batches))
+
+
+def test_launcher_only_imports_step():
+    warm = warmup.WarmUp()
+    warm.start([("a", lambda: None, True)], first=[("imports", lambda: {}, False)])
+    warm.finished.wait(5)
+    assert warm.ready and set(warm.readiness()["steps"]) == {"imports", "a"}
+    assert "imports" not in {name for name, _, _ in warmup.default_steps()}
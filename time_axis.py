@@ -0,0 +1,133 @@
+"""Zaman ekseni kolonları için sıralı Categorical motoru (AYISMI / GUN / HAFTA / TARIH).
+
+Her tekil değer yalnızca bir kez eşlenir (factorize + lookup tablosu); satır başına
+Python çağrısı yoktur. Sıralama ve grafik domain'i Categorical kodlarından gelir,
+frame'e yardımcı sıra kolonu eklenmez.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from frame_engine import to_datetime_tr
+
+MONTH_ORDER = ["OCAK","ŞUBAT","MART","NİSAN","MAYIS","HAZİRAN",
+               "TEMMUZ","AĞUSTOS","EYLÜL","EKİM","KASIM","ARALIK"]
+WEEKDAY_ORDER = ["PAZARTESİ","SALI","ÇARŞAMBA","PERŞEMBE","CUMA","CUMARTESİ","PAZAR"]
+
+_TR_ASCII = str.maketrans({"İ": "I", "ı": "I", "i": "I", "Ö": "O", "Ü": "U",
+                           "Ş": "S", "Ğ": "G", "Ç": "C"})
+
+
+def tr_key(x: str) -> str:
+    """Türkçe metni aksan/nokta/boşluk duyarsız anahtara çevirir (ŞUBAT, Subat, SUBAT -> SUBAT)."""
+    x = str(x or "").strip().upper().translate(_TR_ASCII)
+    return re.sub(r"\s+", "", x)
+
+
+CANON_BY_KEY = {tr_key(m): m for m in MONTH_ORDER}
+WEEKDAY_BY_KEY = {tr_key(d): d for d in WEEKDAY_ORDER}
+MONTH_TYPE = pd.CategoricalDtype(MONTH_ORDER, ordered=True)
+WEEKDAY_TYPE = pd.CategoricalDtype(WEEKDAY_ORDER, ordered=True)
+
+
+def _lookup_categorical(s: pd.Series, lookup: dict, dtype: pd.CategoricalDtype) -> pd.Series:
+    """Tekil değerleri lookup tablosundan kategori koduna çevirir; eşleşmeyenler NaN olur."""
+    if isinstance(s.dtype, pd.CategoricalDtype) and s.dtype == dtype:
+        return s
+    codes, uniques = pd.factorize(s)
+    pos = {c: i for i, c in enumerate(dtype.categories)}
+    ucodes = np.array([pos.get(lookup.get(tr_key(u)), -1) for u in uniques] + [-1], dtype="int16")
+    cat = pd.Categorical.from_codes(ucodes[codes], dtype=dtype)
+    return pd.Series(cat, index=s.index, name=s.name)
+
+
+def month_axis(s: pd.Series) -> pd.Series:
+    """Ay adlarını (aksan/nokta duyarsız) sıralı ay Categorical'ına çevirir."""
+    return _lookup_categorical(s, CANON_BY_KEY, MONTH_TYPE)
+
+
+def weekday_axis(s: pd.Series) -> pd.Series:
+    """GUN değerlerini (PAZARTESI...) Pazartesi'den başlayan sıralı Categorical'a çevirir."""
+    return _lookup_categorical(s, WEEKDAY_BY_KEY, WEEKDAY_TYPE)
+
+
+def week_axis(s: pd.Series) -> pd.Series:
+    """HAFTA numaralarını sayısal sıralı Categorical'a çevirir."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    nums = pd.to_numeric(s, errors="coerce").astype("Int64")
+    cats = np.sort(nums.dropna().unique().astype("int64"))
+    return pd.Series(pd.Categorical(nums, categories=cats, ordered=True), index=s.index, name=s.name)
+
+
+def date_axis(s: pd.Series) -> pd.Series:
+    """TARIH kolonunu datetime'a çevirir (tarihler zaten doğal sıralıdır)."""
+    return to_datetime_tr(s)
+
+
+# Kolon adı -> eksen dönüştürücü
+TIME_AXES = {
+    "AYISMI": month_axis,
+    "GUN": weekday_axis,
+    "HAFTA": week_axis,
+    "TARIH": date_axis,
+    "TARİH": date_axis,
+}
+
+
+def normalize_months(df: pd.DataFrame, month_col: str = "AYISMI") -> pd.DataFrame:
+    """AYISMI'nı sıralı ay Categorical'ına çevirir ve geçersiz ay satırlarını atar."""
+    if month_col not in df.columns:
+        return df
+    months = month_axis(df[month_col])
+    valid = months.notna()
+    return df.loc[valid].assign(**{month_col: months[valid]})
+
+
+def keep_unknown(s: pd.Series, axis: pd.Series) -> pd.Series:
+    """Eksen dönüşümünün NaN yaptığı dolu değerleri ("PZT", "2024-31") kategorilerin sonuna ekler.
+
+    Bilinen değerler eksen sırasında kalır; bilinmeyenler ilk görülme sırasıyla en sona gelir,
+    değerleri değişmez.
+    """
+    unknown = (axis.isna() & s.notna()).to_numpy()
+    if not unknown.any():
+        return axis
+    categories = list(axis.cat.categories)
+    known = set(categories)
+    categories += [v for v in pd.unique(s[unknown]) if v not in known]
+    values = np.where(unknown, s.to_numpy(dtype=object), axis.to_numpy(dtype=object))
+    cat = pd.Categorical(values, categories=categories, ordered=True)
+    return pd.Series(cat, index=s.index, name=s.name)
+
+
+def apply_time_axes(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame'deki tüm zaman ekseni kolonlarını sıralı tiplere çevirir (satır atmaz, değer kaybetmez).
+
+    Categorical eksenlerde tanınmayan değerler NaN olmaz, `keep_unknown` ile sona eklenir.
+    """
+    axes = {}
+    for c, fn in TIME_AXES.items():
+        if c not in df.columns:
+            continue
+        axis = fn(df[c])
+        axes[c] = keep_unknown(df[c], axis) if isinstance(axis.dtype, pd.CategoricalDtype) else axis
+    return df.assign(**axes) if axes else df
+
+
+def time_sort_cols(df: pd.DataFrame, year_col: str | None = None) -> list:
+    """Sıralama kolonları: önce yıl, sonra frame'de bulunan zaman eksenleri (kabadan inceye).
+
+    Frame'de hiç zaman ekseni yoksa boş liste döner (SQL'in kendi ORDER BY'ı korunur).
+    """
+    axes = [c for c in ("TARIH", "TARİH", "AYISMI", "HAFTA", "GUN") if c in df.columns]
+    if not axes:
+        return []
+    return ([year_col] if year_col and year_col in df.columns else []) + axes
+
+
+def sort_by_time(df: pd.DataFrame, year_col: str | None = None) -> pd.DataFrame:
+    """Frame'i yıl + zaman eksenlerine göre sıralar (Categorical kodları kullanılır)."""
+    cols = time_sort_cols(df, year_col)
+    return df.sort_values(cols, kind="stable") if cols else df
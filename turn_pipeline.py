@@ -0,0 +1,131 @@
+"""Bir turdaki tüm SQL bloklarını paralel çalıştıran, bitenleri sırayla teslim eden boru hattı.
+
+Model karşılaştırmalı sorularda ("2023 vs 2024 vs 2025") çoğu zaman birden fazla ```sql
+bloğu üretir; eskiden yalnızca ilki çalıştırılıyordu. `TurnPipeline`:
+
+- her kapanan bloğu ön kontrolden geçirip hemen sorgu executor'ına (havuzdaki warehouse
+  oturumları) gönderir; bloklar birbirini beklemez,
+- `poll()` / `wait()` ile biten blokları bitiş sırasıyla teslim eder; script thread'i
+  sonucu gelen bloğu diğerlerini beklemeden dönüştürüp çizebilir,
+- `cancel()` ile başlamamış sorguları iptal eder, süren okumaları bir sonraki batch
+  sınırında durdurur (kullanıcı tur bitmeden yeni soru sorduğunda).
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from arrow_fetch import BatchFetch
+from sql_preflight import PreflightResult
+
+
+class PendingQuery(NamedTuple):
+    future: Future
+    fetch: BatchFetch
+
+
+@dataclass
+class Block:
+    index: int                          # modelin yazdığı sıra (0'dan)
+    sql: str                            # modelin yazdığı SQL
+    checked: PreflightResult
+    pending: PendingQuery | None = None
+    slot: object = None                 # çizim yeri (Streamlit placeholder'ı vb.)
+    delivered: bool = False
+    preview_shown: bool = False
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def rejected(self) -> bool:
+        return not self.checked.ok
+
+    @property
+    def done(self) -> bool:
+        return self.rejected or self.pending.future.done()
+
+    def result(self):
+        """(df, profile, meta); sorgu hatasını olduğu gibi yükseltir."""
+        return self.pending.future.result()
+
+
+class TurnPipeline:
+    """`preflight(sql) -> PreflightResult`, `submit(sql) -> PendingQuery` ile çalışır."""
+
+    def __init__(self, preflight, submit, max_blocks: int = 8):
+        self.preflight = preflight
+        self.submit = submit
+        self.max_blocks = max_blocks
+        self.blocks: list[Block] = []
+        self.skipped = 0                # max_blocks'u aşan bloklar
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def add(self, sql: str, slot=None) -> Block | None:
+        """Bloğu kontrol edip (geçerse) hemen çalıştırır; sınır aşıldıysa None."""
+        if self.cancelled:
+            return None
+        if len(self.blocks) >= self.max_blocks:
+            self.skipped += 1
+            return None
+        checked = self.preflight(sql)
+        block = Block(index=len(self.blocks), sql=sql, checked=checked, slot=slot)
+        if checked.ok:
+            block.pending = self.submit(checked.sql)
+        with self._lock:
+            self.blocks.append(block)
+        return block
+
+    # ---------- teslim ----------
+    def poll(self) -> list[Block]:
+        """Bitmiş ama henüz teslim edilmemiş blokları (model sırasıyla) döndürür; beklemez."""
+        out = []
+        with self._lock:
+            for b in self.blocks:
+                if not b.delivered and b.done:
+                    b.delivered = True
+                    out.append(b)
+        return out
+
+    def waiting(self) -> list[Block]:
+        with self._lock:
+            return [b for b in self.blocks if not b.delivered and not b.done]
+
+    def wait(self, timeout: float | None = None) -> list[Block]:
+        """En az bir blok bitene (veya süre dolana) kadar bekler; biten blokları döndürür."""
+        ready = self.poll()
+        if ready:
+            return ready
+        futures = [b.pending.future for b in self.waiting()]
+        if futures:
+            wait_futures(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        return self.poll()
+
+    @property
+    def finished(self) -> bool:
+        with self._lock:
+            return all(b.delivered for b in self.blocks)
+
+    # ---------- iptal ----------
+    def cancel(self) -> int:
+        """Başlamamış sorguları iptal eder, sürenleri durdurur; etkilenen blok sayısı."""
+        self.cancelled = True
+        n = 0
+        with self._lock:
+            blocks = list(self.blocks)
+        for b in blocks:
+            if b.pending is None or b.pending.future.done():
+                continue
+            b.pending.future.cancel()
+            b.pending.fetch.cancel()
+            n += 1
+        return n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Script yarıda kesildiyse (Streamlit rerun/stop dahil) arka plandaki sorgular boşa çalışmasın
+        if exc_type is not None:
+            self.cancel()
+        return False
@@ -0,0 +1,110 @@
+"""Tipli, tek tablo REKABET katmanı (parse-once ETL).
+
+GETIR2023/2024/2025REKABET tablolarında sayılar Türkçe biçimli metin olarak durur;
+bu yüzden her sorgu kural 9 / 17'deki REPLACE/TRY_CAST zincirini satır satır yeniden
+hesaplar ve çok yıllı sorular UNION gerektirir. Bu modül üç tabloyu tek bir
+GETIRREKABET tablosunda birleştirir:
+
+- sayısal kolonlar yükleme anında bir kez parse edilir (NETTUTAR kural 17 ile aynı),
+- TARIH gerçek DATE olur, YIL tamsayıdır ve tablo YIL'a göre kümelenir,
+- metin kolonları olduğu gibi kalır.
+
+`prompts.py` içindeki "typed" prompt modu bu tabloyu hedefler (cast'siz kısa SQL).
+DDL: `python typed_view.py --ddl GETIR_2023_REVISED.PUBLIC`; DuckDB üzerinde testler: tests/test_typed_view.py.
+"""
+from rollups import NETTUTAR_EXPR, SOURCE_TABLES
+
+try:  # opsiyonel: DuckDB için DDL çevirisi
+    import sqlglot
+except ImportError:
+    sqlglot = None
+
+TYPED_TABLE = "GETIRREKABET"
+
+# fieldContext'teki REKABET kolonları (tablo sırasıyla)
+REKABET_COLUMNS = (
+    "KATEGORI", "KATEGORIDETAY", "AYISMI", "TARIH", "HAFTA", "GUN", "YIL", "BASLANGIC",
+    "SAATDILIMI", "DAYPART", "MECRA", "ANAYAYIN", "ANAMARKA", "MARKA", "VERSIYON",
+    "SPOTTIPI", "SPOTTIPID", "SPOTKONUMU", "KAMPANYA", "REKLAMSLOGANI", "ANASEKTOR",
+    "SEKTOR", "REKLAMINFIRMASI", "URUNTURU", "PROGRAM", "TPGRUP", "UNITE", "UNITEDETAY",
+    "ILI", "BOLGE", "URUNHIZMET", "SURE", "GRP", "GRP1544ABC1", "FREKANS", "TABLOIDSYF",
+    "TABLOIDCM", "GUNSAYISI", "ADET", "GRPXSURE20ABC1", "GRP3020ABC1", "IMAJPROMO",
+    "MECRADETAY", "FSPOTTIPI", "BRFIYAT", "NETTUTAR", "PARTNER", "TEMATIKKANALTURU",
+    "KAMPANYADETAY",
+)
+
+# Ondalık ayracı virgül olan ölçüler (kural 9: REPLACE(GRP, ',', '.'))
+DECIMAL_COLS = ("GRP", "GRP1544ABC1", "GRPXSURE20ABC1", "GRP3020ABC1", "ADET", "TABLOIDCM")
+# Tamsayı kolonları
+INTEGER_COLS = ("YIL", "HAFTA", "SAATDILIMI", "SURE", "FREKANS", "TABLOIDSYF", "GUNSAYISI")
+# Para kolonları: tek başına nokta binlik ayracıdır (kural 17)
+MONEY_COLS = ("NETTUTAR", "BRFIYAT")
+
+
+def tr_number_sql(col: str, dot_is_thousands: bool = False) -> str:
+    """Türkçe biçimli metin kolonunu FLOAT'a çeviren Snowflake ifadesi."""
+    if not dot_is_thousands:
+        return f"TRY_CAST(REPLACE({col}, ',', '.') AS FLOAT)"
+    clean = f"REPLACE(REPLACE({col}, '₺', ''), ' ', '')"
+    return (
+        f"TRY_CAST(CASE "
+        f"WHEN {col} LIKE '%.%' AND {col} LIKE '%,%' THEN REPLACE(REPLACE({clean}, '.', ''), ',', '.') "
+        f"WHEN {col} LIKE '%,%' THEN REPLACE({clean}, ',', '.') "
+        f"WHEN {col} LIKE '%.%' THEN REPLACE({clean}, '.', '') "
+        f"ELSE {clean} END AS FLOAT)"
+    )
+
+
+def column_expr(col: str) -> str:
+    """Tipli tablodaki kolonun kaynak ifadesi."""
+    if col == "NETTUTAR":
+        return NETTUTAR_EXPR  # kural 17 ile birebir aynı sonuç
+    if col in MONEY_COLS:
+        return tr_number_sql(col, dot_is_thousands=True)
+    if col in DECIMAL_COLS:
+        return tr_number_sql(col)
+    if col in INTEGER_COLS:
+        return f"TRY_CAST(REPLACE({col}, ',', '.') AS INT)"
+    if col == "TARIH":
+        return "TRY_TO_DATE(TARIH, 'DD.MM.YYYY')"
+    return col
+
+
+def typed_select(schema_path: str, columns=REKABET_COLUMNS, sources=SOURCE_TABLES) -> str:
+    """Üç yıllık tabloyu tipli kolonlarla birleştiren SELECT (Snowflake SQL)."""
+    select = ",\n    ".join(f"{column_expr(c)} AS {c}" if column_expr(c) != c else c for c in columns)
+    return "\nUNION ALL\n".join(f"SELECT\n    {select}\nFROM {schema_path}.{t}" for t in sources)
+
+
+def typed_ddl(schema_path: str, columns=REKABET_COLUMNS, sources=SOURCE_TABLES,
+              table: str = TYPED_TABLE) -> str:
+    """Tipli tabloyu (YIL'a göre kümelenmiş) oluşturan CREATE OR REPLACE TABLE ifadesi."""
+    return (
+        f"CREATE OR REPLACE TABLE {schema_path}.{table} CLUSTER BY (YIL) AS\n"
+        f"{typed_select(schema_path, columns, sources)}"
+    )
+
+
+def build_typed_table(execute, schema_path: str, columns=REKABET_COLUMNS,
+                      sources=SOURCE_TABLES, dialect: str = "snowflake"):
+    """Tipli tabloyu `execute(sql)` ile oluşturur/yeniler. DuckDB için dialect="duckdb".
+
+    Kaynak tablolar yeni veri aldığında (ör. günlük yükleme sonrası) yeniden çağrılmalıdır.
+    """
+    ddl = typed_ddl(schema_path, columns, sources)
+    if dialect != "snowflake":
+        if sqlglot is None:
+            raise RuntimeError("DuckDB için DDL çevirisi sqlglot gerektirir.")
+        # CLUSTER BY Snowflake'e özgüdür
+        ddl = sqlglot.transpile(ddl.replace(" CLUSTER BY (YIL)", ""), read="snowflake", write=dialect)[0]
+    execute(ddl)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tipli GETIRREKABET tablosu")
+    parser.add_argument("--ddl", metavar="SCHEMA_PATH", required=True,
+                        help="Snowflake DDL'ini yazdır (ör. GETIR_2023_REVISED.PUBLIC)")
+    args = parser.parse_args()
+    print(typed_ddl(args.ddl) + ";")
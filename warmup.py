@@ -0,0 +1,510 @@
+"""Süreç düzeyinde sıcak başlatma (ilk kullanıcı beklemesin).
+
+OpenAI istemcisi, Snowflake bağlantısı ve şema bağlamı normalde ilk kullanıcının script
+çalıştırmasında tembel olarak kurulur; deploy/restart sonrası ilk soru bağlantı kurulumu,
+Snowflake login'i ve şema sorgularını öder. Bu modül:
+
+- `SessionPool`: paylaşılan warehouse oturumu havuzu; boşta bekleyen oturumlara periyodik
+  `SELECT 1` (keepalive), kopan oturumları yeniler,
+- `get_llm_client()`: süreç genelinde tek OpenAI istemcisi (uzun keepalive'lı HTTP havuzu);
+  ısınmada bir istekle TLS bağlantısı önceden açılır ve periyodik olarak sıcak tutulur,
+- `WarmUp`: prompt bağlamı, oturum havuzu ve LLM bağlantısını arka planda paralel hazırlar;
+  `readiness()` ve `/ready` uç noktası hazır olma durumunu verir.
+
+Streamlit'in bir başlangıç kancası olmadığı için ısınma iki yoldan tetiklenir:
+- `python warmup.py -- talkdata.py [streamlit seçenekleri]`: ısınmayı başlatır, `/ready`
+  uç noktasını açar ve Streamlit'i aynı süreçte başlatır (importlar ve cache'ler paylaşılır);
+  ağır modüllerin önceden importu yalnızca bu yolda işe yarar ve yalnızca bu yolda yapılır,
+- `streamlit run talkdata.py`: ilk script çalıştırmasında `start_warmup()` arka planda başlar;
+  talkdata'nın kendi importları o ana kadar zaten bitmiş olur.
+
+Oturum havuzu varsayılan olarak kapalıdır (WARM_POOL_SIZE = 0): havuz `st.connection` yerine
+doğrudan `snowflake.connector.connect(**secrets["connections"]["snowflake"])` kullanır. Açıkken
+havuz oturum açamazsa sorgular `st.connection("snowflake")` ile çalışır.
+"""
+import importlib
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+from arrow_fetch import snowflake_batches
+
+# talkdata'nın ilk çalıştırmada ödediği import maliyeti (ilk importlar birkaç saniye sürebilir);
+# yalnızca `python warmup.py` başlatıcısında, Streamlit script'i import etmeden önce işe yarar
+HEAVY_MODULES = ("pandas", "pyarrow", "numpy", "altair", "openai", "httpx", "snowflake.connector", "sqlglot", "duckdb")
+
+logger = logging.getLogger("talkdata.warmup")
+
+
+# =========================
+# Warehouse oturum havuzu
+# =========================
+class SessionPool:
+    """Thread-safe oturum havuzu. `factory()` yeni bir DB-API bağlantısı (cursor() destekli) döndürür."""
+
+    def __init__(self, factory, size: int = 4, keepalive_s: float = 600.0, ping_sql: str = "SELECT 1"):
+        self.factory = factory
+        self.size = size
+        self.keepalive_s = keepalive_s
+        self.ping_sql = ping_sql
+        self._idle = queue.LifoQueue()  # LIFO: en son kullanılan (en sıcak) oturum önce verilir
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stop = threading.Event()
+        self.reused = 0
+        self.waits = 0
+        self.pings = 0
+        self.replaced = 0
+        if keepalive_s:
+            threading.Thread(target=self._keepalive_loop, name="pool-keepalive", daemon=True).start()
+
+    def fill(self, n: int | None = None) -> int:
+        """Havuzu `n` (varsayılan: tam boyut) boşta oturuma kadar önceden doldurur."""
+        target = self.size if n is None else min(n, self.size)
+        opened = 0
+        while True:
+            with self._lock:
+                if self._created >= self.size or self._idle.qsize() >= target:
+                    return opened
+                self._created += 1
+            try:
+                self._idle.put(self.factory())
+                opened += 1
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    @contextmanager
+    def acquire(self, timeout: float = 60.0):
+        conn = self.take(timeout)
+        try:
+            yield conn
+        finally:
+            self.give(conn)
+
+    def close(self):
+        self._stop.set()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "open": self._created, "idle": self._idle.qsize(), "reused": self.reused,
+                "waits": self.waits, "pings": self.pings, "replaced": self.replaced}
+
+    def take(self, timeout: float = 60.0):
+        """Boşta bir oturum verir (yoksa açar / bekler); `give` ile geri verilmeli."""
+        try:
+            conn = self._idle.get_nowait()
+            self.reused += 1
+            return conn
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        self.waits += 1
+        return self._idle.get(timeout=timeout)
+
+    def give(self, conn):
+        if _is_closed(conn):
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    # ---------- iç yardımcılar ----------
+    def _discard(self, conn):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _ping(self, conn) -> bool:
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute(self.ping_sql)
+                cur.fetchall()
+            finally:
+                cur.close()
+            self.pings += 1
+            return True
+        except Exception:
+            return False
+
+    def _keepalive_loop(self):
+        while not self._stop.wait(self.keepalive_s):
+            idle = []
+            while True:
+                try:
+                    idle.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            for conn in idle:
+                if self._ping(conn):
+                    self._idle.put(conn)
+                    continue
+                self._discard(conn)
+                self.replaced += 1
+                try:
+                    self.fill(len(idle))
+                except Exception as e:
+                    logger.warning("oturum yenilenemedi: %r", e)
+
+
+def _is_closed(conn) -> bool:
+    check = getattr(conn, "is_closed", None)
+    try:
+        return bool(check()) if callable(check) else False
+    except Exception:
+        return True
+
+
+def pooled_batches(pool: SessionPool, sql: str, batches_fn=snowflake_batches, fallback=None):
+    """Havuzdan bir oturum alıp `batches_fn(conn, sql)` batch'lerini üretir; üretici kapanınca oturum geri döner.
+
+    Havuz oturum veremezse (secrets'ta `[connections.snowflake]` yok, connector'ın kabul etmediği
+    anahtarlar var ya da havuz dolu) ve `fallback` verildiyse batch'ler `fallback()` bağlantısından gelir.
+    """
+    try:
+        conn = pool.take()
+    except Exception as e:
+        if fallback is None:
+            raise
+        logger.warning("havuzdan oturum alınamadı, yedek bağlantı kullanılıyor: %r", e)
+        yield from batches_fn(fallback(), sql)
+        return
+    try:
+        yield from batches_fn(conn, sql)
+    finally:
+        pool.give(conn)
+
+
+def snowflake_factory():
+    """`[connections.snowflake]` secrets'ıyla (st.connection ile aynı) yeni bir connector oturumu."""
+    import snowflake.connector
+
+    params = dict(st.secrets["connections"]["snowflake"])
+    params.setdefault("client_session_keep_alive", True)
+    return snowflake.connector.connect(**params)
+
+
+@st.cache_resource
+def get_session_pool() -> SessionPool | None:
+    """WARM_POOL_SIZE > 0 ise süreç genelinde paylaşılan oturum havuzu; 0 ise None (st.connection kullanılır)."""
+    size = int(st.secrets.get("WARM_POOL_SIZE", 0))
+    if size <= 0:
+        return None
+    return SessionPool(snowflake_factory, size=size,
+                       keepalive_s=float(st.secrets.get("WARM_KEEPALIVE_SECONDS", 600)))
+
+
+# =========================
+# LLM istemcisi
+# =========================
+@st.cache_resource
+def get_llm_client():
+    """Tek OpenAI istemcisi; HTTP bağlantıları script çalıştırmaları arasında yeniden kullanılır."""
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+
+    # httpx varsayılanı 5 sn boşta kalan bağlantıyı kapatır; ısınmanın faydası kaybolmasın
+    keepalive = float(st.secrets.get("LLM_KEEPALIVE_SECONDS", 120))
+    http_client = DefaultHttpxClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=20,
+                                                         keepalive_expiry=keepalive))
+    return OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", None), http_client=http_client)
+
+
+def preconnect_llm(client) -> None:
+    """Kimlik doğrulamalı hafif bir istekle DNS + TLS + HTTP/1.1 keepalive bağlantısını açar."""
+    client.with_options(timeout=10, max_retries=0).models.list()
+
+
+# =========================
+# Isınma
+# =========================
+class IdleKeepAlive:
+    """`fn`'i `interval` aralıkla çağırır; son `touch()`'tan `idle_ttl` sn sonra durur.
+
+    Uygulama boştayken sağlayıcıya sonsuza kadar istek atılmaz; sonraki `touch()` döngüyü
+    yeniden başlatır.
+    """
+
+    def __init__(self, fn, interval: float, idle_ttl: float, name: str):
+        self.fn = fn
+        self.interval = interval
+        self.idle_ttl = idle_ttl
+        self.name = name
+        self._lock = threading.Lock()
+        self._last = time.monotonic()
+        self._running = False
+
+    def touch(self):
+        with self._lock:
+            self._last = time.monotonic()
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._loop, name=self.name, daemon=True).start()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self._last > self.idle_ttl
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if self._idle():
+                    self._running = False
+                    return
+            try:
+                self.fn()
+            except Exception as e:
+                logger.debug("%s başarısız: %r", self.name, e)
+
+
+class WarmUp:
+    """Isınma adımlarını arka planda çalıştırır ve durumlarını raporlar.
+
+    `steps`: [(ad, fn, zorunlu_mu), ...]; `first` içindeki adımlar sırayla önce, kalanlar paralel
+    çalışır. Zorunlu adımların hepsi başarıyla bittiğinde `ready` olur.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps: dict[str, dict] = {}
+        self.started_at: float | None = None
+        self.finished = threading.Event()
+
+    def start(self, steps: list, first: list = ()) -> bool:
+        with self._lock:
+            if self.started_at is not None:
+                return False
+            self.started_at = time.time()
+            for name, _, required in [*first, *steps]:
+                self.steps[name] = {"status": "pending", "required": required}
+        threading.Thread(target=self._run_all, args=(list(first), steps), name="warmup", daemon=True).start()
+        return True
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self.started_at is not None and all(
+                s["status"] == "ok" for s in self.steps.values() if s["required"])
+
+    def readiness(self) -> dict:
+        with self._lock:
+            steps = {k: dict(v) for k, v in self.steps.items()}
+        return {"ready": self.ready, "finished": self.finished.is_set(), "started_at": self.started_at,
+                "steps": steps}
+
+    def _run_all(self, first: list, steps: list):
+        for step in first:
+            self._run(*step)
+        threads = [threading.Thread(target=self._run, args=s, name=f"warmup-{s[0]}", daemon=True) for s in steps]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.finished.set()
+        logger.info("ısınma bitti: %s", json.dumps(self.readiness(), default=str))
+
+    def _run(self, name: str, fn, required: bool):
+        with self._lock:
+            self.steps[name]["status"] = "running"
+        t0 = time.perf_counter()
+        try:
+            detail = fn()
+            status, error = "ok", None
+        except Exception as e:
+            detail, status, error = None, "error", repr(e)
+            logger.warning("ısınma adımı %s başarısız: %s", name, error)
+        with self._lock:
+            self.steps[name].update(status=status, elapsed_s=round(time.perf_counter() - t0, 3), error=error)
+            if detail is not None:
+                self.steps[name]["detail"] = detail
+
+
+def import_heavy_modules(modules=HEAVY_MODULES) -> dict:
+    """Modülleri önceden import eder; modül başına süre (saniye), kurulu olmayanlar atlanır.
+
+    Yalnızca başlatıcı adımı (`start_warmup(launcher=True)`): `streamlit run talkdata.py` ile
+    bu modüller talkdata'nın en üstünde zaten import edilmiş olur.
+    """
+    timings = {}
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = round(time.perf_counter() - t0, 3)
+    return timings
+
+
+def _warm_schema() -> dict:
+    from prompts import PROMPT_MODE, get_prompt_builder, get_schema_loader
+
+    get_schema_loader(PROMPT_MODE).context()  # diskte kopya yoksa burada (ilk kullanıcıdan önce) çekilir
+    parts = get_prompt_builder(PROMPT_MODE).parts()
+    return {"mode": PROMPT_MODE, "prompt_chars": len(parts.text)}
+
+
+def _warm_entities() -> dict | None:
+    from prompts import ENTITY_INDEX, PROMPT_MODE, get_entity_index
+
+    if not ENTITY_INDEX:
+        return None
+    index = get_entity_index(PROMPT_MODE)
+    index.ensure(block=True)
+    return index.stats()
+
+
+def _warm_warehouse() -> dict | None:
+    pool = get_session_pool()
+    if pool is None:
+        return None
+    opened = pool.fill(int(st.secrets.get("WARM_POOL_MIN", 2)))
+    warehouse = st.secrets["connections"]["snowflake"].get("warehouse")
+    if st.secrets.get("WARMUP_RESUME_WAREHOUSE", False) and warehouse:
+        # Kredi harcar; yalnızca açıkça istenirse askıdaki warehouse'u uyandırır
+        with pool.acquire() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(f'ALTER WAREHOUSE IF EXISTS "{warehouse}" RESUME IF SUSPENDED')
+            finally:
+                cur.close()
+    return {"opened": opened, **pool.stats()}
+
+
+@st.cache_resource
+def get_llm_keepalive() -> IdleKeepAlive | None:
+    """LLM bağlantısını boşta kapanmadan önce yeniler; LLM_IDLE_TTL_SECONDS boyunca istek yoksa durur."""
+    interval = float(st.secrets.get("LLM_KEEPALIVE_SECONDS", 120))
+    if interval <= 0:
+        return None
+    client = get_llm_client()
+    return IdleKeepAlive(lambda: preconnect_llm(client), max(interval * 0.8, 5),
+                         idle_ttl=float(st.secrets.get("LLM_IDLE_TTL_SECONDS", 1800)), name="llm-keepalive")
+
+
+def touch_llm_keepalive() -> None:
+    """Her LLM isteğinde çağrılır: boşta süresini sıfırlar, durmuşsa keep-alive'ı yeniden başlatır."""
+    keepalive = get_llm_keepalive()
+    if keepalive is not None:
+        keepalive.touch()
+
+
+def _warm_llm() -> None:
+    preconnect_llm(get_llm_client())
+    touch_llm_keepalive()
+
+
+def default_steps() -> list:
+    return [
+        ("schema", _warm_schema, True),
+        ("warehouse", _warm_warehouse, False),
+        ("entities", _warm_entities, False),
+        ("llm", _warm_llm, False),
+    ]
+
+
+@st.cache_resource
+def get_warmup() -> WarmUp:
+    return WarmUp()
+
+
+def start_warmup(launcher: bool = False) -> WarmUp:
+    """Isınmayı (süreçte bir kez) başlatır; her script çalıştırmasında çağrılabilir.
+
+    `launcher`: `python warmup.py` başlatıcısından çağrıldı; ağır importlar önce yapılır.
+    """
+    warm = get_warmup()
+    warm.start(default_steps(), first=[("imports", import_heavy_modules, False)] if launcher else [])
+    return warm
+
+
+def serve_readiness(warm: WarmUp, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """`/ready` (hazırsa 200, değilse 503) ve `/live` uç noktalarını arka plan thread'inde açar."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/live":
+                code, payload = 200, {"live": True}
+            elif path == "/ready":
+                payload = warm.readiness()
+                code = 200 if payload["ready"] else 503
+            else:
+                self.send_error(404)
+                return
+            body = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="readiness-http", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Isınmayı başlatıp Streamlit'i aynı süreçte çalıştırır",
+        usage="python warmup.py [--ready-port 8502] -- talkdata.py [streamlit seçenekleri]",
+    )
+    parser.add_argument("--ready-port", type=int, default=int(st.secrets.get("WARMUP_READY_PORT", 0) or 0),
+                        help="/ready ve /live uç noktaları için port (0: kapalı)")
+    parser.add_argument("--check", action="store_true", help="yalnızca ısın, durumu yazdır ve çık")
+    parser.add_argument("script", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    # Bu dosya __main__ olarak çalışıyor; uygulama ise `warmup` modülünü import ediyor.
+    # cache_resource anahtarı modül adını içerdiğinden ısınma uygulamanın kullanacağı modülde yapılmalı.
+    import warmup as app_warmup
+
+    warm = app_warmup.start_warmup(launcher=True)
+    if args.ready_port:
+        app_warmup.serve_readiness(warm, args.ready_port)
+    if args.check:
+        warm.finished.wait()
+        print(json.dumps(warm.readiness(), indent=2, default=str))
+        sys.exit(0 if warm.ready else 1)
+
+    from streamlit.web import cli as stcli
+
+    script = [a for a in args.script if a != "--"] or ["talkdata.py"]
+    sys.argv = ["streamlit", "run", *script]
+    sys.exit(stcli.main())